@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from database import get_db, Session as DBSession, ActivityLog
+from fastapi.responses import StreamingResponse
+from database import Session as DBSession
 from api.auth import get_session_from_header
 from services import NewtonClient, AISolver
+from services.newton_client import response_cache
+from services.records import AssignmentRecord
+from services.activity_writer import activity_writer
+from services.state_backend import state_backend, SESSION_DATA_CHANGED, USER_PERFORMANCE_CHANGED
 from schemas import (
     AssignmentListItem,
+    AssignmentListResponse,
     AssignmentDetail,
     SolveRequest,
     SolveResponse,
@@ -13,78 +18,176 @@ from schemas import (
     QuestionDetail
 )
 from config import settings
-from typing import List, Optional
+from utils.serialization import build, dumps, respond
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("", response_model=List[AssignmentListItem])
+def _to_list_item(assignment: AssignmentRecord, course_hash: str) -> AssignmentListItem:
+    """Build an AssignmentListItem from a projected upstream assignment"""
+    return build(
+        AssignmentListItem,
+        hash=assignment.hash,
+        title=assignment.title,
+        type=assignment.type,
+        due_date=assignment.due_date,
+        questions_total=assignment.questions_count,
+        questions_solved=assignment.questions_solved,
+        xp=assignment.xp,
+        difficulty=assignment.difficulty,
+        status="completed" if assignment.is_completed else "pending",
+        course_hash=course_hash
+    )
+
+
+async def _stream_assignments(
+    newton_client: NewtonClient,
+    courses: List[dict],
+    status: Optional[str],
+    difficulty: Optional[str],
+    limit: int
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Yield ("assignment", AssignmentListItem) and ("error", {...}) entries
+
+    Courses are paged through concurrently (bounded by the fan-out settings)
+    while results are yielded in course order. Filters are applied as items
+    arrive. A course stops paging as soon as it and the courses before it
+    have matched `limit` items between them, since nothing more of it could
+    be yielded, so fetching ends when the limit is reached in course order.
+    """
+    semaphore = asyncio.Semaphore(settings.course_fanout_concurrency)
+    course_hashes = [course.get("hash") for course in courses if course.get("hash")]
+    queues = {c_hash: asyncio.Queue() for c_hash in course_hashes}
+    matched = [0] * len(course_hashes)  # matching items per course, shared by the producers
+
+    async def produce(index: int, c_hash: str):
+        queue = queues[c_hash]
+        try:
+            async with semaphore:
+                pages = newton_client.iter_assignments(c_hash)
+                try:
+                    while sum(matched[:index + 1]) < limit:
+                        try:
+                            assignment = await asyncio.wait_for(
+                                pages.__anext__(),
+                                settings.course_call_timeout
+                            )
+                        except StopAsyncIteration:
+                            break
+
+                        # Apply filters
+                        item_status = "completed" if assignment.is_completed else "pending"
+                        if status and item_status != status:
+                            continue
+                        if difficulty and assignment.difficulty != difficulty:
+                            continue
+
+                        matched[index] += 1
+                        queue.put_nowait(("assignment", _to_list_item(assignment, c_hash)))
+                finally:
+                    await pages.aclose()
+
+        except Exception as e:
+            message = "Timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"Error fetching assignments for course {c_hash}: {message}")
+            queue.put_nowait(("error", {"course_hash": c_hash, "error": message}))
+
+        finally:
+            queue.put_nowait(None)
+
+    tasks = [asyncio.create_task(produce(index, c_hash)) for index, c_hash in enumerate(course_hashes)]
+
+    try:
+        remaining = limit
+        for c_hash in course_hashes:
+            while True:
+                entry = await queues[c_hash].get()
+                if entry is None:
+                    break
+
+                yield entry
+
+                if entry[0] == "assignment":
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def collect_assignments(
+    newton_client: NewtonClient,
+    courses: List[dict],
+    status: Optional[str],
+    difficulty: Optional[str],
+    limit: int
+) -> AssignmentListResponse:
+    """Gather up to `limit` matching assignments across courses into one response"""
+    assignments = []
+    errors = []
+    async for kind, value in _stream_assignments(newton_client, courses, status, difficulty, limit):
+        if kind == "assignment":
+            assignments.append(value)
+        else:
+            errors.append(value)
+
+    return build(AssignmentListResponse, assignments=assignments, errors=errors)
+
+
+@router.get("", response_model=AssignmentListResponse)
 async def list_assignments(
     course_hash: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     difficulty: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=500),
-    db_session: DBSession = Depends(get_session_from_header),
-    db: Session = Depends(get_db)
+    stream: bool = Query(False),
+    db_session: DBSession = Depends(get_session_from_header)
 ):
     """
     List all assignments with optional filters
+
+    With stream=true the response is NDJSON: one {"assignment": {...}} or
+    {"error": {...}} object per line, sent as soon as each course yields it.
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
+    streaming = False
 
     try:
-        assignments = []
-
         # Get courses
         if course_hash:
             courses = [{"hash": course_hash}]
         else:
             courses = await newton_client.get_courses()
 
-        # Get assignments for each course
-        for course in courses:
-            c_hash = course.get("hash")
-            if not c_hash:
-                continue
-
-            try:
-                result = await newton_client.get_assignments(c_hash, limit=limit)
-                course_assignments = result.get("results", []) if isinstance(result, dict) else result
-
-                for assignment in course_assignments:
-                    # Parse assignment data
-                    item = AssignmentListItem(
-                        hash=assignment.get("hash", ""),
-                        title=assignment.get("title", ""),
-                        type=assignment.get("type", "mixed"),
-                        due_date=assignment.get("due_date"),
-                        questions_total=assignment.get("questions_count", 0),
-                        questions_solved=assignment.get("questions_solved", 0),
-                        xp=assignment.get("xp", 0),
-                        difficulty=assignment.get("difficulty"),
-                        status="completed" if assignment.get("is_completed") else "pending",
-                        course_hash=c_hash
-                    )
-
-                    # Apply filters
-                    if status and item.status != status:
-                        continue
-                    if difficulty and item.difficulty != difficulty:
-                        continue
+        if stream:
+            entries = _stream_assignments(newton_client, courses, status, difficulty, limit)
 
-                    assignments.append(item)
+            async def ndjson():
+                try:
+                    async for kind, value in entries:
+                        yield dumps({kind: value}) + b"\n"
+                finally:
+                    await entries.aclose()
+                    await newton_client.close()
 
-            except Exception as e:
-                logger.error(f"Error fetching assignments for course {c_hash}: {str(e)}")
-                continue
+            streaming = True
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
-        return assignments[:limit]
+        return respond(await collect_assignments(newton_client, courses, status, difficulty, limit))
 
     finally:
-        await newton_client.close()
+        # A streaming response closes the client once the stream ends
+        if not streaming:
+            await newton_client.close()
 
 
 @router.get("/{assignment_hash}", response_model=AssignmentDetail)
@@ -96,7 +199,7 @@ async def get_assignment(
     """
     Get detailed assignment information including questions
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
         # Get assignment details
@@ -141,8 +244,7 @@ async def solve_assignment(
     assignment_hash: str,
     request: SolveRequest,
     course_hash: str = Query(...),
-    db_session: DBSession = Depends(get_session_from_header),
-    db: Session = Depends(get_db)
+    db_session: DBSession = Depends(get_session_from_header)
 ):
     """
     Solve assignment using AI
@@ -150,7 +252,7 @@ async def solve_assignment(
     if not settings.anthropic_api_key:
         raise HTTPException(status_code=500, detail="AI solver not configured")
 
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
     ai_solver = AISolver(settings.anthropic_api_key)
 
     try:
@@ -288,7 +390,7 @@ async def solve_assignment(
         xp_earned = int(assignment.get("xp", 0) * (score / 100))
 
         # Log activity
-        log = ActivityLog(
+        await activity_writer.log(
             user_email=db_session.user_email,
             action_type="solve_assignment",
             details={
@@ -299,8 +401,12 @@ async def solve_assignment(
             },
             status="success"
         )
-        db.add(log)
-        db.commit()
+
+        # Submissions change progress and performance upstream
+        if request.mode == "auto_submit":
+            await response_cache.invalidate_shared_session(db_session.session_id)
+            await state_backend.publish(SESSION_DATA_CHANGED, db_session.session_id)
+            await state_backend.publish(USER_PERFORMANCE_CHANGED, db_session.user_email)
 
         return SolveResponse(
             status="completed",
@@ -322,7 +428,7 @@ async def get_assignment_status(
     """
     Get assignment completion status
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
         assignment = await newton_client.get_assignment_details(course_hash, assignment_hash)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from database import get_db, User, Session as DBSession
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, User, Session as DBSession, StreamTicket
 from schemas import LoginRequest, LoginResponse, AuthStatus
 from services import AuthService, NewtonClient
+from services.newton_client import response_cache
+from services.session_cache import session_cache, SessionCache
+from services.state_backend import state_backend, SESSION_REVOKED
+from services.activity_writer import activity_writer
+from services.session_purger import deactivate_excess_sessions
 from config import settings
+import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta
 import logging
 
@@ -12,9 +20,22 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_session_from_header(
+def _session_snapshot(db_session: DBSession) -> dict:
+    """Plain attribute copy of a session row for the session cache"""
+    return {
+        "id": db_session.id,
+        "session_id": db_session.session_id,
+        "user_email": db_session.user_email,
+        "cookies": db_session.cookies,
+        "is_active": db_session.is_active,
+        "created_at": db_session.created_at,
+        "expires_at": db_session.expires_at,
+    }
+
+
+async def get_session_from_header(
     authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> DBSession:
     """Dependency to get session from Authorization header"""
     if not authorization:
@@ -22,30 +43,84 @@ def get_session_from_header(
 
     try:
         session_id = authorization.replace("Bearer ", "")
-        db_session = db.query(DBSession).filter(
+
+        cached = session_cache.get(session_id)
+        if cached is SessionCache.INVALID:
+            raise HTTPException(status_code=401, detail="Invalid or expired session")
+        if cached is not None:
+            # Detached copy; routes only read session attributes
+            return DBSession(**cached)
+
+        started = time.perf_counter()
+        db_session = await db.scalar(select(DBSession).where(
             DBSession.session_id == session_id,
             DBSession.is_active == True
-        ).first()
+        ))
+        session_cache.record_db_lookup(time.perf_counter() - started)
 
         if not db_session:
+            session_cache.set_invalid(session_id)
             raise HTTPException(status_code=401, detail="Invalid or expired session")
 
         # Check if session is expired
         if db_session.expires_at < datetime.utcnow():
             db_session.is_active = False
-            db.commit()
+            await db.commit()
+            session_cache.set_invalid(session_id)
             raise HTTPException(status_code=401, detail="Session expired")
 
+        session_cache.set(session_id, _session_snapshot(db_session), db_session.expires_at)
         return db_session
 
     except Exception as e:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
 
+def _ticket_hash(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+async def issue_stream_ticket(db: AsyncSession, session_id: str) -> str:
+    """Create a single-use ticket that opens one event stream for a session"""
+    ticket = secrets.token_urlsafe(32)
+    db.add(StreamTicket(
+        ticket_hash=_ticket_hash(ticket),
+        session_id=session_id,
+        expires_at=datetime.utcnow() + timedelta(seconds=settings.schedule_stream_ticket_ttl)
+    ))
+    await db.commit()
+    return ticket
+
+
+async def get_session_for_stream(
+    ticket: str = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+) -> DBSession:
+    """
+    Dependency for event streams, authenticated by a ?ticket= from
+    issue_stream_ticket (EventSource cannot set headers, and the session
+    token itself must not end up in URLs and access logs)
+    """
+    row = await db.scalar(select(StreamTicket).where(
+        StreamTicket.ticket_hash == _ticket_hash(ticket),
+        StreamTicket.expires_at > datetime.utcnow()
+    ))
+    if row is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+
+    # Redeem: only the request whose delete hits the row may use the ticket
+    result = await db.execute(delete(StreamTicket).where(StreamTicket.id == row.id))
+    await db.commit()
+    if result.rowcount != 1:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+
+    return await get_session_from_header(f"Bearer {row.session_id}", db)
+
+
 @router.post("/login", response_model=LoginResponse)
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user with Google OAuth via Playwright
@@ -71,7 +146,7 @@ async def login(
             await newton_client.close()
 
         # Create or update user
-        user = db.query(User).filter(User.email == request.email).first()
+        user = await db.scalar(select(User).where(User.email == request.email))
         if not user:
             user = User(
                 email=request.email,
@@ -96,9 +171,20 @@ async def login(
             expires_at=expires_at
         )
         db.add(db_session)
-        db.commit()
+        await db.flush()
+
+        # Each login adds a session; log out the oldest beyond the limit
+        revoked = []
+        if settings.max_active_sessions_per_user > 0:
+            revoked = await deactivate_excess_sessions(db, request.email, settings.max_active_sessions_per_user)
+        await db.commit()
+
+        for token in revoked:
+            await response_cache.invalidate_shared_session(token)
+            await state_backend.publish(SESSION_REVOKED, token)
 
         logger.info(f"Login successful for {request.email}")
+        await activity_writer.log(request.email, "login")
 
         return LoginResponse(
             session_id=session_id,
@@ -115,13 +201,23 @@ async def login(
 @router.post("/logout")
 async def logout(
     db_session: DBSession = Depends(get_session_from_header),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Logout user by invalidating session
     """
-    db_session.is_active = False
-    db.commit()
+    # The session may be a cached copy, so update the row directly
+    await db.execute(
+        update(DBSession)
+        .where(DBSession.session_id == db_session.session_id)
+        .values(is_active=False)
+    )
+    await db.commit()
+
+    # Drop the session's shared cache entries, then every worker's in-process
+    # session, response and slot caches (including this one's)
+    await response_cache.invalidate_shared_session(db_session.session_id)
+    await state_backend.publish(SESSION_REVOKED, db_session.session_id)
 
     return {"message": "Logout successful"}
 
@@ -129,12 +225,12 @@ async def logout(
 @router.get("/status", response_model=AuthStatus)
 async def get_status(
     db_session: DBSession = Depends(get_session_from_header),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get authentication status
     """
-    user = db.query(User).filter(User.email == db_session.user_email).first()
+    user = await db.scalar(select(User).where(User.email == db_session.user_email))
 
     return AuthStatus(
         authenticated=True,
@@ -145,13 +241,13 @@ async def get_status(
 @router.get("/user/me")
 async def get_current_user(
     db_session: DBSession = Depends(get_session_from_header),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user information
     """
-    # Get fresh user data from Newton API
-    newton_client = NewtonClient(db_session.cookies)
+    # Get user data from Newton API (briefly cached per session)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
     try:
         user_data = await newton_client.get_user_info()
         return user_data
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, Session as DBSession
+from api.auth import get_session_from_header
+from api.schedule import load_schedule, today_range
+from api.performance import build_overview
+from api.assignments import collect_assignments
+from services import NewtonClient
+from services.activity_rollup import get_streak_days
+from services.performance_snapshots import performance_snapshots
+from schemas import DashboardResponse
+from utils.serialization import build, respond
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    assignments_limit: int = Query(10, ge=1, le=100),
+    include_schedule: bool = Query(False),
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the performance overview and pending assignments (and, with
+    include_schedule, today's schedule) at once
+
+    The course list is fetched once and shared by all sections, which are
+    then loaded concurrently. A section that fails is returned as null and
+    reported in `errors`; the other sections are still returned. The
+    schedule is opt-in: live pages follow /api/schedule/stream instead.
+    """
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
+
+    try:
+        courses = await newton_client.get_courses()
+
+        sections = {
+            "performance": performance_snapshots.get(
+                db_session.user_email,
+                db_session.cookies,
+                db_session.session_id,
+                courses=courses
+            ),
+            "assignments": collect_assignments(newton_client, courses, "pending", None, assignments_limit),
+        }
+        if include_schedule:
+            start_ts, end_ts = today_range()
+            sections["schedule"] = load_schedule(
+                db,
+                newton_client,
+                db_session.user_email,
+                start_ts,
+                end_ts,
+                "%H:%M",
+                courses=courses
+            )
+        outcomes = await asyncio.gather(*sections.values(), return_exceptions=True)
+
+        # Sections that failed or were not requested are null on every path
+        results = dict.fromkeys(("schedule", "performance", "assignments"))
+        errors = []
+        for section, outcome in zip(sections, outcomes):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                logger.error(f"Error loading dashboard {section}: {str(outcome)}")
+                errors.append({"section": section, "error": str(outcome)})
+                continue
+            results[section] = outcome
+
+        # The sections are done with the session, so the streak query can use it
+        if results["performance"] is not None:
+            streak_days = await get_streak_days(db, db_session.user_email)
+            results["performance"] = build_overview(results["performance"], streak_days)
+
+        return respond(build(DashboardResponse, **results, errors=errors))
+
+    finally:
+        await newton_client.close()
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends
-from database import Session as DBSession
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, Session as DBSession
 from api.auth import get_session_from_header
 from services import NewtonClient
-from schemas import PerformanceOverview, CoursePerformance
-from typing import List
+from services.activity_rollup import get_streak_days
+from services.performance_snapshots import performance_snapshots, PerformanceSnapshot
+from schemas import PerformanceOverview, CoursePerformance, CoursePerformanceList
+from utils.serialization import build, respond
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,56 +15,44 @@ router = APIRouter()
 
 @router.get("/overview", response_model=PerformanceOverview)
 async def get_performance_overview(
-    db_session: DBSession = Depends(get_session_from_header)
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get overall performance overview
     """
-    newton_client = NewtonClient(db_session.cookies)
+    # Last computed per-course performance; refreshed in the background when old
+    snapshot = await performance_snapshots.get(
+        db_session.user_email,
+        db_session.cookies,
+        db_session.session_id
+    )
 
-    try:
-        # Get courses
-        courses = await newton_client.get_courses()
-
-        total_attendance = 0
-        total_assignments = 0
-        total_xp = 0
-        course_count = 0
-
-        for course in courses:
-            course_hash = course.get("hash")
-            if not course_hash:
-                continue
-
-            try:
-                # Get course performance
-                performance = await newton_client.get_performance_overview(course_hash)
-
-                total_attendance += performance.get("attendance", 0)
-                total_assignments += performance.get("assignments_completed", 0)
-                total_xp += performance.get("total_xp", 0)
-                course_count += 1
-
-            except Exception as e:
-                logger.error(f"Error fetching performance for course {course_hash}: {str(e)}")
-                continue
-
-        # Calculate averages
-        avg_attendance = total_attendance / course_count if course_count > 0 else 0
-        avg_assignments = total_assignments / course_count if course_count > 0 else 0
-
-        # TODO: Calculate streak days from activity logs
-        streak_days = 0
-
-        return PerformanceOverview(
-            lecture_attendance=round(avg_attendance, 1),
-            assignments_completed=round(avg_assignments, 1),
-            total_xp=total_xp,
-            streak_days=streak_days
-        )
+    # Streak from the daily activity rollup
+    streak_days = await get_streak_days(db, db_session.user_email)
 
-    finally:
-        await newton_client.close()
+    return build_overview(snapshot, streak_days)
+
+
+def build_overview(snapshot: PerformanceSnapshot, streak_days: int) -> PerformanceOverview:
+    """Aggregate a per-course performance snapshot into the overview"""
+    course_count = len(snapshot.courses)
+    total_attendance = sum(course["attendance"] for course in snapshot.courses)
+    total_assignments = sum(course["assignments"] for course in snapshot.courses)
+    total_xp = sum(course["total_xp"] for course in snapshot.courses)
+
+    # Calculate averages
+    avg_attendance = total_attendance / course_count if course_count > 0 else 0
+    avg_assignments = total_assignments / course_count if course_count > 0 else 0
+
+    return PerformanceOverview(
+        lecture_attendance=round(avg_attendance, 1),
+        assignments_completed=round(avg_assignments, 1),
+        total_xp=total_xp,
+        streak_days=streak_days,
+        errors=snapshot.errors,
+        snapshot_age_seconds=round(snapshot.age, 1)
+    )
 
 
 @router.get("/course/{course_hash}", response_model=CoursePerformance)
@@ -72,7 +63,7 @@ async def get_course_performance(
     """
     Get performance for a specific course
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
         # Get course details
@@ -91,40 +82,34 @@ async def get_course_performance(
         await newton_client.close()
 
 
-@router.get("/courses", response_model=List[CoursePerformance])
+@router.get("/courses", response_model=CoursePerformanceList)
 async def get_all_courses_performance(
     db_session: DBSession = Depends(get_session_from_header)
 ):
     """
     Get performance for all enrolled courses
     """
-    newton_client = NewtonClient(db_session.cookies)
-
-    try:
-        courses = await newton_client.get_courses()
-        performances = []
-
-        for course in courses:
-            course_hash = course.get("hash")
-            if not course_hash:
-                continue
-
-            try:
-                performance = await newton_client.get_performance_overview(course_hash)
-
-                performances.append(CoursePerformance(
-                    course_hash=course_hash,
-                    course_name=course.get("name", "Unknown"),
-                    attendance=performance.get("attendance", 0),
-                    assignments=performance.get("assignments_completed", 0),
-                    quizzes=performance.get("quizzes_completed")
-                ))
-
-            except Exception as e:
-                logger.error(f"Error fetching performance for course {course_hash}: {str(e)}")
-                continue
-
-        return performances
-
-    finally:
-        await newton_client.close()
+    snapshot = await performance_snapshots.get(
+        db_session.user_email,
+        db_session.cookies,
+        db_session.session_id
+    )
+
+    performances = [
+        build(
+            CoursePerformance,
+            course_hash=course["course_hash"],
+            course_name=course["course_name"],
+            attendance=course["attendance"],
+            assignments=course["assignments"],
+            quizzes=course["quizzes"]
+        )
+        for course in snapshot.courses
+    ]
+
+    return respond(build(
+        CoursePerformanceList,
+        courses=performances,
+        errors=snapshot.errors,
+        snapshot_age_seconds=round(snapshot.age, 1)
+    ))
@@ -1,75 +1,181 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db, Session as DBSession
-from api.auth import get_session_from_header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, Session as DBSession, LectureSlot
+from api.auth import get_session_from_header, get_session_for_stream, issue_stream_ticket
 from services import NewtonClient
-from schemas import ClassSession, JoinClassRequest, JoinClassResponse
-from typing import List, Optional
+from services.schedule_store import ScheduleStore, today_range
+from services.slot_index import slot_index, SlotLocation
+from services.activity_writer import activity_writer
+from services.schedule_feed import schedule_feeds
+from config import settings
+from schemas import ClassSession, ScheduleResponse, JoinClassRequest, JoinClassResponse, StreamTicketResponse
+from utils.fanout import fan_out_courses
+from utils.serialization import build, dumps, respond
+from typing import Any, AsyncIterator, List, Optional
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("/today", response_model=List[ClassSession])
+def _to_class_session(slot: LectureSlot, time_format: str) -> ClassSession:
+    """Build a ClassSession from a stored lecture slot"""
+    return build(
+        ClassSession,
+        hash=slot.slot_hash,
+        time=datetime.fromtimestamp(slot.start_timestamp).strftime(time_format),
+        subject=slot.subject,
+        room=slot.room,
+        join_url=slot.join_url,
+        instructor=slot.instructor,
+        start_timestamp=slot.start_timestamp,
+        end_timestamp=slot.end_timestamp
+    )
+
+
+async def load_schedule(
+    db: AsyncSession,
+    newton_client: NewtonClient,
+    user_email: str,
+    start_ts: int,
+    end_ts: int,
+    time_format: str,
+    courses: Optional[List[dict]] = None
+) -> ScheduleResponse:
+    """Sync any missing or stale days, then read classes from the local slot store"""
+    store = ScheduleStore(db)
+    errors = await store.sync(newton_client, user_email, start_ts, end_ts, courses=courses)
+
+    classes = [
+        _to_class_session(slot, time_format)
+        for slot in await store.slots(user_email, start_ts, end_ts)
+    ]
+    return build(ScheduleResponse, classes=classes, errors=errors)
+
+
+@router.get("/today", response_model=ScheduleResponse)
 async def get_today_schedule(
-    db_session: DBSession = Depends(get_session_from_header)
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get today's class schedule
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
-        # Get courses
-        courses = await newton_client.get_courses()
+        start_ts, end_ts = today_range()
+        return respond(
+            await load_schedule(db, newton_client, db_session.user_email, start_ts, end_ts, "%H:%M")
+        )
 
-        all_classes = []
-        for course in courses:
-            course_hash = course.get("hash")
-            if not course_hash:
-                continue
+    finally:
+        await newton_client.close()
+
+
+def _sse(event: str, data: Any) -> bytes:
+    """One Server-Sent Event; dumps() output never contains newlines"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def _render(event: str, data: Any) -> bytes:
+    """Render a schedule feed event (see services.schedule_feed)"""
+    if event == "snapshot":
+        slots, errors = data
+        data = build(
+            ScheduleResponse,
+            classes=[_to_class_session(slot, "%H:%M") for slot in slots],
+            errors=errors
+        )
+    elif event in ("added", "updated", "starting"):
+        data = _to_class_session(data, "%H:%M")
+    elif event == "removed":
+        data = {"hash": data}
+    elif event == "errors":
+        data = {"errors": data}
+    else:
+        data = {}
+    return _sse(event, data)
+
+
+async def _schedule_events(db_session: DBSession) -> AsyncIterator[bytes]:
+    # Subscribe inside the generator so a client gone before the first byte
+    # never leaves a subscriber behind
+    subscriber = schedule_feeds.subscribe(
+        db_session.user_email,
+        db_session.session_id,
+        db_session.cookies,
+        db_session.expires_at
+    )
 
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
             try:
-                # Get today's schedule for this course
-                schedule = await newton_client.get_today_schedule(course_hash)
-
-                for slot in schedule:
-                    class_session = ClassSession(
-                        hash=slot.get("hash", ""),
-                        time=datetime.fromtimestamp(slot.get("start_timestamp", 0)).strftime("%H:%M"),
-                        subject=slot.get("lecture", {}).get("name", "Unknown"),
-                        room=slot.get("room", {}).get("name"),
-                        join_url=slot.get("join_url"),
-                        instructor=slot.get("instructor", {}).get("name"),
-                        start_timestamp=slot.get("start_timestamp", 0),
-                        end_timestamp=slot.get("end_timestamp", 0)
-                    )
-                    all_classes.append(class_session)
-
-            except Exception as e:
-                logger.error(f"Error fetching schedule for course {course_hash}: {str(e)}")
+                event, data = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=settings.schedule_stream_keepalive
+                )
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle stream
+                yield b": keepalive\n\n"
                 continue
 
-        # Sort by start time
-        all_classes.sort(key=lambda x: x.start_timestamp)
-
-        return all_classes
+            yield _render(event, data)
+            if event == "revoked":
+                return
 
     finally:
-        await newton_client.close()
+        schedule_feeds.unsubscribe(db_session.user_email, subscriber)
 
 
-@router.get("/week", response_model=List[ClassSession])
+@router.post("/stream-ticket", response_model=StreamTicketResponse)
+async def create_stream_ticket(
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a single-use ticket for opening /stream
+
+    Valid for SCHEDULE_STREAM_TICKET_TTL seconds; request a new one for
+    every (re)connect.
+    """
+    ticket = await issue_stream_ticket(db, db_session.session_id)
+    return StreamTicketResponse(ticket=ticket, expires_in=settings.schedule_stream_ticket_ttl)
+
+
+@router.get("/stream")
+async def stream_today_schedule(db_session: DBSession = Depends(get_session_for_stream)):
+    """
+    Stream today's schedule as Server-Sent Events
+
+    The first event is the full schedule, then only changes: added, updated
+    (e.g. a join URL appeared), removed and starting classes. Upstream is
+    refreshed on a server-side schedule shared by all of the user's open
+    streams. Authenticated with ?ticket= from POST /stream-ticket, since
+    EventSource cannot set headers.
+    """
+    return StreamingResponse(
+        _schedule_events(db_session),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/week", response_model=ScheduleResponse)
 async def get_week_schedule(
     start_date: Optional[str] = Query(None),
-    db_session: DBSession = Depends(get_session_from_header)
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get week's class schedule
     """
-    newton_client = NewtonClient(db_session.cookies)
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
         # Parse start date
@@ -78,40 +184,18 @@ async def get_week_schedule(
         else:
             start_dt = datetime.now()
 
-        # Get courses
-        courses = await newton_client.get_courses()
+        start = datetime(start_dt.year, start_dt.month, start_dt.day, 0, 0, 0)
+        start_ts = int(start.timestamp())
+        end_ts = int((start + timedelta(days=7)).timestamp())
 
-        all_classes = []
-        for course in courses:
-            course_hash = course.get("hash")
-            if not course_hash:
-                continue
-
-            try:
-                # Get week's schedule for this course
-                schedule = await newton_client.get_week_schedule(course_hash, start_dt)
-
-                for slot in schedule:
-                    class_session = ClassSession(
-                        hash=slot.get("hash", ""),
-                        time=datetime.fromtimestamp(slot.get("start_timestamp", 0)).strftime("%Y-%m-%d %H:%M"),
-                        subject=slot.get("lecture", {}).get("name", "Unknown"),
-                        room=slot.get("room", {}).get("name"),
-                        join_url=slot.get("join_url"),
-                        instructor=slot.get("instructor", {}).get("name"),
-                        start_timestamp=slot.get("start_timestamp", 0),
-                        end_timestamp=slot.get("end_timestamp", 0)
-                    )
-                    all_classes.append(class_session)
-
-            except Exception as e:
-                logger.error(f"Error fetching week schedule for course {course_hash}: {str(e)}")
-                continue
-
-        # Sort by start time
-        all_classes.sort(key=lambda x: x.start_timestamp)
-
-        return all_classes
+        return respond(await load_schedule(
+            db,
+            newton_client,
+            db_session.user_email,
+            start_ts,
+            end_ts,
+            "%Y-%m-%d %H:%M"
+        ))
 
     finally:
         await newton_client.close()
@@ -120,48 +204,65 @@ async def get_week_schedule(
 @router.post("/join-class", response_model=JoinClassResponse)
 async def join_class(
     request: JoinClassRequest,
-    db_session: DBSession = Depends(get_session_from_header)
+    db_session: DBSession = Depends(get_session_from_header),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Join a class (opens the join URL)
     """
-    newton_client = NewtonClient(db_session.cookies)
+    slot_hash = request.lecture_slot_hash
+    location = slot_index.get(db_session.session_id, slot_hash)
+
+    # Fall back to the synced slot store, which is kept per user: a join URL
+    # the prefetcher stored serves all of the user's sessions on any worker
+    if not location:
+        stored = await db.scalar(select(LectureSlot).where(
+            LectureSlot.user_email == db_session.user_email,
+            LectureSlot.slot_hash == slot_hash
+        ))
+        if stored:
+            location = SlotLocation(
+                course_hash=stored.course_hash,
+                join_url=stored.join_url,
+                start_timestamp=stored.start_timestamp,
+                end_timestamp=stored.end_timestamp
+            )
+
+    if location and location.join_url:
+        await activity_writer.log(db_session.user_email, "join_class", {"lecture_slot_hash": slot_hash})
+        return JoinClassResponse(join_url=location.join_url, status="opened")
+
+    newton_client = NewtonClient(db_session.cookies, session_key=db_session.session_id)
 
     try:
-        # Get all courses to find the lecture slot
-        courses = await newton_client.get_courses()
-
-        for course in courses:
-            course_hash = course.get("hash")
-            if not course_hash:
-                continue
-
-            try:
-                # Get schedule to find the slot
-                now = datetime.now()
-                start = now - timedelta(hours=2)
-                end = now + timedelta(hours=12)
-
-                schedule = await newton_client.get_schedule(
-                    course_hash,
-                    int(start.timestamp()),
-                    int(end.timestamp())
-                )
-
-                for slot in schedule:
-                    if slot.get("hash") == request.lecture_slot_hash:
-                        join_url = slot.get("join_url")
-                        if join_url:
-                            return JoinClassResponse(
-                                join_url=join_url,
-                                status="opened"
-                            )
-
-            except Exception as e:
-                logger.error(f"Error searching for slot in course {course_hash}: {str(e)}")
-                continue
-
-        raise HTTPException(status_code=404, detail="Lecture slot not found")
+        if location:
+            # One targeted call for the slot's course; join URLs appear late
+            await newton_client.get_schedule(
+                location.course_hash,
+                location.start_timestamp,
+                location.end_timestamp + 1,
+                revalidate=True
+            )
+        else:
+            # Unknown slot: scan the current window of every course once
+            now = datetime.now()
+            start_ts = int((now - timedelta(hours=2)).timestamp())
+            end_ts = int((now + timedelta(hours=12)).timestamp())
+
+            courses = await newton_client.get_courses()
+            await fan_out_courses(
+                courses,
+                lambda course_hash: newton_client.get_schedule(course_hash, start_ts, end_ts)
+            )
+
+        location = slot_index.get(db_session.session_id, slot_hash)
+        if not location:
+            raise HTTPException(status_code=404, detail="Lecture slot not found")
+        if not location.join_url:
+            raise HTTPException(status_code=404, detail="Join URL not available yet")
+
+        await activity_writer.log(db_session.user_email, "join_class", {"lecture_slot_hash": slot_hash})
+        return JoinClassResponse(join_url=location.join_url, status="opened")
 
     finally:
         await newton_client.close()
@@ -0,0 +1,74 @@
+"""
+Per-user memory of cached schedule and assignment data: raw JSON vs records
+
+Generates upstream-shaped lecture_slot/all/ and assignment/all/ payloads
+(the mock portal's synthetic ones, with nested objects and extra fields),
+then measures with tracemalloc how much memory one user's cached responses
+retain when kept as parsed JSON and when projected to services.records.
+Also compares the records' estimated size (what ResponseCache accounts) with
+the measured one.
+
+    python -m benchmarks.cache_memory [--courses 6] [--slots 40] [--assignments 250]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, List
+
+from benchmarks.mock_portal import assignment, lecture_slot
+from services.records import project_assignment_page, project_slots, record_size
+
+
+def _measure(build: Callable[[], List[Any]]) -> int:
+    """Bytes still allocated while the built values are alive"""
+    gc.collect()
+    tracemalloc.start()
+    values = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del values
+    return current
+
+
+def main(courses: int, slots: int, assignments: int):
+    # Serialised once up front, as they arrive from the portal
+    slot_bodies = [
+        json.dumps([lecture_slot(f"course{c}", 1705300000 + i * 3600) for i in range(slots)])
+        for c in range(courses)
+    ]
+    assignment_bodies = [
+        json.dumps({
+            "count": assignments,
+            "next": None,
+            "results": [assignment(f"course{c}", i) for i in range(assignments)]
+        })
+        for c in range(courses)
+    ]
+    wire = sum(len(body) for body in slot_bodies + assignment_bodies)
+
+    raw = _measure(lambda: [json.loads(body) for body in slot_bodies + assignment_bodies])
+    records = _measure(lambda: (
+        [project_slots(json.loads(body)) for body in slot_bodies]
+        + [project_assignment_page(json.loads(body)) for body in assignment_bodies]
+    ))
+    estimated = sum(record_size(project_slots(json.loads(body))) for body in slot_bodies) + sum(
+        record_size(project_assignment_page(json.loads(body))) for body in assignment_bodies
+    )
+
+    print(
+        f"one user: {courses} courses x ({slots} slots + {assignments} assignments), "
+        f"{wire / 1024:.1f} KiB on the wire"
+    )
+    print(f"raw JSON  {raw / 1024:9.1f} KiB retained")
+    print(f"records   {records / 1024:9.1f} KiB retained ({raw / records:.1f}x smaller)")
+    print(f"estimated {estimated / 1024:9.1f} KiB (record_size, used for cache accounting)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--slots", type=int, default=40)
+    parser.add_argument("--assignments", type=int, default=250)
+    args = parser.parse_args()
+    main(args.courses, args.slots, args.assignments)
@@ -0,0 +1,103 @@
+"""
+Event-loop stall while doing request-path DB writes: sync vs async engine
+
+Runs concurrent login-style transactions (insert a session row + commit)
+against a throwaway SQLite database, once through the blocking SessionLocal
+and once through AsyncSessionLocal, while a heartbeat task measures how late
+the event loop wakes it up.
+
+    python -m benchmarks.event_loop_stall [--tasks 20] [--writes 50]
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="newton-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+os.environ.setdefault("ASYNC_DATABASE_URL", "")
+
+from database import SessionLocal, AsyncSessionLocal, Session as DBSession  # noqa: E402
+
+HEARTBEAT_INTERVAL = 0.001
+
+
+def _session_row() -> DBSession:
+    return DBSession(
+        session_id=secrets.token_urlsafe(32),
+        user_email="bench@example.com",
+        cookies={"sessionid": secrets.token_hex(16)},
+        is_active=True,
+        expires_at=datetime.utcnow() + timedelta(days=7)
+    )
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - started - HEARTBEAT_INTERVAL))
+
+
+async def _sync_writer(writes: int):
+    for _ in range(writes):
+        db = SessionLocal()
+        try:
+            db.add(_session_row())
+            db.commit()
+        finally:
+            db.close()
+        await asyncio.sleep(0)
+
+
+async def _async_writer(writes: int):
+    for _ in range(writes):
+        async with AsyncSessionLocal() as db:
+            db.add(_session_row())
+            await db.commit()
+
+
+async def _measure(label: str, writer, tasks: int, writes: int):
+    stop = asyncio.Event()
+    lags = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(writes) for _ in range(tasks)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+
+    lags.sort()
+    p50 = lags[len(lags) // 2] if lags else 0.0
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{label:<6} {tasks * writes} writes in {elapsed * 1000:8.1f} ms | "
+        f"loop stall p50 {p50 * 1000:6.2f} ms, p99 {p99 * 1000:6.2f} ms, "
+        f"max {(lags[-1] if lags else 0) * 1000:6.2f} ms"
+    )
+
+
+async def main(tasks: int, writes: int):
+    from database import Base, engine, async_engine
+
+    Base.metadata.create_all(bind=engine)
+    await _measure("sync", _sync_writer, tasks, writes)
+    await _measure("async", _async_writer, tasks, writes)
+
+    await async_engine.dispose()
+    engine.dispose()
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.writes))
@@ -0,0 +1,89 @@
+"""
+Cold-start import time of the API in fresh interpreters
+
+Imports a module (default: main, what uvicorn loads) in new Python processes
+and reports the median wall time, the slowest modules by cumulative import
+time (from python -X importtime) and whether the Anthropic SDK or Playwright
+were loaded. --fail-above makes the run exit non-zero when the median import
+is slower than the given number of seconds, for use as a CI guard.
+
+    python -m benchmarks.import_time [--module main] [--repeat 5] [--top 15] [--fail-above 2.0]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Modules that should only load on first use
+HEAVY_MODULES = ("anthropic", "playwright.async_api")
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+print(",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _run(module: str, env: Dict[str, str]) -> Tuple[float, List[str], Dict[str, int]]:
+    """(seconds, heavy modules loaded, {module: cumulative microseconds})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    seconds, heavy = result.stdout.splitlines()[-2:]
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total)
+
+    return float(seconds), [name for name in heavy.split(",") if name], cumulative
+
+
+def main(module: str, repeat: int, top: int, fail_above: float) -> int:
+    tmpdir = tempfile.mkdtemp(prefix="newton-import-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmpdir}/import.db")
+
+    try:
+        runs = [_run(module, env) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    times = sorted(seconds for seconds, _, _ in runs)
+    median = statistics.median(times)
+    _, heavy, cumulative = runs[-1]
+
+    print(f"import {module}: median {median * 1000:.0f} ms, min {times[0] * 1000:.0f} ms, max {times[-1] * 1000:.0f} ms ({repeat} runs)")
+    print(f"heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    print("slowest imports (cumulative, last run):")
+    for name, total in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {total / 1000:8.1f} ms  {name}")
+
+    if fail_above and median > fail_above:
+        print(f"FAIL: median import time above {fail_above:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--fail-above", type=float, default=0.0, help="seconds; 0 = report only")
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.repeat, args.top, args.fail_above))
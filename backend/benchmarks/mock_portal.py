@@ -0,0 +1,210 @@
+"""
+In-process mock of the my.newtonschool.co endpoints NewtonClient uses
+
+MockPortal is an httpx transport, so it can be handed to
+http_pool.start(transport=...) and every NewtonClient talks to it instead
+of the network. Payloads are synthetic but shaped like the portal's (nested
+lecture/room/instructor objects, paginated assignment lists) and are
+deterministic for a given configuration.
+"""
+import asyncio
+import random
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+# Lectures per day start at these local hours
+LECTURE_HOURS = (10, 14, 17, 19)
+
+
+def lecture_slot(course_hash: str, start_timestamp: int, payload_scale: int = 1) -> Dict[str, Any]:
+    """One upstream lecture slot"""
+    slot_id = f"{course_hash}-{start_timestamp}"
+    return {
+        "hash": f"slot-{slot_id}",
+        "start_timestamp": start_timestamp,
+        "end_timestamp": start_timestamp + 5400,
+        "join_url": f"https://meet.example.com/{slot_id}",
+        "recording_url": None,
+        "is_attended": False,
+        "is_cancelled": False,
+        "created_at": "2024-01-01T09:00:00Z",
+        "updated_at": "2024-01-10T09:00:00Z",
+        "lecture": {
+            "hash": f"lecture-{slot_id}",
+            "name": f"{course_hash} lecture: Data Structures and Algorithms",
+            "description": "Arrays, linked lists, stacks and queues with worked examples. " * 2 * payload_scale,
+            "slug": f"lecture-{slot_id}",
+            "topics": [{"hash": f"topic-{t}", "name": f"Topic {t}"} for t in range(3)],
+        },
+        "room": {"hash": f"room-{start_timestamp % 4}", "name": f"Room {start_timestamp % 4}", "capacity": 120},
+        "instructor": {
+            "hash": f"instructor-{course_hash}",
+            "name": f"Instructor {course_hash}",
+            "email": f"instructor.{course_hash}@example.com",
+            "avatar_url": f"https://cdn.example.com/avatars/{course_hash}.png",
+        },
+    }
+
+
+def assignment(course_hash: str, i: int, payload_scale: int = 1) -> Dict[str, Any]:
+    """One upstream assignment list item"""
+    return {
+        "hash": f"assignment-{course_hash}-{i:05d}",
+        "title": f"Assignment {i}: Linked lists and pointers",
+        "description": "Implement the operations below and submit before the deadline. " * 3 * payload_scale,
+        "type": "mixed",
+        "due_date": "2024-01-20T23:59:00Z",
+        "start_date": "2024-01-13T09:00:00Z",
+        "questions_count": 10,
+        "questions_solved": i % 10,
+        "xp": 100,
+        "difficulty": ("easy", "medium", "hard")[i % 3],
+        "is_completed": i % 2 == 0,
+        "is_published": True,
+        "assessment": {"hash": f"assessment-{course_hash}-{i:05d}", "duration": 3600},
+        "tags": ["dsa", "linked-list", "pointers"],
+    }
+
+
+class MockPortal(httpx.AsyncBaseTransport):
+    """
+    Configurable fake portal
+
+    Args:
+        courses: Enrolled courses returned by course/all/applied/
+        lectures_per_day: Lecture slots per course per day (max 4)
+        assignments: Assignments per course
+        payload_scale: Multiplier for free-text field sizes
+        latency: Mean response latency in seconds
+        jitter: Standard deviation of the latency
+        error_rate: Fraction of requests answered with 503
+        seed: Seed for latency and error sampling
+    """
+
+    def __init__(
+        self,
+        courses: int = 6,
+        lectures_per_day: int = 2,
+        assignments: int = 250,
+        payload_scale: int = 1,
+        latency: float = 0.05,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.course_hashes = [f"course{i}" for i in range(courses)]
+        self.lectures_per_day = min(lectures_per_day, len(LECTURE_HOURS))
+        self.assignments = assignments
+        self.payload_scale = payload_scale
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.errors = 0
+
+        self.routes: List[Tuple[str, "re.Pattern", Callable[..., Any]]] = [
+            ("user_info", re.compile(r"^/api/v1/user/me/$"), self._user_info),
+            ("courses", re.compile(r"^/api/v2/course/all/applied/$"), self._courses),
+            ("schedule", re.compile(r"^/api/v2/course/h/([^/]+)/lecture_slot/all/$"), self._schedule),
+            ("assignments", re.compile(r"^/api/v2/course/h/([^/]+)/assignment/all/$"), self._assignments),
+            ("assignment_details", re.compile(r"^/api/v2/course/h/([^/]+)/assignment/h/([^/]+)/$"), self._assignment_details),
+            ("assessment", re.compile(r"^/api/v1/course/h/([^/]+)/assessment/h/([^/]+)/$"), self._assessment),
+            ("performance", re.compile(r"^/api/v2/course/h/([^/]+)/user/performance/$"), self._performance),
+            ("course_details", re.compile(r"^/api/v2/course/h/([^/]+)/$"), self._course_details),
+        ]
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.errors = 0
+
+    def lecture_starts(self, day: datetime) -> List[int]:
+        """Start timestamps of one course's lectures on a local day"""
+        start = datetime(day.year, day.month, day.day)
+        return [
+            int((start + timedelta(hours=hour)).timestamp())
+            for hour in LECTURE_HOURS[:self.lectures_per_day]
+        ]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for name, pattern, handler in self.routes:
+            match = pattern.match(request.url.path)
+            if match:
+                break
+        else:
+            return httpx.Response(404, json={"detail": "Not found"})
+
+        self.calls[name] += 1
+        if self.latency > 0:
+            await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return httpx.Response(503, json={"detail": "Service unavailable"})
+
+        return httpx.Response(200, json=handler(request, *match.groups()))
+
+    def _user_info(self, request: httpx.Request) -> Dict[str, Any]:
+        return {"name": "Bench User", "email": "bench@example.com"}
+
+    def _courses(self, request: httpx.Request) -> List[Dict[str, Any]]:
+        return [{"hash": c_hash, "name": f"Course {c_hash}"} for c_hash in self.course_hashes]
+
+    def _course_details(self, request: httpx.Request, course_hash: str) -> Dict[str, Any]:
+        return {"hash": course_hash, "name": f"Course {course_hash}"}
+
+    def _schedule(self, request: httpx.Request, course_hash: str) -> List[Dict[str, Any]]:
+        start_ts = int(request.url.params.get("start_timestamp", 0))
+        end_ts = int(request.url.params.get("end_timestamp", 0))
+
+        slots = []
+        day = datetime.fromtimestamp(start_ts)
+        while int(datetime(day.year, day.month, day.day).timestamp()) < end_ts:
+            for start in self.lecture_starts(day):
+                if start_ts <= start < end_ts:
+                    slots.append(lecture_slot(course_hash, start, self.payload_scale))
+            day += timedelta(days=1)
+        return slots
+
+    def _assignments(self, request: httpx.Request, course_hash: str) -> Dict[str, Any]:
+        limit = int(request.url.params.get("limit", 100))
+        offset = int(request.url.params.get("offset", 0))
+        end = min(self.assignments, offset + limit)
+        return {
+            "count": self.assignments,
+            "next": "more" if end < self.assignments else None,
+            "results": [assignment(course_hash, i, self.payload_scale) for i in range(offset, end)],
+        }
+
+    def _assignment_details(self, request: httpx.Request, course_hash: str, assignment_hash: str) -> Dict[str, Any]:
+        i = int(assignment_hash.rsplit("-", 1)[-1]) if assignment_hash[-1:].isdigit() else 0
+        return dict(assignment(course_hash, i, self.payload_scale), hash=assignment_hash, score=None)
+
+    def _assessment(self, request: httpx.Request, course_hash: str, assessment_hash: str) -> Dict[str, Any]:
+        return {
+            "hash": assessment_hash,
+            "questions": [
+                {
+                    "hash": f"{assessment_hash}-q{q}",
+                    "text": f"Question {q}: which operation is O(1) on a linked list?",
+                    "type": "mcq",
+                    "options": {"a": "Head insert", "b": "Index", "c": "Search", "d": "Sort"},
+                    "is_solved": False,
+                }
+                for q in range(10)
+            ],
+        }
+
+    def _performance(self, request: httpx.Request, course_hash: str) -> Dict[str, Any]:
+        return {"attendance": 82.5, "assignments_completed": 14, "quizzes_completed": 6, "total_xp": 1250}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": dict(self.calls), "total": self.total_calls, "errors": self.errors}
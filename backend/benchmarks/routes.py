@@ -0,0 +1,292 @@
+"""
+Route latency and upstream call counts against the mock portal
+
+Runs the app in-process (ASGI, no server) with every NewtonClient sending
+to benchmarks.mock_portal.MockPortal through the shared HTTP pool, against
+a throwaway SQLite database. For each route it reports:
+
+    cold  the first request per user after that user's caches (response
+          cache, slot index, performance snapshot, synced slots) were reset
+    warm  the remaining requests
+
+with p50/p95/p99/max latency, upstream calls per request and non-2xx
+responses. Fully offline; pass --json to keep results for comparison.
+--fail-cold-above makes the run exit non-zero when a route's cold p95 is
+slower than the given number of milliseconds, for use as a CI guard (e.g.
+against rate limits that throttle a single user's first page load).
+
+    python -m benchmarks.routes [--users 10] [--requests 100] [--concurrency 10]
+        [--courses 6] [--assignments 250] [--latency 0.05] [--error-rate 0]
+        [--only schedule] [--json results.json] [--fail-cold-above 1000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+_tmpdir = tempfile.mkdtemp(prefix="newton-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+os.environ.setdefault("ASYNC_DATABASE_URL", "")
+
+import httpx  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from benchmarks.mock_portal import MockPortal  # noqa: E402
+from database import (  # noqa: E402
+    AsyncSessionLocal,
+    LectureSlot,
+    ScheduleSyncWindow,
+    SessionLocal,
+    Session as DBSession,
+    async_engine,
+    engine,
+    init_db,
+)
+from main import app  # noqa: E402
+from services.activity_writer import activity_writer  # noqa: E402
+from services.http_pool import http_pool  # noqa: E402
+from services.newton_client import response_cache  # noqa: E402
+from services.performance_snapshots import performance_snapshots  # noqa: E402
+from services.slot_index import slot_index  # noqa: E402
+
+# A route case: (name, method, path, json body, priming GET path or None).
+# The priming request runs for every user after the cache reset and is not
+# counted; it stands for the page the user opened the route from.
+Case = Tuple[str, str, str, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _cases(portal: MockPortal) -> List[Case]:
+    course = portal.course_hashes[0]
+    lecture = portal.lecture_starts(datetime.now())[0]
+    assignment = f"assignment-{course}-00001"
+
+    return [
+        ("GET /api/schedule/today", "GET", "/api/schedule/today", None, None),
+        ("GET /api/schedule/week", "GET", "/api/schedule/week", None, None),
+        (
+            "POST /api/schedule/join-class",
+            "POST",
+            "/api/schedule/join-class",
+            {"lecture_slot_hash": f"slot-{course}-{lecture}"},
+            "/api/schedule/week"
+        ),
+        ("GET /api/performance/overview", "GET", "/api/performance/overview", None, None),
+        ("GET /api/performance/courses", "GET", "/api/performance/courses", None, None),
+        ("GET /api/performance/course/{hash}", "GET", f"/api/performance/course/{course}", None, None),
+        ("GET /api/assignments", "GET", "/api/assignments?limit=100", None, None),
+        ("GET /api/assignments?status=pending", "GET", "/api/assignments?status=pending&limit=500", None, None),
+        ("GET /api/assignments?stream=true", "GET", "/api/assignments?stream=true&limit=100", None, None),
+        (
+            "GET /api/assignments/{hash}",
+            "GET",
+            f"/api/assignments/{assignment}?course_hash={course}",
+            None,
+            None
+        ),
+        (
+            "GET /api/assignments/{hash}/status",
+            "GET",
+            f"/api/assignments/{assignment}/status?course_hash={course}",
+            None,
+            None
+        ),
+        ("GET /api/dashboard", "GET", "/api/dashboard", None, None),
+    ]
+
+
+def _create_users(count: int) -> List[Tuple[str, str]]:
+    """Insert active sessions; returns [(token, email), ...]"""
+    users = []
+    db = SessionLocal()
+    try:
+        for i in range(count):
+            token = secrets.token_urlsafe(32)
+            email = f"bench{i}@example.com"
+            db.add(DBSession(
+                session_id=token,
+                user_email=email,
+                cookies={"sessionid": secrets.token_hex(16)},
+                is_active=True,
+                expires_at=datetime.utcnow() + timedelta(days=7)
+            ))
+            users.append((token, email))
+        db.commit()
+    finally:
+        db.close()
+    return users
+
+
+async def _reset_user_caches(users: List[Tuple[str, str]]):
+    """Drop everything the API derived from upstream for these users"""
+    for token, email in users:
+        response_cache.invalidate_session(token)
+        slot_index.invalidate_session(token)
+        performance_snapshots.invalidate(email)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(LectureSlot))
+        await db.execute(delete(ScheduleSyncWindow))
+        await db.commit()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def _summarise(latencies: List[float], upstream: int, failures: int) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round((latencies[-1] if latencies else 0) * 1000, 2),
+        "upstream_per_request": round(upstream / count, 2) if count else 0.0,
+        "non_2xx": failures,
+    }
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    token: str,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]] = None
+) -> Tuple[float, bool]:
+    started = time.perf_counter()
+    response = await client.request(method, path, json=body, headers={"Authorization": f"Bearer {token}"})
+    await response.aread()
+    return time.perf_counter() - started, response.is_success
+
+
+async def _run_case(
+    client: httpx.AsyncClient,
+    portal: MockPortal,
+    users: List[Tuple[str, str]],
+    case: Case,
+    requests: int,
+    concurrency: int
+) -> Dict[str, Dict[str, Any]]:
+    _, method, path, body, prime = case
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(token: str):
+        async with semaphore:
+            return await _send(client, token, method, path, body)
+
+    await _reset_user_caches(users)
+    if prime:
+        await asyncio.gather(*(_send(client, token, "GET", prime) for token, _ in users))
+
+    # Cold: one request per user, all users at once (bounded by concurrency)
+    portal.reset_counters()
+    cold = await asyncio.gather(*(limited(token) for token, _ in users))
+    cold_upstream = portal.total_calls
+
+    # Warm: the remaining requests, round-robin over users
+    portal.reset_counters()
+    warm_count = max(0, requests - len(users))
+    warm = await asyncio.gather(*(limited(users[i % len(users)][0]) for i in range(warm_count)))
+    warm_upstream = portal.total_calls
+
+    return {
+        "cold": _summarise([t for t, _ in cold], cold_upstream, sum(1 for _, ok in cold if not ok)),
+        "warm": _summarise([t for t, _ in warm], warm_upstream, sum(1 for _, ok in warm if not ok)),
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    portal = MockPortal(
+        courses=args.courses,
+        lectures_per_day=args.lectures_per_day,
+        assignments=args.assignments,
+        payload_scale=args.payload_scale,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    init_db()
+    users = _create_users(args.users)
+    # Upstream errors are expected with --error-rate; keep the table readable
+    logging.disable(logging.ERROR)
+
+    await http_pool.start(transport=portal)
+    await activity_writer.start()
+
+    results = {}
+    print(
+        f"{args.users} users, {args.requests} requests/route, concurrency {args.concurrency}, "
+        f"{args.courses} courses, {args.assignments} assignments/course, "
+        f"latency {args.latency * 1000:.0f}ms, error rate {args.error_rate:.0%}"
+    )
+    print(f"{'route':<38} {'phase':<5} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'up/req':>7} {'err':>4}")
+
+    try:
+        # Unhandled exceptions become 500s, as they would behind uvicorn
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for case in _cases(portal):
+                name = case[0]
+                if args.only and args.only not in name:
+                    continue
+
+                results[name] = await _run_case(client, portal, users, case, args.requests, args.concurrency)
+                for phase, row in results[name].items():
+                    print(
+                        f"{name:<38} {phase:<5} {row['requests']:>5} {row['p50_ms']:>8.1f} "
+                        f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} "
+                        f"{row['upstream_per_request']:>7.2f} {row['non_2xx']:>4}"
+                    )
+    finally:
+        await performance_snapshots.close()
+        await activity_writer.stop()
+        await http_pool.close()
+        await async_engine.dispose()
+        engine.dispose()
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "routes": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+    slow = [
+        name for name, phases in results.items()
+        if args.fail_cold_above and phases["cold"]["p95_ms"] > args.fail_cold_above
+    ]
+    if slow:
+        print(f"FAIL: cold p95 above {args.fail_cold_above:.0f} ms: {', '.join(slow)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100, help="requests per route, including cold ones")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--lectures-per-day", type=int, default=2)
+    parser.add_argument("--assignments", type=int, default=250)
+    parser.add_argument("--payload-scale", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean upstream latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="only routes whose name contains this")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--fail-cold-above", type=float, default=0.0, help="milliseconds; 0 = report only")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,137 @@
+"""
+List response serialization: validated models vs the FAST_SERIALIZATION path
+
+Builds ScheduleResponse, AssignmentListResponse and CoursePerformanceList
+bodies from upstream-shaped fields and renders them to JSON, once the default
+way (validated models, FastAPI's serialize_response + JSONResponse) and once
+through utils.serialization (plain dicts + orjson, or json if orjson is not
+installed). Reports per-item time and tracemalloc peak per response.
+
+    python -m benchmarks.serialization [--items 500] [--repeat 50]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from config import settings
+from schemas import (
+    AssignmentListItem,
+    AssignmentListResponse,
+    ClassSession,
+    CoursePerformance,
+    CoursePerformanceList,
+    ScheduleResponse,
+)
+from utils import serialization
+
+
+def _class_session(i: int) -> Dict[str, Any]:
+    return {
+        "hash": f"slot-{i:06d}",
+        "time": "2024-01-15 10:30",
+        "subject": f"Lecture {i} - Data Structures and Algorithms",
+        "room": f"Room {i % 40}",
+        "join_url": f"https://meet.example.com/{i:06d}",
+        "instructor": "Instructor Name",
+        "start_timestamp": 1705300000 + i * 3600,
+        "end_timestamp": 1705303600 + i * 3600,
+    }
+
+
+def _assignment(i: int) -> Dict[str, Any]:
+    return {
+        "hash": f"assignment-{i:06d}",
+        "title": f"Assignment {i}: Linked lists and pointers",
+        "type": "mixed",
+        "due_date": "2024-01-20T23:59:00Z",
+        "questions_total": 10,
+        "questions_solved": i % 10,
+        "xp": 100,
+        "difficulty": "medium",
+        "status": "pending" if i % 2 else "completed",
+        "course_hash": f"course-{i % 6}",
+    }
+
+
+def _course_performance(i: int) -> Dict[str, Any]:
+    return {
+        "course_hash": f"course-{i:06d}",
+        "course_name": f"Course {i}",
+        "attendance": 87.5,
+        "assignments": 12.0,
+        "quizzes": None,
+    }
+
+
+# (label, envelope model, list field, item model, item fields)
+PAYLOADS: List[Tuple[str, Type[BaseModel], str, Type[BaseModel], Callable[[int], Dict[str, Any]]]] = [
+    ("schedule", ScheduleResponse, "classes", ClassSession, _class_session),
+    ("assignments", AssignmentListResponse, "assignments", AssignmentListItem, _assignment),
+    ("performance", CoursePerformanceList, "courses", CoursePerformance, _course_performance),
+]
+
+
+async def _render_default(envelope: Type[BaseModel], field: str, item: Type[BaseModel], rows: List[Dict[str, Any]]) -> bytes:
+    settings.fast_serialization = False
+    model = envelope(**{field: [serialization.build(item, **row) for row in rows], "errors": []})
+    response_field = create_response_field(name="Response", type_=envelope, mode="serialization")
+    content = await serialize_response(field=response_field, response_content=model)
+    return JSONResponse(content).body
+
+
+async def _render_fast(envelope: Type[BaseModel], field: str, item: Type[BaseModel], rows: List[Dict[str, Any]]) -> bytes:
+    settings.fast_serialization = True
+    model = serialization.build(envelope, **{field: [serialization.build(item, **row) for row in rows], "errors": []})
+    return serialization.respond(model).body
+
+
+async def _measure(render, envelope, field, item, rows, repeat: int) -> Tuple[float, int, int]:
+    """(microseconds per item, tracemalloc peak bytes, body bytes)"""
+    body = await render(envelope, field, item, rows)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await render(envelope, field, item, rows)
+    per_item = (time.perf_counter() - started) / repeat / len(rows) * 1e6
+
+    tracemalloc.start()
+    await render(envelope, field, item, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return per_item, peak, len(body)
+
+
+async def main(items: int, repeat: int):
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"{items} items per response, {repeat} repeats, fast path encoder: {encoder}")
+    fast_serialization = settings.fast_serialization
+
+    for label, envelope, field, item, make_row in PAYLOADS:
+        rows = [make_row(i) for i in range(items)]
+        default = await _measure(_render_default, envelope, field, item, rows, repeat)
+        fast = await _measure(_render_fast, envelope, field, item, rows, repeat)
+
+        for name, (per_item, peak, size) in (("default", default), ("fast", fast)):
+            print(
+                f"{label:<12} {name:<8} {per_item:7.2f} us/item | "
+                f"peak {peak / 1024:8.1f} KiB | body {size / 1024:7.1f} KiB"
+            )
+        print(f"{label:<12} speedup  {default[0] / fast[0]:7.2f}x")
+
+    settings.fast_serialization = fast_serialization
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.repeat))
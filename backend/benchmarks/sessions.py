@@ -0,0 +1,132 @@
+"""
+Sessions table size and auth lookup latency before and after a purge
+
+Fills a throwaway SQLite database with the rows logins leave behind (by
+default most of them logged out or expired), then measures the
+authentication query of get_session_from_header (by token and is_active,
+without the session cache) for random live tokens, and the query plan and
+time of the purge's selection. Runs SessionPurger.purge() and measures the
+same again.
+
+    python -m benchmarks.sessions [--users 200] [--sessions-per-user 50]
+        [--expired 0.6] [--inactive 0.3] [--lookups 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+_tmpdir = tempfile.mkdtemp(prefix="newton-sessions-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/sessions.db"
+os.environ.setdefault("ASYNC_DATABASE_URL", "")
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+from database import AsyncSessionLocal, Session as DBSession, async_engine, engine, init_db  # noqa: E402
+from services.session_purger import session_purger  # noqa: E402
+
+
+def _fill(users: int, per_user: int, expired: float, inactive: float) -> List[str]:
+    """Insert the sessions; returns the live tokens"""
+    now = datetime.utcnow()
+    rows, live = [], []
+    for u in range(users):
+        for s in range(per_user):
+            token = secrets.token_urlsafe(32)
+            roll = random.random()
+            is_active = roll >= inactive
+            is_expired = is_active and roll < inactive + expired
+            rows.append({
+                "session_id": token,
+                "user_email": f"user{u}@example.com",
+                "cookies": {"sessionid": secrets.token_hex(16)},
+                "is_active": is_active,
+                "created_at": now - timedelta(days=random.uniform(0, 30)),
+                "expires_at": now - timedelta(days=1) if is_expired else now + timedelta(days=7),
+            })
+            if is_active and not is_expired:
+                live.append(token)
+
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(DBSession), rows[start:start + 5000])
+    return live
+
+
+async def _measure(tokens: List[str], lookups: int) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        total = await db.scalar(select(func.count()).select_from(DBSession))
+        active = await db.scalar(select(func.count()).select_from(DBSession).where(DBSession.is_active == True))
+
+        timings = []
+        for token in random.choices(tokens, k=lookups):
+            started = time.perf_counter()
+            await db.scalar(select(DBSession).where(
+                DBSession.session_id == token,
+                DBSession.is_active == True
+            ))
+            timings.append(time.perf_counter() - started)
+            db.expunge_all()
+
+        # The purge's selection of expired rows, and the plan SQLite picks for it
+        condition = "is_active = 1 AND expires_at < :now"
+        params = {"now": datetime.utcnow()}
+        plan = (await db.execute(text(f"EXPLAIN QUERY PLAN SELECT id FROM sessions WHERE {condition}"), params)).all()
+        started = time.perf_counter()
+        expired = len((await db.execute(text(f"SELECT id FROM sessions WHERE {condition}"), params)).all())
+        scan_ms = (time.perf_counter() - started) * 1000
+
+    timings.sort()
+    return {
+        "rows": total,
+        "active": active,
+        "expired_active": expired,
+        "lookup_p50_ms": timings[len(timings) // 2] * 1000,
+        "lookup_p95_ms": timings[int(len(timings) * 0.95)] * 1000,
+        "expired_scan_ms": scan_ms,
+        "expired_plan": plan[-1][-1] if plan else "",
+    }
+
+
+def _print(label: str, result: Dict[str, Any]):
+    print(
+        f"{label:<7} rows {result['rows']:>8}  active {result['active']:>8}  "
+        f"expired-active {result['expired_active']:>8}  lookup p50 {result['lookup_p50_ms']:.3f} ms  "
+        f"p95 {result['lookup_p95_ms']:.3f} ms  expired scan {result['expired_scan_ms']:.2f} ms"
+    )
+    print(f"        expired scan plan: {result['expired_plan']}")
+
+
+async def main(args: argparse.Namespace):
+    random.seed(args.seed)
+    init_db()
+    try:
+        tokens = _fill(args.users, args.sessions_per_user, args.expired, args.inactive)
+        _print("before", await _measure(tokens, args.lookups))
+
+        started = time.perf_counter()
+        purged = await session_purger.purge()
+        print(f"purge   {purged} rows in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        _print("after", await _measure(tokens, args.lookups))
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions-per-user", type=int, default=50)
+    parser.add_argument("--expired", type=float, default=0.6, help="fraction still active but expired")
+    parser.add_argument("--inactive", type=float, default=0.3, help="fraction logged out")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
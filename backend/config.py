@@ -17,10 +17,118 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite:///./newton_autopilot.db"
+    async_database_url: str = ""  # derived from database_url when empty
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 20000
+    db_init_on_startup: bool = True  # create tables/indexes at startup; else `manage.py init-db`
+
+    # Activity log writer
+    activity_batch_size: int = 100
+    activity_flush_interval: float = 1.0
+    activity_queue_size: int = 10000
+    activity_log_retention_days: int = 90
+    activity_log_purge_interval: int = 3600
 
     # Security
     secret_key: str = "change-this-secret-key-in-production"
 
+    # Authenticated session cache
+    session_cache_max_entries: int = 10000
+    session_cache_ttl: int = 60  # seconds a worker may serve a session revoked elsewhere
+    session_negative_ttl: int = 30
+
+    # Session table hygiene
+    session_purge_interval: int = 3600  # seconds; 0 = only `manage.py purge-sessions`
+    session_purge_batch_size: int = 1000
+    max_active_sessions_per_user: int = 5  # oldest are logged out on login; 0 = no limit
+
+    # Upstream HTTP pool
+    newton_timeout: float = 30.0
+    newton_max_connections: int = 100
+    newton_max_keepalive_connections: int = 20
+    newton_keepalive_expiry: float = 30.0
+
+    # Upstream rate limiting (requests/second) and retries
+    upstream_host_rate: float = 50.0
+    upstream_host_burst: int = 100
+    # Per user: well above one page's fan-out, so only runaway clients wait
+    upstream_session_rate: float = 25.0
+    upstream_session_burst: int = 150
+    upstream_min_rate_fraction: float = 0.1
+    upstream_max_retries: int = 3
+    upstream_backoff_base: float = 0.5
+    upstream_backoff_max: float = 10.0
+    upstream_retry_budget_ratio: float = 0.1
+    upstream_retry_budget_min_per_second: float = 1.0
+    upstream_retry_budget_max: float = 20.0
+
+    # Per-course fan-out
+    course_fanout_concurrency: int = 6
+    course_call_timeout: float = 15.0
+    assignments_page_size: int = 100
+
+    # Skip response revalidation for trusted upstream data (uses orjson if installed)
+    fast_serialization: bool = False
+
+    # Upstream response cache (TTLs in seconds)
+    cache_enabled: bool = True
+    cache_max_entries: int = 5000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_user_info: int = 300
+    cache_ttl_courses: int = 600
+    cache_ttl_course_details: int = 3600
+    cache_ttl_performance: int = 300
+    cache_ttl_schedule: int = 60
+    cache_ttl_assignments: int = 60
+
+    # State shared between workers ("local" = per process, "sqlite" = file shared on one host)
+    state_backend: str = "local"
+    state_sqlite_path: str = "./shared_state.db"
+    state_poll_interval: float = 0.5
+    state_event_retention: int = 300
+    state_stale_ttl: int = 3600  # revalidatable responses stay shared this long after expiring
+
+    # Upstream request coalescing
+    single_flight_enabled: bool = True
+
+    # Local lecture-slot store (seconds before a synced day is refetched)
+    schedule_sync_max_age: int = 900
+    slot_index_max_entries: int = 50000
+
+    # /api/schedule/stream (seconds)
+    schedule_stream_refresh_interval: int = 60
+    schedule_stream_fast_interval: int = 15  # while a starting class has no join URL yet
+    schedule_stream_starting_lead: int = 600  # how early a class is announced as starting
+    schedule_stream_keepalive: int = 15
+    schedule_stream_ticket_ttl: int = 30  # seconds a stream ticket can be redeemed
+
+    # Background warming of classes about to start (seconds)
+    prefetch_enabled: bool = True
+    prefetch_lead: int = 300
+    prefetch_scan_interval: int = 60
+    prefetch_retry_interval: int = 60  # while a slot has no join URL yet
+    prefetch_concurrency: int = 4  # prefetch calls in flight, all users and workers
+    prefetch_min_headroom: float = 0.5  # unused share of the portal rate budget required
+
+    # Stale-while-revalidate performance snapshots
+    performance_snapshot_max_age: int = 300
+    performance_snapshot_max_entries: int = 10000
+
+    # /metrics (shared snapshot directory merges uvicorn workers; empty = this process only)
+    metrics_dir: str = ""
+    metrics_flush_interval: float = 5.0
+
+    # Request tracing (Server-Timing header, /debug/traces) and sampled profiling of slow requests
+    tracing_enabled: bool = True
+    trace_buffer_size: int = 200
+    trace_max_spans: int = 100
+    trace_profile_sample_rate: float = 0.0
+    trace_profile_threshold_ms: float = 1000.0
+    trace_profile_dir: str = "./profiles"
+    # /debug/traces shows every user's upstream paths: off unless enabled with a token
+    debug_traces_enabled: bool = False
+    debug_token: str = ""  # sent as X-Debug-Token
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,17 +1,116 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, JSON
+from sqlalchemy import create_engine, event, Column, Integer, String, Date, DateTime, Boolean, Text, JSON, Index, UniqueConstraint
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from typing import Any, Dict
 from config import settings
+from utils.metrics import metrics, DB_BUCKETS
+from utils import tracing
+import time
+
+
+def _async_database_url(url: str) -> str:
+    """Map a sync database URL to its asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the writer; NORMAL sync is safe under WAL"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+    cursor.close()
+
+
+is_sqlite = settings.database_url.startswith("sqlite")
 
 # Create engine
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    connect_args={"check_same_thread": False} if is_sqlite else {}
+)
+
+# Async engine for request handlers, so DB work doesn't block the event loop
+async_engine = create_async_engine(
+    settings.async_database_url or _async_database_url(settings.database_url)
 )
 
-# Session factory
+if is_sqlite:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# Query timings and pool usage for /metrics
+DB_QUERY_DURATION = metrics.histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time",
+    ("engine", "operation"),
+    DB_BUCKETS
+)
+DB_QUERY_ERRORS = metrics.counter("db_query_errors", "Database statements that raised", ("engine",))
+
+
+def _instrument_engine(sync_engine, name: str):
+    """Time every cursor execution on the engine, by statement kind"""
+    series = {
+        operation: DB_QUERY_DURATION.labels(name, operation)
+        for operation in ("select", "insert", "update", "delete", "text")
+    }
+    errors = DB_QUERY_ERRORS.labels(name)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context.isinsert:
+            operation = "insert"
+        elif context.isupdate:
+            operation = "update"
+        elif context.isdelete:
+            operation = "delete"
+        elif context.is_text:
+            operation = "text"
+        else:
+            operation = "select"
+        duration = time.perf_counter() - context._query_started
+        series[operation].observe(duration)
+        tracing.record("db", context._query_started, duration, operation)
+
+    def handle_error(exception_context):
+        errors.inc()
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool usage of both engines (QueuePool-style pools only)"""
+    stats: Dict[str, Any] = {"size": {}, "checked_out": {}, "overflow": {}}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        if hasattr(pool, "checkedout"):
+            stats["size"][name] = pool.size()
+            stats["checked_out"][name] = pool.checkedout()
+            stats["overflow"][name] = pool.overflow()
+    return stats
+
+
+_instrument_engine(engine, "sync")
+_instrument_engine(async_engine.sync_engine, "async")
+metrics.gauge_source("db_pool", pool_stats, label="engine")
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -31,6 +130,10 @@ class User(Base):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Expired and logged-out rows (session purge)
+        Index("ix_sessions_active_expires", "is_active", "expires_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True)
@@ -41,8 +144,21 @@ class Session(Base):
     expires_at = Column(DateTime)
 
 
+class StreamTicket(Base):
+    """Short-lived, single-use credential for opening an event stream"""
+    __tablename__ = "stream_tickets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_hash = Column(String, unique=True, index=True)  # sha256 of the ticket
+    session_id = Column(String)
+    expires_at = Column(DateTime, index=True)
+
+
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        Index("ix_activity_logs_user_created", "user_email", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_email = Column(String, index=True)
@@ -52,8 +168,68 @@ class ActivityLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+class ActivityDaily(Base):
+    """One row per user per active (UTC) day, maintained by the activity writer"""
+    __tablename__ = "activity_daily"
+    __table_args__ = (
+        UniqueConstraint("user_email", "day", name="uq_activity_daily_user_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_email = Column(String)
+    day = Column(Date)
+    event_count = Column(Integer, default=0)
+    first_at = Column(DateTime)
+    last_at = Column(DateTime)
+
+
+class LectureSlot(Base):
+    __tablename__ = "lecture_slots"
+    __table_args__ = (
+        UniqueConstraint("user_email", "slot_hash", name="uq_lecture_slots_user_slot"),
+        Index("ix_lecture_slots_user_start", "user_email", "start_timestamp"),
+        # Upcoming classes of all users (class prefetcher)
+        Index("ix_lecture_slots_start", "start_timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    slot_hash = Column(String, index=True)
+    user_email = Column(String)
+    course_hash = Column(String)
+    subject = Column(String)
+    room = Column(String, nullable=True)
+    join_url = Column(String, nullable=True)
+    instructor = Column(String, nullable=True)
+    start_timestamp = Column(Integer)
+    end_timestamp = Column(Integer)
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ScheduleSyncWindow(Base):
+    __tablename__ = "schedule_sync_windows"
+    __table_args__ = (
+        UniqueConstraint("user_email", "window_start", name="uq_schedule_sync_windows_user_window"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_email = Column(String)
+    window_start = Column(Integer)  # local midnight timestamp of the synced day
+    synced_at = Column(DateTime, default=datetime.utcnow)
+    failed_courses = Column(JSON, default=list)  # course hashes still to refetch for the day
+
+
+def init_db():
+    """
+    Create missing tables, and indexes added after a table was first created
+
+    Runs at API startup (DB_INIT_ON_STARTUP) or as `python manage.py init-db`
+    before starting several workers, rather than on import.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 # Dependency to get DB session
@@ -63,3 +239,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,8 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from api import auth, assignments, schedule, solver, performance
+from fastapi.responses import PlainTextResponse
+from api import auth, assignments, schedule, solver, performance, dashboard
+from services.http_pool import http_pool
+from services.newton_client import response_cache, single_flight
+from services.upstream_limiter import upstream_limiter
+from services.slot_index import slot_index
+from services.session_cache import session_cache
+from services.activity_writer import activity_writer
+from services.performance_snapshots import performance_snapshots
+from services.state_backend import state_backend
+from services.schedule_feed import schedule_feeds
+from services.class_prefetcher import class_prefetcher
+from services.session_purger import session_purger
+from database import init_db, pool_stats
+from utils.metrics import metrics, MetricsMiddleware
+from utils.tracing import tracer, TracingMiddleware
 from config import settings
 import uvicorn
+import secrets
 import logging
 
 # Configure logging
@@ -35,6 +51,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency for /metrics; per-request phase timing (Server-Timing)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+# Service statistics, shown on /health and exported as /metrics gauges
+STATS_SOURCES = {
+    "http_pool": http_pool.stats,
+    "response_cache": response_cache.stats,
+    "single_flight": single_flight.stats,
+    "upstream_limiter": upstream_limiter.stats,
+    "slot_index": slot_index.stats,
+    "session_cache": session_cache.stats,
+    "activity_writer": activity_writer.stats,
+    "performance_snapshots": performance_snapshots.stats,
+    "schedule_feeds": schedule_feeds.stats,
+    "class_prefetcher": class_prefetcher.stats,
+    "session_purger": session_purger.stats,
+    "tracing": tracer.stats,
+    "state_backend": state_backend.stats,
+}
+for name, stats in STATS_SOURCES.items():
+    metrics.gauge_source(name, stats)
+
 
 # Health check endpoint
 @app.get("/")
@@ -50,16 +89,45 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "api": "operational"
+        "api": "operational",
+        **{name: stats() for name, stats in STATS_SOURCES.items()},
+        "db_pool": pool_stats(),
+        "metrics": metrics.stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text exposition of latency histograms, error counters and service gauges"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/debug/traces")
+async def recent_traces(
+    limit: int = Query(50, ge=1, le=500),
+    min_ms: float = Query(0, ge=0),
+    x_debug_token: str = Header("")
+):
+    """
+    Recently finished request traces (phase totals and spans), newest first
+
+    Spans include every user's upstream URL paths (course and assignment
+    hashes), so this needs DEBUG_TRACES_ENABLED and the DEBUG_TOKEN.
+    """
+    if not settings.debug_traces_enabled or not settings.debug_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_debug_token.encode(), settings.debug_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+    return {"traces": tracer.recent(limit, min_ms)}
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(assignments.router, prefix="/api/assignments", tags=["Assignments"])
 app.include_router(schedule.router, prefix="/api/schedule", tags=["Schedule"])
 app.include_router(solver.router, prefix="/api/solve", tags=["AI Solver"])
 app.include_router(performance.router, prefix="/api/performance", tags=["Performance"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 
 
 # Startup event
@@ -68,12 +136,29 @@ async def startup_event():
     logger.info("Newton Autopilot API starting up...")
     logger.info(f"Frontend URL: {settings.frontend_url}")
     logger.info(f"API configured with database: {settings.database_url}")
+    if settings.db_init_on_startup:
+        init_db()
+    await state_backend.start()
+    await http_pool.start()
+    await activity_writer.start()
+    await metrics.start()
+    if settings.prefetch_enabled:
+        await class_prefetcher.start()
+    await session_purger.start()
 
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Newton Autopilot API shutting down...")
+    await performance_snapshots.close()
+    await schedule_feeds.close()
+    await class_prefetcher.close()
+    await session_purger.stop()
+    await activity_writer.stop()
+    await http_pool.close()
+    await metrics.stop()
+    await state_backend.close()
 
 
 if __name__ == "__main__":
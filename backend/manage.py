@@ -0,0 +1,60 @@
+"""
+Management commands
+
+    python manage.py init-db
+    python manage.py backfill-activity-rollup
+    python manage.py purge-sessions
+"""
+import argparse
+import asyncio
+from database import AsyncSessionLocal, async_engine, init_db
+
+
+async def init_db_command(args):
+    """Create missing tables and indexes (run before starting workers)"""
+    init_db()
+    print("Database schema is up to date")
+
+
+async def backfill_activity_rollup(args):
+    """Rebuild the daily activity rollup from activity_logs"""
+    from services.activity_rollup import backfill
+
+    async with AsyncSessionLocal() as db:
+        written = await backfill(db)
+    print(f"Backfilled {written} user-day rollup rows")
+
+
+async def purge_sessions(args):
+    """Delete logged-out and expired sessions"""
+    from services.session_purger import session_purger
+
+    purged = await session_purger.purge()
+    print(f"Purged {purged} inactive or expired sessions")
+
+
+COMMANDS = {
+    "init-db": init_db_command,
+    "backfill-activity-rollup": backfill_activity_rollup,
+    "purge-sessions": purge_sessions,
+}
+
+
+async def run(args):
+    try:
+        await COMMANDS[args.command](args)
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Newton Autopilot management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparsers.add_parser(name, help=command.__doc__)
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
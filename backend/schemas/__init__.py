@@ -4,6 +4,12 @@ from datetime import datetime
 from enum import Enum
 
 
+# Shared Schemas
+class CourseError(BaseModel):
+    course_hash: str
+    error: str
+
+
 # Auth Schemas
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -54,6 +60,11 @@ class AssignmentListItem(BaseModel):
     course_hash: str
 
 
+class AssignmentListResponse(BaseModel):
+    assignments: List[AssignmentListItem]
+    errors: List[CourseError] = []
+
+
 class QuestionDetail(BaseModel):
     hash: str
     text: str
@@ -118,6 +129,16 @@ class ClassSession(BaseModel):
     end_timestamp: int
 
 
+class ScheduleResponse(BaseModel):
+    classes: List[ClassSession]
+    errors: List[CourseError] = []
+
+
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
+
+
 class JoinClassRequest(BaseModel):
     lecture_slot_hash: str
 
@@ -169,6 +190,8 @@ class PerformanceOverview(BaseModel):
     assignments_completed: float
     total_xp: int
     streak_days: int
+    errors: List[CourseError] = []
+    snapshot_age_seconds: float = 0
 
 
 class CoursePerformance(BaseModel):
@@ -179,6 +202,25 @@ class CoursePerformance(BaseModel):
     quizzes: Optional[float] = None
 
 
+class CoursePerformanceList(BaseModel):
+    courses: List[CoursePerformance]
+    errors: List[CourseError] = []
+    snapshot_age_seconds: float = 0
+
+
+# Dashboard Schemas
+class DashboardSectionError(BaseModel):
+    section: str
+    error: str
+
+
+class DashboardResponse(BaseModel):
+    schedule: Optional[ScheduleResponse] = None
+    performance: Optional[PerformanceOverview] = None
+    assignments: Optional[AssignmentListResponse] = None
+    errors: List[DashboardSectionError] = []
+
+
 # Course Schemas
 class CourseListItem(BaseModel):
     hash: str
@@ -0,0 +1,132 @@
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ActivityDaily, ActivityLog
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+
+def _dialect_upsert_helpers(db: AsyncSession):
+    """ON CONFLICT-capable insert plus two-argument min/max for the bound database"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert, func.least, func.greatest
+    return sqlite.insert, func.min, func.max
+
+
+async def apply_events(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """
+    Fold activity log rows into the daily rollup (caller commits)
+
+    Rows are grouped per (user_email, UTC day) first, so a batch costs one
+    upsert per active user-day rather than one per event.
+    """
+    days: Dict[Tuple[str, date], Dict[str, Any]] = {}
+    for row in rows:
+        created_at = row["created_at"]
+        key = (row["user_email"], created_at.date())
+        bucket = days.get(key)
+        if bucket is None:
+            days[key] = {"event_count": 1, "first_at": created_at, "last_at": created_at}
+        else:
+            bucket["event_count"] += 1
+            bucket["first_at"] = min(bucket["first_at"], created_at)
+            bucket["last_at"] = max(bucket["last_at"], created_at)
+
+    if not days:
+        return
+
+    insert, least, greatest = _dialect_upsert_helpers(db)
+    statement = insert(ActivityDaily).values([
+        {"user_email": user_email, "day": day, **bucket}
+        for (user_email, day), bucket in days.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_email", "day"],
+        set_={
+            "event_count": ActivityDaily.event_count + statement.excluded.event_count,
+            "first_at": least(ActivityDaily.first_at, statement.excluded.first_at),
+            "last_at": greatest(ActivityDaily.last_at, statement.excluded.last_at),
+        }
+    )
+    await db.execute(statement)
+
+
+async def get_streak_days(db: AsyncSession, user_email: str, today: Optional[date] = None) -> int:
+    """
+    Consecutive active days ending today
+
+    A streak that ended yesterday still counts until today is over. Rows
+    are streamed newest first and reading stops at the first gap, so only
+    the streak's own rollup rows (plus one) are fetched, not the history.
+    """
+    today = today or datetime.utcnow().date()
+    expected = today
+    streak = 0
+
+    days = await db.stream_scalars(
+        select(ActivityDaily.day)
+        .where(ActivityDaily.user_email == user_email, ActivityDaily.day <= today)
+        .order_by(ActivityDaily.day.desc())
+    )
+    try:
+        async for day in days:
+            if day == expected:
+                streak += 1
+            elif streak == 0 and day == today - timedelta(days=1):
+                streak = 1
+                expected = day
+            else:
+                break
+            expected -= timedelta(days=1)
+    finally:
+        await days.close()
+
+    return streak
+
+
+async def backfill(db: AsyncSession, chunk_size: int = 500) -> int:
+    """
+    Rebuild rollup rows from activity_logs; returns user-days written
+
+    Days still covered by activity_logs are overwritten with recomputed
+    counts. Older rollup rows, whose logs were purged by retention, are kept.
+    """
+    day = func.date(ActivityLog.created_at)
+    aggregated = await db.execute(
+        select(
+            ActivityLog.user_email,
+            day,
+            func.count(ActivityLog.id),
+            func.min(ActivityLog.created_at),
+            func.max(ActivityLog.created_at)
+        )
+        .where(ActivityLog.created_at.is_not(None))
+        .group_by(ActivityLog.user_email, day)
+    )
+
+    values = [
+        {
+            "user_email": user_email,
+            "day": date.fromisoformat(active_day) if isinstance(active_day, str) else active_day,
+            "event_count": event_count,
+            "first_at": first_at,
+            "last_at": last_at,
+        }
+        for user_email, active_day, event_count, first_at, last_at in aggregated
+    ]
+
+    insert, _, _ = _dialect_upsert_helpers(db)
+    for start in range(0, len(values), chunk_size):
+        statement = insert(ActivityDaily).values(values[start:start + chunk_size])
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_email", "day"],
+            set_={
+                "event_count": statement.excluded.event_count,
+                "first_at": statement.excluded.first_at,
+                "last_at": statement.excluded.last_at,
+            }
+        )
+        await db.execute(statement)
+
+    await db.commit()
+    return len(values)
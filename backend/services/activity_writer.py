@@ -0,0 +1,206 @@
+from sqlalchemy import select, delete
+from database import AsyncSessionLocal, ActivityLog
+from .activity_rollup import apply_events
+from config import settings
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop(); the writer flushes everything before it and exits
+_STOP = object()
+
+
+class ActivityLogWriter:
+    """
+    Background writer that batches ActivityLog inserts off the request path
+
+    Requests enqueue rows and return immediately; a single task commits them
+    in batches of up to ACTIVITY_BATCH_SIZE or every ACTIVITY_FLUSH_INTERVAL
+    seconds. The queue is bounded, so producers wait (back-pressure) rather
+    than growing memory when the database falls behind. A second task
+    deletes rows older than the retention period. Each batch also updates
+    the per-user daily rollup (activity_daily) in the same transaction.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+        retention_days: int,
+        purge_interval: float
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.retention_days = retention_days
+        self.purge_interval = purge_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.purged = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.started:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._run())]
+        if self.retention_days > 0:
+            self._tasks.append(asyncio.create_task(self._purge_periodically()))
+        logger.info("Activity log writer started")
+
+    async def stop(self):
+        """Stop the background tasks and flush everything still queued"""
+        if not self.started:
+            return
+
+        (writer, *others), self._tasks = self._tasks, []
+        for task in others:
+            task.cancel()
+
+        # The writer drains the queue up to the sentinel instead of being
+        # cancelled, so no batch it has already collected is lost
+        written = self.written
+        await self._queue.put(_STOP)
+        await asyncio.gather(writer, *others, return_exceptions=True)
+
+        # Rows queued behind the sentinel, or left by a writer that failed
+        pending = [row for row in self._drain() if row is not _STOP]
+        if pending:
+            await self._flush(pending)
+        logger.info(f"Activity log writer stopped ({self.written - written} rows flushed at shutdown)")
+
+    def _drain(self) -> List[Any]:
+        rows = []
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def log(
+        self,
+        user_email: str,
+        action_type: str,
+        details: Optional[Dict[str, Any]] = None,
+        status: str = "success"
+    ):
+        """Queue an activity log row (waits if the queue is full)"""
+        row = {
+            "user_email": user_email,
+            "action_type": action_type,
+            "details": details,
+            "status": status,
+            "created_at": datetime.utcnow(),
+        }
+
+        if not self.started:
+            await self._flush([row])
+            return
+
+        await self._queue.put(row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        stopping = False
+
+        while not stopping:
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+    async def _flush(self, rows: List[Dict[str, Any]]):
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add_all([ActivityLog(**row) for row in rows])
+                await apply_events(db, rows)
+                await db.commit()
+            self.written += len(rows)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Error writing {len(rows)} activity log rows: {str(e)}")
+
+    async def purge_old_logs(self, chunk_size: int = 1000) -> int:
+        """Delete rows older than the retention period, one chunk at a time"""
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        purged = 0
+
+        while True:
+            async with AsyncSessionLocal() as db:
+                ids = list(await db.scalars(
+                    select(ActivityLog.id)
+                    .where(ActivityLog.created_at < cutoff)
+                    .limit(chunk_size)
+                ))
+                if not ids:
+                    break
+
+                await db.execute(delete(ActivityLog).where(ActivityLog.id.in_(ids)))
+                await db.commit()
+
+            purged += len(ids)
+            # Short transactions keep the writer and request handlers unblocked
+            await asyncio.sleep(0)
+
+        self.purged += purged
+        return purged
+
+    async def _purge_periodically(self):
+        while True:
+            try:
+                purged = await self.purge_old_logs()
+                if purged:
+                    logger.info(f"Purged {purged} activity log rows older than {self.retention_days} days")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error purging activity logs: {str(e)}")
+
+            await asyncio.sleep(self.purge_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "purged": self.purged,
+        }
+
+
+activity_writer = ActivityLogWriter(
+    batch_size=settings.activity_batch_size,
+    flush_interval=settings.activity_flush_interval,
+    max_queue=settings.activity_queue_size,
+    retention_days=settings.activity_log_retention_days,
+    purge_interval=settings.activity_log_purge_interval
+)
@@ -1,4 +1,3 @@
-from anthropic import Anthropic
 import re
 from typing import Dict, Tuple, Optional
 import json
@@ -6,6 +5,9 @@ import json
 
 class AISolver:
     def __init__(self, api_key: str):
+        # The SDK takes seconds to import; load it with the first solver
+        from anthropic import Anthropic
+
         self.client = Anthropic(api_key=api_key)
         self.model = "claude-sonnet-4-20250514"
 
@@ -1,4 +1,3 @@
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from typing import Dict, Optional
 import asyncio
 import logging
@@ -6,6 +5,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _async_playwright():
+    """Playwright is imported on first use; only logins and session checks need it"""
+    from playwright.async_api import async_playwright
+
+    return async_playwright()
+
+
 class AuthService:
     """Service for automating Google OAuth login to Newton School"""
 
@@ -32,7 +38,7 @@ class AuthService:
         Raises:
             Exception: If authentication fails
         """
-        async with async_playwright() as p:
+        async with _async_playwright() as p:
             browser = await p.chromium.launch(headless=self.headless)
             context = await browser.new_context(
                 viewport={"width": 1280, "height": 720},
@@ -116,7 +122,7 @@ class AuthService:
         Returns:
             True if session is valid, False otherwise
         """
-        async with async_playwright() as p:
+        async with _async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
             context = await browser.new_context()
 
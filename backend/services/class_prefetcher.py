@@ -0,0 +1,293 @@
+"""
+Background warming of classes that are about to start
+
+Join links and rooms are needed in the minutes before a class, which is
+when /api/schedule/join-class would otherwise scan upstream. Every
+PREFETCH_SCAN_INTERVAL seconds the prefetcher reads the upcoming slots of
+users with an active session from the local slot store and, PREFETCH_LEAD
+seconds before each slot starts, fetches the slot's course schedule once
+with the user's newest session. A new join URL or room is copied into the
+stored slot, which is keyed by user, so today-views and join-class serve it
+to every session of the user on every worker. Slots still without a join URL
+are retried every PREFETCH_RETRY_INTERVAL seconds until they start.
+
+Only the worker holding the prefetch lease in the shared state backend
+prefetches; the others take over within a few scans if it stops. With the
+local backend every worker holds its own lease. Prefetching never competes
+with live traffic for more than PREFETCH_CONCURRENCY upstream calls at a
+time, and waits while live traffic leaves less than PREFETCH_MIN_HEADROOM of
+the portal's rate budget unused.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+from sqlalchemy import select, update
+
+from config import settings
+from database import AsyncSessionLocal, LectureSlot, Session as DBSession
+from .newton_client import NewtonClient
+from .state_backend import state_backend
+from .upstream_limiter import upstream_limiter
+
+logger = logging.getLogger(__name__)
+
+# Seconds between rate budget checks while live traffic has no headroom
+_HEADROOM_POLL = 1.0
+
+# Lease that picks the one worker that prefetches; renewed on every scan
+_LEASE = "class_prefetcher"
+_LEASE_SCANS = 3  # scans a lost leader may miss before another worker takes over
+
+
+class PrefetchTarget:
+    """An upcoming slot of one user and the session to fetch it with"""
+
+    __slots__ = (
+        "user_email", "slot_hash", "course_hash", "start_timestamp", "end_timestamp",
+        "session_id", "cookies", "due", "warmed"
+    )
+
+    def __init__(self, slot: LectureSlot, session: DBSession):
+        self.user_email = slot.user_email
+        self.slot_hash = slot.slot_hash
+        self.due = 0.0
+        self.warmed = False
+        self.update(slot, session)
+
+    def update(self, slot: LectureSlot, session: DBSession):
+        self.course_hash = slot.course_hash
+        self.start_timestamp = slot.start_timestamp
+        self.end_timestamp = slot.end_timestamp
+        self.session_id = session.session_id
+        self.cookies = session.cookies
+
+
+class ClassPrefetcher:
+    """
+    Timer queue of upcoming slots, warmed a lead time before they start
+
+    Args:
+        lead: Seconds before a slot's start it is warmed
+        scan_interval: Seconds between reads of upcoming slots from the store
+        retry_interval: Seconds between warms of a slot without a join URL
+        concurrency: Prefetch calls in flight at once (all users and workers)
+        min_headroom: Share of the host rate budget that must be unused
+    """
+
+    def __init__(
+        self,
+        lead: float,
+        scan_interval: float,
+        retry_interval: float,
+        concurrency: int,
+        min_headroom: float
+    ):
+        self.lead = lead
+        self.scan_interval = scan_interval
+        self.retry_interval = retry_interval
+        self.min_headroom = min_headroom
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._targets: Dict[Tuple[str, str], PrefetchTarget] = {}
+        self._queue: List[Tuple[float, Tuple[str, str]]] = []  # heap of (due, key)
+        self._warming: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()  # set when a retry is queued while the loop sleeps
+        self._task: Optional[asyncio.Task] = None
+        self._host = httpx.URL(NewtonClient.BASE_URL).host
+        self._owner = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self.leader = False
+        self.scans = 0
+        self.warms = 0
+        self.join_urls_found = 0
+        self.slots_updated = 0
+        self.errors = 0
+        self.deferred = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        tasks = list(self._warming)
+        if self._task:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.leader:
+            self.leader = False
+            await state_backend.release_lease(_LEASE, self._owner)
+
+    async def _run(self):
+        next_scan = 0.0
+        while True:
+            now = time.time()
+            if now >= next_scan:
+                try:
+                    await self._lead_and_scan(now)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error scanning upcoming classes: {str(e)}")
+                next_scan = now + self.scan_interval
+
+            self._start_due(time.time())
+            wake = min(next_scan, self._queue[0][0]) if self._queue else next_scan
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.5, wake - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _lead_and_scan(self, now: float):
+        """Renew the lease and scan, or stand by while another worker holds it"""
+        leader = await state_backend.acquire_lease(_LEASE, self._owner, self.scan_interval * _LEASE_SCANS)
+        if leader != self.leader:
+            logger.info(f"Class prefetching {'taken over' if leader else 'left to another worker'}")
+            self.leader = leader
+
+        if leader:
+            await self._scan(now)
+        else:
+            self._targets.clear()
+            self._queue.clear()
+
+    async def _scan(self, now: float):
+        """Track the slots starting before the next scan's lead window ends"""
+        horizon = int(now + self.lead + self.scan_interval)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(LectureSlot, DBSession)
+                .join(DBSession, DBSession.user_email == LectureSlot.user_email)
+                .where(
+                    LectureSlot.start_timestamp < horizon,
+                    LectureSlot.end_timestamp > int(now),
+                    DBSession.is_active == True,
+                    DBSession.expires_at > datetime.utcnow()
+                )
+                .order_by(DBSession.created_at)
+            )).all()
+
+        # Rows are ordered by session age, so a user's newest session wins
+        seen = set()
+        for slot, session in rows:
+            key = (slot.user_email, slot.slot_hash)
+            seen.add(key)
+            target = self._targets.get(key)
+            if target is None:
+                target = self._targets[key] = PrefetchTarget(slot, session)
+                self._schedule(target, max(now, slot.start_timestamp - self.lead))
+            else:
+                rescheduled = target.start_timestamp != slot.start_timestamp
+                target.update(slot, session)
+                if rescheduled and not target.warmed:
+                    self._schedule(target, max(now, slot.start_timestamp - self.lead))
+
+        # Slots that ended, moved away or lost their last active session
+        for key in [key for key in self._targets if key not in seen]:
+            del self._targets[key]
+        self.scans += 1
+
+    def _schedule(self, target: PrefetchTarget, due: float):
+        target.due = due
+        heapq.heappush(self._queue, (due, (target.user_email, target.slot_hash)))
+        self._wake.set()
+
+    def _start_due(self, now: float):
+        while self._queue and self._queue[0][0] <= now:
+            due, key = heapq.heappop(self._queue)
+            target = self._targets.get(key)
+            if target is None or target.due != due:
+                continue  # dropped or rescheduled since
+
+            task = asyncio.create_task(self._warm(target))
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+
+    async def _warm(self, target: PrefetchTarget):
+        join_url = None
+        async with self._semaphore:
+            # Leave the rate budget to live requests while they need it
+            while upstream_limiter.headroom(self._host) < self.min_headroom:
+                self.deferred += 1
+                await asyncio.sleep(_HEADROOM_POLL)
+
+            try:
+                join_url = await self._fetch(target)
+                self.warms += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Prefetch of slot {target.slot_hash} for {target.user_email} failed: {str(e)}")
+
+        target.warmed = True
+        if join_url:
+            self.join_urls_found += 1
+        elif time.time() + self.retry_interval < target.start_timestamp and self._targets.get(
+            (target.user_email, target.slot_hash)
+        ) is target:
+            self._schedule(target, time.time() + self.retry_interval)
+
+    async def _fetch(self, target: PrefetchTarget) -> Optional[str]:
+        """Fetch the slot's course schedule; returns the slot's join URL"""
+        newton_client = NewtonClient(target.cookies, session_key=target.session_id)
+        try:
+            # Same targeted call as join-class; join URLs appear late
+            slots = await newton_client.get_schedule(
+                target.course_hash,
+                target.start_timestamp,
+                target.end_timestamp + 1,
+                revalidate=True
+            )
+        finally:
+            await newton_client.close()
+
+        fresh = next((slot for slot in slots if slot.hash == target.slot_hash), None)
+        if fresh is None:
+            return None
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(LectureSlot)
+                .where(
+                    LectureSlot.user_email == target.user_email,
+                    LectureSlot.slot_hash == target.slot_hash,
+                    (LectureSlot.join_url.is_distinct_from(fresh.join_url))
+                    | (LectureSlot.room.is_distinct_from(fresh.room))
+                )
+                .values(join_url=fresh.join_url, room=fresh.room)
+            )
+            await db.commit()
+        self.slots_updated += result.rowcount
+
+        return fresh.join_url
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "leader": self.leader,
+            "tracked": len(self._targets),
+            "queued": len(self._queue),
+            "warming": len(self._warming),
+            "scans": self.scans,
+            "warms": self.warms,
+            "join_urls_found": self.join_urls_found,
+            "slots_updated": self.slots_updated,
+            "deferred": self.deferred,
+            "errors": self.errors,
+        }
+
+
+class_prefetcher = ClassPrefetcher(
+    lead=settings.prefetch_lead,
+    scan_interval=settings.prefetch_scan_interval,
+    retry_interval=settings.prefetch_retry_interval,
+    concurrency=settings.prefetch_concurrency,
+    min_headroom=settings.prefetch_min_headroom
+)
@@ -0,0 +1,108 @@
+import httpx
+from typing import Optional, Dict, Any
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# httpcore trace events of a request that had to open a new connection
+_CONNECT_EVENTS = ("connection.connect_tcp.complete", "connection.connect_unix_socket.complete")
+
+
+class CountingTransport(httpx.AsyncHTTPTransport):
+    """
+    Connection-pooling transport that keeps request and connection counters
+
+    New connections are counted through the public `trace` request
+    extension, so requests_total - connections_opened is the number of
+    requests that reused a pooled connection.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.connections_opened = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        request.extensions["trace"] = self._tracer(request.extensions.get("trace"))
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.requests_in_flight -= 1
+
+    def _tracer(self, inner):
+        async def trace(event: str, info: Dict[str, Any]):
+            if event in _CONNECT_EVENTS:
+                self.connections_opened += 1
+            if inner is not None:
+                await inner(event, info)
+
+        return trace
+
+
+class HTTPPool:
+    """
+    Process-wide connection pool shared by every NewtonClient.
+
+    Each NewtonClient still owns its own httpx.AsyncClient (and therefore its
+    own cookie jar), but all of them send through the same transport, so TCP
+    and TLS connections to the portal are reused across requests and users.
+    """
+
+    def __init__(self):
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+
+    @property
+    def started(self) -> bool:
+        return self.transport is not None
+
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Create the shared transport (call once per worker at startup)"""
+        if self.transport is not None:
+            return
+
+        self.transport = transport or CountingTransport(
+            limits=httpx.Limits(
+                max_connections=settings.newton_max_connections,
+                max_keepalive_connections=settings.newton_max_keepalive_connections,
+                keepalive_expiry=settings.newton_keepalive_expiry
+            )
+        )
+        logger.info(
+            f"HTTP pool started (max_connections={settings.newton_max_connections}, "
+            f"keepalive_expiry={settings.newton_keepalive_expiry}s)"
+        )
+
+    async def close(self):
+        """Close all pooled connections (call at shutdown)"""
+        if self.transport is None:
+            return
+
+        transport, self.transport = self.transport, None
+        await transport.aclose()
+        logger.info("HTTP pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation snapshot"""
+        stats = {
+            "started": self.started,
+            "max_connections": settings.newton_max_connections,
+            "max_keepalive_connections": settings.newton_max_keepalive_connections,
+            "keepalive_expiry": settings.newton_keepalive_expiry,
+        }
+
+        if isinstance(self.transport, CountingTransport):
+            stats.update({
+                "connections_opened": self.transport.connections_opened,
+                "requests_in_flight": self.transport.requests_in_flight,
+                "requests_total": self.transport.requests_total,
+            })
+
+        return stats
+
+
+http_pool = HTTPPool()
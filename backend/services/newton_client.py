@@ -1,102 +1,671 @@
 import httpx
-from typing import Optional, Dict, List, Any
+import time
+import asyncio
+import functools
+import pickle
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Tuple, AsyncIterator, Awaitable, Callable
 from datetime import datetime, timedelta
+from config import settings
+from .http_pool import http_pool
+from .slot_index import slot_index
+from .upstream_limiter import upstream_limiter
+from .records import AssignmentPage, AssignmentRecord, SlotRecord, project_assignment_page, project_slots, record_size
+from .state_backend import state_backend, SESSION_DATA_CHANGED, SESSION_REVOKED
+from utils.metrics import metrics
+from utils import tracing
+
+
+class CacheEntry:
+    __slots__ = ("data", "size", "wire_size", "expires_at", "etag", "last_modified")
+
+    def __init__(
+        self,
+        data: Any,
+        size: int,
+        expires_at: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        wire_size: Optional[int] = None
+    ):
+        self.data = data
+        self.size = size
+        self.wire_size = size if wire_size is None else wire_size
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ResponseCache:
+    """
+    In-process TTL + LRU cache for parsed upstream responses.
+
+    Entries are keyed by (session_key, url) and bounded by both entry count
+    and total response bytes; the least recently used entries are evicted
+    first. Expired entries that carry an ETag or Last-Modified validator are
+    kept so they can be revalidated with a conditional GET. Cached values are
+    shared between callers and must not be mutated.
+
+    With a shared state backend, entries are also written (pickled) to it
+    and in-process misses are looked up there, so a response fetched by one
+    worker serves the others.
+    """
+
+    SHARED_NAMESPACE = "response"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_writes = 0
+        # endpoint -> {"revalidations", "not_modified", "bytes_saved"}
+        self.revalidation_stats: Dict[str, Dict[str, int]] = {}
+
+    def lookup(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        """
+        Return the entry for key, or None on a miss
+
+        The returned entry may be stale (check entry.fresh); stale entries
+        are only returned when they can be revalidated upstream.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if not entry.fresh:
+            if not entry.revalidatable:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.stale += 1
+        else:
+            self.hits += 1
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(
+        self,
+        key: Tuple[str, str],
+        data: Any,
+        size: int,
+        ttl: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        wire_size: Optional[int] = None
+    ) -> Optional[CacheEntry]:
+        """
+        Store a value, evicting least recently used entries to fit
+
+        size is the value's in-memory footprint (used for the byte bound);
+        wire_size is the response body length, when it differs. Returns the
+        new entry, or None when the value is too large to cache.
+        """
+        if size > self.max_bytes:
+            return None
+
+        if key in self._entries:
+            self._remove(key)
+
+        entry = self._entries[key] = CacheEntry(
+            data,
+            size,
+            time.monotonic() + ttl,
+            etag,
+            last_modified,
+            wire_size
+        )
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+        return entry
+
+    @staticmethod
+    def _shared_key(key: Tuple[str, str]) -> str:
+        return f"{key[0]}\n{key[1]}"
+
+    async def load_shared(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        """Copy an entry another worker stored into this process (None on a miss)"""
+        if not state_backend.shared:
+            return None
+
+        raw = await state_backend.get(self.SHARED_NAMESPACE, self._shared_key(key))
+        if raw is None:
+            self.shared_misses += 1
+            return None
+
+        try:
+            data, size, wire_size, expires_at, etag, last_modified = pickle.loads(raw)
+        except Exception:
+            # Written by an older deploy whose classes have changed
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        return self.set(key, data, size, expires_at - time.time(), etag, last_modified, wire_size)
+
+    async def store_shared(self, key: Tuple[str, str], entry: Optional[CacheEntry]):
+        """Make an entry visible to the other workers"""
+        if entry is None or not state_backend.shared:
+            return
+
+        remaining = entry.expires_at - time.monotonic()
+        ttl = remaining + (settings.state_stale_ttl if entry.revalidatable else 0)
+        if ttl <= 0:
+            return
+
+        value = (entry.data, entry.size, entry.wire_size, time.time() + remaining, entry.etag, entry.last_modified)
+        await state_backend.set(
+            self.SHARED_NAMESPACE,
+            self._shared_key(key),
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            ttl
+        )
+        self.shared_writes += 1
+
+    async def invalidate_shared_session(self, session_key: str) -> int:
+        """Drop a session's entries from the shared backend (not from any worker's memory)"""
+        if not state_backend.shared:
+            return 0
+        return await state_backend.delete_prefix(self.SHARED_NAMESPACE, f"{session_key}\n")
+
+    def record_revalidation(self, endpoint: str, not_modified: bool, bytes_saved: int = 0):
+        """Count a conditional GET and whether it avoided a full transfer"""
+        stats = self.revalidation_stats.setdefault(
+            endpoint,
+            {"revalidations": 0, "not_modified": 0, "bytes_saved": 0}
+        )
+        stats["revalidations"] += 1
+        if not_modified:
+            stats["not_modified"] += 1
+            stats["bytes_saved"] += bytes_saved
+
+    def invalidate_session(self, session_key: str) -> int:
+        """Drop every entry belonging to a session (e.g. on logout)"""
+        keys = [key for key in self._entries if key[0] == session_key]
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def session_bytes(self) -> Dict[str, int]:
+        """Cached bytes per session (i.e. per logged-in user)"""
+        usage: Dict[str, int] = {}
+        for (session_key, _), entry in self._entries.items():
+            usage[session_key] = usage.get(session_key, 0) + entry.size
+        return usage
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        usage = self.session_bytes()
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "sessions": len(usage),
+            "avg_bytes_per_session": round(self._bytes / len(usage)) if usage else 0,
+            "max_bytes_per_session": max(usage.values(), default=0),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+            "shared_writes": self.shared_writes,
+            "revalidation": {
+                endpoint: dict(
+                    stats,
+                    saved_ratio=round(stats["not_modified"] / stats["revalidations"], 3)
+                )
+                for endpoint, stats in self.revalidation_stats.items()
+            },
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes
+)
+state_backend.subscribe(SESSION_REVOKED, response_cache.invalidate_session)
+state_backend.subscribe(SESSION_DATA_CHANGED, response_cache.invalidate_session)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight upstream GETs.
+
+    Calls are keyed by (session_key, url). The first caller starts the fetch
+    as a task; concurrent callers with the same key await that task instead
+    of issuing their own request, and all of them get the same parsed
+    result (which, like cached values, must not be mutated). A caller being
+    cancelled only stops its own wait; the shared fetch is cancelled once its
+    last waiter has gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self.started = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+        self.deduplicated_by_endpoint: Dict[str, int] = {}
+
+    async def do(
+        self,
+        endpoint: str,
+        key: Tuple[str, str],
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fetch()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._done(key, flight))
+            self.started += 1
+        else:
+            self.deduplicated += 1
+            self.deduplicated_by_endpoint[endpoint] = self.deduplicated_by_endpoint.get(endpoint, 0) + 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Callers arriving from now on must start a new fetch, not
+                # join one that is being cancelled
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                self.cancelled += 1
+
+    def _done(self, key: Tuple[str, str], flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Errors are re-raised to every waiter; nothing is left unretrieved
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.started + self.deduplicated
+        return {
+            "in_flight": len(self._flights),
+            "upstream_calls": self.started,
+            "deduplicated": self.deduplicated,
+            "dedup_ratio": round(self.deduplicated / calls, 3) if calls else 0.0,
+            "cancelled": self.cancelled,
+            "deduplicated_by_endpoint": dict(self.deduplicated_by_endpoint),
+        }
+
+
+single_flight = SingleFlight()
+
+CLIENT_CALL_DURATION = metrics.histogram(
+    "newton_client_duration_seconds",
+    "NewtonClient method latency, including cache hits and retries",
+    ("method",)
+)
+CLIENT_CALL_ERRORS = metrics.counter(
+    "newton_client_errors",
+    "NewtonClient method calls that raised, by exception type",
+    ("method", "error")
+)
+
+
+def _observed(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Record a NewtonClient method's latency and errors in CLIENT_CALL_*"""
+    name = method.__name__
+    duration = CLIENT_CALL_DURATION.labels(name)
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception as e:
+            CLIENT_CALL_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - started)
+
+    return wrapper
 
 
 class NewtonClient:
     BASE_URL = "https://my.newtonschool.co"
 
-    def __init__(self, cookies: Dict[str, str]):
+    # Seconds a cached response stays fresh, per endpoint
+    CACHE_TTLS = {
+        "user_info": settings.cache_ttl_user_info,
+        "courses": settings.cache_ttl_courses,
+        "course_details": settings.cache_ttl_course_details,
+        "performance": settings.cache_ttl_performance,
+        "schedule": settings.cache_ttl_schedule,
+        "assignments": settings.cache_ttl_assignments,
+    }
+
+    def __init__(self, cookies: Dict[str, str], session_key: Optional[str] = None):
+        # Responses are only cached when the caller identifies the session
+        self.session_key = session_key
+
+        # Cookies live on this client only; connections come from the shared pool
+        self._pooled = http_pool.started
         self.client = httpx.AsyncClient(
             cookies=cookies,
-            timeout=30.0,
-            follow_redirects=True
+            timeout=settings.newton_timeout,
+            follow_redirects=True,
+            transport=http_pool.transport if self._pooled else None
         )
 
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Release the HTTP client (pooled connections stay open)"""
+        if not self._pooled:
+            await self.client.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the upstream rate limiter
+
+        GETs that fail with 429, 5xx or a transport error are retried with
+        jittered exponential backoff (honouring Retry-After) while the global
+        retry budget allows. Other methods are rate limited but never retried.
+        The last response is returned as is; callers check its status.
+        """
+        parsed = httpx.URL(url)
+        host = parsed.host
+        trace = tracing.current_trace()
+        attempt = 0
+
+        while True:
+            with tracing.phase("upstream_wait"):
+                await upstream_limiter.acquire(host, self.session_key, first_attempt=attempt == 0)
+
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if trace is not None:
+                    trace.record("upstream", started, time.perf_counter() - started, f"{method} {parsed.path} {type(e).__name__}")
+                delay = upstream_limiter.retry_delay(attempt) if method == "GET" else None
+                if delay is None:
+                    raise
+            else:
+                if trace is not None:
+                    trace.record("upstream", started, time.perf_counter() - started, f"{method} {parsed.path} {response.status_code}")
+                upstream_limiter.observe(host, response)
+                delay = upstream_limiter.retry_delay(attempt, response) if method == "GET" else None
+                if delay is None:
+                    return response
+
+            attempt += 1
+            with tracing.phase("upstream_wait"):
+                await asyncio.sleep(delay)
+
+    async def _get_json(
+        self,
+        endpoint: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        revalidate: bool = False,
+        project: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        GET a JSON document through the response cache
+
+        project, when given, turns the parsed JSON into the compact form that
+        is cached and returned (see services.records).
+
+        Fresh entries are returned directly unless revalidate is set. Stale
+        entries with an ETag or Last-Modified validator are revalidated with a
+        conditional GET and reused on 304 Not Modified, skipping the body
+        download and parse. Upstream calls are shared with identical
+        in-flight calls for the same session.
+        """
+        if not self.session_key:
+            response = await self._request("GET", url, params=params)
+            response.raise_for_status()
+            return project(response.json()) if project else response.json()
+
+        key = (self.session_key, str(httpx.URL(url, params=params)))
+        ttl = self.CACHE_TTLS.get(endpoint, 0)
+        cached = settings.cache_enabled and ttl > 0
+
+        entry = None
+        if cached:
+            entry = response_cache.lookup(key) or await response_cache.load_shared(key)
+            if entry is not None and entry.fresh and not revalidate:
+                return entry.data
+
+        if not settings.single_flight_enabled:
+            return await self._fetch_json(endpoint, key, url, params, ttl if cached else 0, entry, project)
+
+        return await single_flight.do(
+            endpoint,
+            key,
+            lambda: self._fetch_json(endpoint, key, url, params, ttl if cached else 0, entry, project)
+        )
+
+    async def _fetch_json(
+        self,
+        endpoint: str,
+        key: Tuple[str, str],
+        url: str,
+        params: Optional[Dict[str, Any]],
+        ttl: float,
+        entry: Optional[CacheEntry],
+        project: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """Upstream GET, conditional when entry has validators; cached when ttl > 0"""
+        if ttl <= 0:
+            response = await self._request("GET", url, params=params)
+            response.raise_for_status()
+            return project(response.json()) if project else response.json()
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
 
+        response = await self._request("GET", url, params=params, headers=headers)
+
+        if entry is not None:
+            not_modified = response.status_code == 304
+            response_cache.record_revalidation(endpoint, not_modified, entry.wire_size if not_modified else 0)
+            if not_modified:
+                refreshed = response_cache.set(
+                    key,
+                    entry.data,
+                    entry.size,
+                    ttl,
+                    etag=response.headers.get("ETag", entry.etag),
+                    last_modified=response.headers.get("Last-Modified", entry.last_modified),
+                    wire_size=entry.wire_size
+                )
+                await response_cache.store_shared(key, refreshed)
+                return entry.data
+
+        response.raise_for_status()
+        data = response.json()
+        wire_size = len(response.content)
+        size = wire_size
+        if project:
+            data = project(data)
+            size = record_size(data)
+
+        stored = response_cache.set(
+            key,
+            data,
+            size,
+            ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            wire_size=wire_size
+        )
+        await response_cache.store_shared(key, stored)
+        return data
+
+    @_observed
     async def get_user_info(self) -> Dict[str, Any]:
         """GET /api/v1/user/me/"""
-        response = await self.client.get(f"{self.BASE_URL}/api/v1/user/me/")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json("user_info", f"{self.BASE_URL}/api/v1/user/me/")
 
+    @_observed
     async def get_courses(self) -> List[Dict[str, Any]]:
         """GET /api/v2/course/all/applied/"""
-        response = await self.client.get(
+        return await self._get_json(
+            "courses",
             f"{self.BASE_URL}/api/v2/course/all/applied/",
             params={"pagination": "false", "completed": "false"}
         )
-        response.raise_for_status()
-        return response.json()
 
+    @_observed
     async def get_course_details(self, course_hash: str) -> Dict[str, Any]:
         """GET /api/v2/course/h/{course_hash}/"""
-        response = await self.client.get(
+        return await self._get_json(
+            "course_details",
             f"{self.BASE_URL}/api/v2/course/h/{course_hash}/"
         )
-        response.raise_for_status()
-        return response.json()
 
+    @_observed
     async def get_assignments(
         self,
         course_hash: str,
         limit: int = 100,
         offset: int = 0
-    ) -> Dict[str, Any]:
+    ) -> AssignmentPage:
         """GET /api/v2/course/h/{course_hash}/assignment/all/"""
-        response = await self.client.get(
+        return await self._get_json(
+            "assignments",
             f"{self.BASE_URL}/api/v2/course/h/{course_hash}/assignment/all/",
-            params={"limit": limit, "offset": offset}
+            params={"limit": limit, "offset": offset},
+            project=project_assignment_page
         )
-        response.raise_for_status()
-        return response.json()
 
+    async def iter_assignments(
+        self,
+        course_hash: str,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[AssignmentRecord]:
+        """
+        Yield every assignment of a course, following offset pagination
+
+        Pages are only requested as the caller consumes items, so stopping
+        iteration early skips the remaining upstream calls.
+        """
+        page_size = page_size or settings.assignments_page_size
+        offset = 0
+
+        while True:
+            page = await self.get_assignments(course_hash, limit=page_size, offset=offset)
+
+            for item in page.items:
+                yield item
+
+            # Unpaginated list, short page or explicit last page
+            if not page.has_next or len(page.items) < page_size:
+                return
+
+            offset += page_size
+
+    @_observed
     async def get_assignment_details(
         self,
         course_hash: str,
         assignment_hash: str
     ) -> Dict[str, Any]:
         """GET /api/v2/course/h/{course_hash}/assignment/h/{assignment_hash}/"""
-        response = await self.client.get(
+        response = await self._request(
+            "GET",
             f"{self.BASE_URL}/api/v2/course/h/{course_hash}/assignment/h/{assignment_hash}/"
         )
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def get_assessment_questions(
         self,
         course_hash: str,
         assessment_hash: str
     ) -> Dict[str, Any]:
         """GET /api/v1/course/h/{course_hash}/assessment/h/{assessment_hash}/"""
-        response = await self.client.get(
+        response = await self._request(
+            "GET",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/assessment/h/{assessment_hash}/"
         )
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def get_schedule(
         self,
         course_hash: str,
         start_ts: int,
-        end_ts: int
-    ) -> List[Dict[str, Any]]:
+        end_ts: int,
+        revalidate: bool = False
+    ) -> Tuple[SlotRecord, ...]:
         """GET /api/v2/course/h/{course_hash}/lecture_slot/all/"""
-        response = await self.client.get(
+        slots = await self._get_json(
+            "schedule",
             f"{self.BASE_URL}/api/v2/course/h/{course_hash}/lecture_slot/all/",
             params={
                 "pagination": "false",
                 "start_timestamp": start_ts,
                 "end_timestamp": end_ts
-            }
+            },
+            revalidate=revalidate,
+            project=project_slots
         )
-        response.raise_for_status()
-        return response.json()
 
-    async def get_today_schedule(self, course_hash: str) -> List[Dict[str, Any]]:
+        if self.session_key:
+            slot_index.add_slots(self.session_key, course_hash, slots)
+
+        return slots
+
+    async def get_today_schedule(self, course_hash: str) -> Tuple[SlotRecord, ...]:
         """Get today's schedule"""
         now = datetime.now()
         start = datetime(now.year, now.month, now.day, 0, 0, 0)
@@ -111,7 +680,7 @@ class NewtonClient:
         self,
         course_hash: str,
         start_date: Optional[datetime] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> Tuple[SlotRecord, ...]:
         """Get week's schedule"""
         if not start_date:
             start_date = datetime.now()
@@ -124,6 +693,7 @@ class NewtonClient:
 
         return await self.get_schedule(course_hash, start_ts, end_ts)
 
+    @_observed
     async def submit_mcq(
         self,
         course_hash: str,
@@ -132,25 +702,29 @@ class NewtonClient:
         answer: str
     ) -> Dict[str, Any]:
         """POST /api/v1/course/h/{course}/assessment/h/{assessment}/question/h/{question}/attempt/"""
-        response = await self.client.post(
+        response = await self._request(
+            "POST",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/assessment/h/{assessment_hash}/question/h/{question_hash}/attempt/",
             json={"hash": question_hash, "value": answer}
         )
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def get_coding_playground(
         self,
         course_hash: str,
         playground_hash: str
     ) -> Dict[str, Any]:
         """GET /api/v1/course/h/{course_hash}/playground/coding/h/{playground_hash}/"""
-        response = await self.client.get(
+        response = await self._request(
+            "GET",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/playground/coding/h/{playground_hash}/"
         )
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def submit_coding(
         self,
         course_hash: str,
@@ -159,7 +733,8 @@ class NewtonClient:
         language_id: int = 71  # Python 3
     ) -> Dict[str, Any]:
         """PATCH /api/v1/course/h/{course_hash}/playground/coding/h/{playground_hash}/"""
-        response = await self.client.patch(
+        response = await self._request(
+            "PATCH",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/playground/coding/h/{playground_hash}/",
             params={"run_hidden_test_cases": "true"},
             json={
@@ -173,18 +748,21 @@ class NewtonClient:
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def get_frontend_playground(
         self,
         course_hash: str,
         playground_hash: str
     ) -> Dict[str, Any]:
         """GET /api/v1/course/h/{course_hash}/playground/front_end/h/{playground_hash}/"""
-        response = await self.client.get(
+        response = await self._request(
+            "GET",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/playground/front_end/h/{playground_hash}/"
         )
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def submit_frontend(
         self,
         course_hash: str,
@@ -194,7 +772,8 @@ class NewtonClient:
         js: str = ""
     ) -> Dict[str, Any]:
         """PATCH /api/v1/course/h/{course_hash}/playground/front_end/h/{playground_hash}/"""
-        response = await self.client.patch(
+        response = await self._request(
+            "PATCH",
             f"{self.BASE_URL}/api/v1/course/h/{course_hash}/playground/front_end/h/{playground_hash}/",
             params={"create_and_run_build": "true"},
             json={
@@ -208,10 +787,10 @@ class NewtonClient:
         response.raise_for_status()
         return response.json()
 
+    @_observed
     async def get_performance_overview(self, course_hash: str) -> Dict[str, Any]:
         """GET /api/v2/course/h/{course_hash}/user/performance/"""
-        response = await self.client.get(
+        return await self._get_json(
+            "performance",
             f"{self.BASE_URL}/api/v2/course/h/{course_hash}/user/performance/"
         )
-        response.raise_for_status()
-        return response.json()
@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from config import settings
+from utils.fanout import fan_out_courses
+from .state_backend import state_backend, USER_PERFORMANCE_CHANGED
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceSnapshot:
+    __slots__ = ("courses", "errors", "computed_at", "stale")
+
+    def __init__(self, courses: List[Dict[str, Any]], errors: List[Dict[str, str]]):
+        self.courses = courses
+        self.errors = errors
+        self.computed_at = time.time()
+        self.stale = False  # upstream data changed since it was computed
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.computed_at
+
+
+class PerformanceSnapshotStore:
+    """
+    Per-user stale-while-revalidate store of per-course performance
+
+    The first request for a user computes the snapshot inline. Later
+    requests get the stored snapshot immediately; once it is older than
+    PERFORMANCE_SNAPSHOT_MAX_AGE a single background refresh is started with
+    the caller's credentials. Both /performance routes read the same snapshot.
+    """
+
+    def __init__(self, max_age: float, max_entries: int):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._snapshots: "OrderedDict[str, PerformanceSnapshot]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def get(
+        self,
+        user_email: str,
+        cookies: Dict[str, str],
+        session_key: str,
+        courses: Optional[List[Dict[str, Any]]] = None
+    ) -> PerformanceSnapshot:
+        """
+        Return the user's snapshot, computing it first if there is none
+
+        Args:
+            courses: Course list if the caller already has it (fetched otherwise)
+        """
+        snapshot = self._snapshots.get(user_email)
+
+        if snapshot is None:
+            self.misses += 1
+            return await asyncio.shield(self._start_refresh(user_email, cookies, session_key, courses))
+
+        self._snapshots.move_to_end(user_email)
+        if snapshot.stale or snapshot.age > self.max_age:
+            self.stale_hits += 1
+            self._start_refresh(user_email, cookies, session_key, courses)
+        else:
+            self.hits += 1
+        return snapshot
+
+    def mark_stale(self, user_email: str):
+        """Force the next read to trigger a background refresh (the age stays real)"""
+        snapshot = self._snapshots.get(user_email)
+        if snapshot:
+            snapshot.stale = True
+
+    def invalidate(self, user_email: str):
+        self._snapshots.pop(user_email, None)
+
+    async def close(self):
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start_refresh(
+        self,
+        user_email: str,
+        cookies: Dict[str, str],
+        session_key: str,
+        courses: Optional[List[Dict[str, Any]]] = None
+    ) -> asyncio.Task:
+        """Start (or join) the refresh task for a user"""
+        task = self._refreshing.get(user_email)
+        if task is None:
+            task = asyncio.create_task(self._refresh(user_email, cookies, session_key, courses))
+            self._refreshing[user_email] = task
+            task.add_done_callback(lambda done: self._refresh_done(user_email, done))
+        return task
+
+    def _refresh_done(self, user_email: str, task: asyncio.Task):
+        self._refreshing.pop(user_email, None)
+        # Background refresh errors are already logged; keep serving the old snapshot
+        if not task.cancelled():
+            task.exception()
+
+    async def _refresh(
+        self,
+        user_email: str,
+        cookies: Dict[str, str],
+        session_key: str,
+        courses: Optional[List[Dict[str, Any]]] = None
+    ) -> PerformanceSnapshot:
+        from .newton_client import NewtonClient
+
+        newton_client = NewtonClient(cookies, session_key=session_key)
+        try:
+            if courses is None:
+                courses = await newton_client.get_courses()
+            names = {course.get("hash"): course.get("name", "Unknown") for course in courses}
+
+            results, errors = await fan_out_courses(courses, newton_client.get_performance_overview)
+            snapshot = PerformanceSnapshot(
+                courses=[
+                    {
+                        "course_hash": course["hash"],
+                        "course_name": names[course["hash"]],
+                        "attendance": performance.get("attendance", 0),
+                        "assignments": performance.get("assignments_completed", 0),
+                        "quizzes": performance.get("quizzes_completed"),
+                        "total_xp": performance.get("total_xp", 0),
+                    }
+                    for course, performance in results
+                ],
+                errors=errors
+            )
+
+        except Exception as e:
+            logger.error(f"Error refreshing performance snapshot for {user_email}: {str(e)}")
+            raise
+
+        finally:
+            await newton_client.close()
+
+        self.refreshes += 1
+        self._snapshots[user_email] = snapshot
+        self._snapshots.move_to_end(user_email)
+        while len(self._snapshots) > self.max_entries:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._snapshots),
+            "max_entries": self.max_entries,
+            "max_age": self.max_age,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refreshing": len(self._refreshing),
+        }
+
+
+performance_snapshots = PerformanceSnapshotStore(
+    max_age=settings.performance_snapshot_max_age,
+    max_entries=settings.performance_snapshot_max_entries
+)
+state_backend.subscribe(USER_PERFORMANCE_CHANGED, performance_snapshots.mark_stale)
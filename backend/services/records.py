@@ -0,0 +1,181 @@
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Share one copy of low-cardinality strings (rooms, subjects, types) across users"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _unpickle(cls, values: tuple):
+    """Rebuild a record loaded from the shared cache, re-sharing its interned fields"""
+    record = cls(*values)
+    for name in cls._interned:
+        setattr(record, name, _intern(getattr(record, name)))
+    return record
+
+
+class SlotRecord:
+    """The lecture slot fields the API reads, projected from the upstream payload"""
+
+    __slots__ = (
+        "hash",
+        "subject",
+        "room",
+        "join_url",
+        "instructor",
+        "start_timestamp",
+        "end_timestamp",
+    )
+    _interned = ("subject", "room", "instructor")
+
+    def __init__(
+        self,
+        hash: Optional[str],
+        subject: str,
+        room: Optional[str],
+        join_url: Optional[str],
+        instructor: Optional[str],
+        start_timestamp: int,
+        end_timestamp: int
+    ):
+        self.hash = hash
+        self.subject = subject
+        self.room = room
+        self.join_url = join_url
+        self.instructor = instructor
+        self.start_timestamp = start_timestamp
+        self.end_timestamp = end_timestamp
+
+    @classmethod
+    def from_upstream(cls, slot: Dict[str, Any]) -> "SlotRecord":
+        return cls(
+            hash=slot.get("hash"),
+            subject=_intern((slot.get("lecture") or {}).get("name", "Unknown")),
+            room=_intern((slot.get("room") or {}).get("name")),
+            join_url=slot.get("join_url"),
+            instructor=_intern((slot.get("instructor") or {}).get("name")),
+            start_timestamp=slot.get("start_timestamp", 0),
+            end_timestamp=slot.get("end_timestamp", 0)
+        )
+
+    def __reduce__(self):
+        return (_unpickle, (type(self), tuple(getattr(self, name) for name in self.__slots__)))
+
+
+class AssignmentRecord:
+    """The assignment fields the API reads, projected from the upstream payload"""
+
+    __slots__ = (
+        "hash",
+        "title",
+        "type",
+        "due_date",
+        "questions_count",
+        "questions_solved",
+        "xp",
+        "difficulty",
+        "is_completed",
+    )
+    _interned = ("type", "difficulty")
+
+    def __init__(
+        self,
+        hash: str,
+        title: str,
+        type: str,
+        due_date: Optional[str],
+        questions_count: int,
+        questions_solved: int,
+        xp: int,
+        difficulty: Optional[str],
+        is_completed: bool
+    ):
+        self.hash = hash
+        self.title = title
+        self.type = type
+        self.due_date = due_date
+        self.questions_count = questions_count
+        self.questions_solved = questions_solved
+        self.xp = xp
+        self.difficulty = difficulty
+        self.is_completed = is_completed
+
+    @classmethod
+    def from_upstream(cls, assignment: Dict[str, Any]) -> "AssignmentRecord":
+        return cls(
+            hash=assignment.get("hash", ""),
+            title=assignment.get("title", ""),
+            type=_intern(assignment.get("type", "mixed")),
+            due_date=assignment.get("due_date"),
+            questions_count=assignment.get("questions_count", 0),
+            questions_solved=assignment.get("questions_solved", 0),
+            xp=assignment.get("xp", 0),
+            difficulty=_intern(assignment.get("difficulty")),
+            is_completed=bool(assignment.get("is_completed"))
+        )
+
+    def __reduce__(self):
+        return (_unpickle, (type(self), tuple(getattr(self, name) for name in self.__slots__)))
+
+
+class AssignmentPage:
+    """One page of a course's assignments and whether another page may follow"""
+
+    __slots__ = ("items", "has_next")
+
+    def __init__(self, items: Tuple[AssignmentRecord, ...], has_next: bool):
+        self.items = items
+        self.has_next = has_next
+
+
+def project_slots(payload: Any) -> Tuple[SlotRecord, ...]:
+    """Upstream lecture_slot/all/ response -> SlotRecords"""
+    return tuple(SlotRecord.from_upstream(slot) for slot in payload or ())
+
+
+def project_assignment_page(payload: Any) -> AssignmentPage:
+    """
+    Upstream assignment/all/ response -> AssignmentPage
+
+    An unpaginated list is a single, final page; a paginated page is final
+    when it says so with an empty "next".
+    """
+    if isinstance(payload, dict):
+        items = payload.get("results", [])
+        has_next = bool(payload["next"]) if "next" in payload else True
+    else:
+        items = payload or []
+        has_next = False
+
+    return AssignmentPage(
+        items=tuple(AssignmentRecord.from_upstream(item) for item in items),
+        has_next=has_next
+    )
+
+
+def record_size(value: Any) -> int:
+    """
+    Approximate bytes held by projected records (container, records and
+    their unshared field values), used for cache size accounting
+    """
+    if isinstance(value, AssignmentPage):
+        return sys.getsizeof(value) + record_size(value.items)
+
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(record_size(item) for item in value)
+
+    if isinstance(value, (SlotRecord, AssignmentRecord)):
+        size = sys.getsizeof(value)
+        for name in value.__slots__:
+            if name in value._interned:
+                continue
+            field = getattr(value, name)
+            # Small ints, bools and None are shared
+            if isinstance(field, str):
+                size += sys.getsizeof(field)
+            elif isinstance(field, int) and not isinstance(field, bool) and not -5 <= field <= 256:
+                size += sys.getsizeof(field)
+        return size
+
+    return sys.getsizeof(value)
@@ -0,0 +1,269 @@
+"""
+Per-user schedule feeds behind /api/schedule/stream
+
+All open streams of a user (one per browser tab) share one ScheduleFeed. The
+feed refreshes today's slots on a server-side schedule (conditional GETs
+through ScheduleStore), compares them with the previous refresh and queues
+only what changed for each subscriber:
+
+    snapshot  today's full schedule; the first event of every stream
+    added     a slot that was not there before
+    updated   a slot whose join URL, time, room, ... changed
+    removed   a slot that disappeared (data: its hash)
+    starting  a slot starting within SCHEDULE_STREAM_STARTING_LEAD seconds
+    errors    the per-course sync errors changed
+    revoked   the subscriber's session ended; the stream closes
+
+Refreshes run every SCHEDULE_STREAM_REFRESH_INTERVAL seconds, every
+SCHEDULE_STREAM_FAST_INTERVAL seconds while a starting class has no join URL
+yet, and when a class reaches its starting lead or the day rolls over. A
+feed stops when its last subscriber leaves.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from database import AsyncSessionLocal, LectureSlot
+from .newton_client import NewtonClient
+from .schedule_store import ScheduleStore, today_range
+from .state_backend import state_backend, SESSION_REVOKED
+
+logger = logging.getLogger(__name__)
+
+# Slot fields whose change is sent as an "updated" event
+_FIELDS = ("subject", "room", "join_url", "instructor", "start_timestamp", "end_timestamp")
+
+Event = Tuple[str, Any]
+
+
+class Subscriber:
+    """One open stream: its event queue and the session it authenticated with"""
+
+    __slots__ = ("queue", "session_id", "cookies", "expires_at")
+
+    def __init__(self, session_id: str, cookies: Dict[str, str], expires_at: datetime):
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue()
+        self.session_id = session_id
+        self.cookies = cookies
+        self.expires_at = expires_at
+
+
+class ScheduleFeed:
+    """Today's slots of one user, shared by all of the user's streams"""
+
+    def __init__(self, user_email: str):
+        self.user_email = user_email
+        self.subscribers: List[Subscriber] = []
+        self.slots: Optional[Dict[str, LectureSlot]] = None  # None until the first refresh
+        self.errors: List[Dict[str, str]] = []
+        self.day: Optional[int] = None
+        self.announced: Set[str] = set()  # slot hashes already sent as "starting"
+        self.task: Optional[asyncio.Task] = None
+
+    def initial_events(self) -> List[Event]:
+        """What a new subscriber gets once the feed has data"""
+        now = time.time()
+        events = [("snapshot", (list(self.slots.values()), self.errors))]
+        events.extend(
+            ("starting", slot)
+            for slot_hash, slot in self.slots.items()
+            if slot_hash in self.announced and now < slot.end_timestamp
+        )
+        return events
+
+    def apply(
+        self,
+        day: int,
+        slots: List[LectureSlot],
+        errors: List[Dict[str, str]],
+        starting_lead: float
+    ) -> List[Event]:
+        """Replace the slots with a refresh; returns the events to send"""
+        current = {slot.slot_hash: slot for slot in slots}
+
+        if self.slots is None or day != self.day:
+            # First refresh or a new day: start over with a full snapshot
+            self.day = day
+            self.announced = set()
+            events = [("snapshot", (slots, errors))]
+        else:
+            events = []
+            for slot_hash, slot in current.items():
+                previous = self.slots.get(slot_hash)
+                if previous is None:
+                    events.append(("added", slot))
+                elif any(getattr(previous, field) != getattr(slot, field) for field in _FIELDS):
+                    events.append(("updated", slot))
+            events.extend(("removed", slot_hash) for slot_hash in self.slots if slot_hash not in current)
+            if errors != self.errors:
+                events.append(("errors", errors))
+
+        self.slots = current
+        self.errors = errors
+
+        now = time.time()
+        for slot_hash, slot in current.items():
+            if slot_hash not in self.announced and slot.start_timestamp - starting_lead <= now < slot.end_timestamp:
+                self.announced.add(slot_hash)
+                events.append(("starting", slot))
+
+        return events
+
+
+class ScheduleFeeds:
+    """
+    The running feed of every user with an open schedule stream
+
+    Args:
+        refresh_interval: Seconds between upstream refreshes
+        fast_interval: Refresh interval while a starting class has no join URL
+        starting_lead: Seconds before its start a class is sent as "starting"
+    """
+
+    def __init__(self, refresh_interval: float, fast_interval: float, starting_lead: float):
+        self.refresh_interval = refresh_interval
+        self.fast_interval = fast_interval
+        self.starting_lead = starting_lead
+        self._feeds: Dict[str, ScheduleFeed] = {}
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.events = 0
+
+    def subscribe(
+        self,
+        user_email: str,
+        session_id: str,
+        cookies: Dict[str, str],
+        expires_at: datetime
+    ) -> Subscriber:
+        """Join (or start) the user's feed"""
+        feed = self._feeds.get(user_email)
+        if feed is None:
+            feed = self._feeds[user_email] = ScheduleFeed(user_email)
+
+        subscriber = Subscriber(session_id, cookies, expires_at)
+        feed.subscribers.append(subscriber)
+        if feed.slots is not None:
+            for event in feed.initial_events():
+                subscriber.queue.put_nowait(event)
+
+        if feed.task is None:
+            feed.task = asyncio.create_task(self._run(feed))
+        return subscriber
+
+    def unsubscribe(self, user_email: str, subscriber: Subscriber):
+        feed = self._feeds.get(user_email)
+        if feed is not None and subscriber in feed.subscribers:
+            self._remove(feed, subscriber)
+
+    def revoke_session(self, session_id: str):
+        """End every stream opened with a session (logout on any worker)"""
+        for feed in list(self._feeds.values()):
+            for subscriber in list(feed.subscribers):
+                if subscriber.session_id == session_id:
+                    subscriber.queue.put_nowait(("revoked", None))
+                    self._remove(feed, subscriber)
+
+    async def close(self):
+        tasks = [feed.task for feed in self._feeds.values() if feed.task]
+        self._feeds.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _remove(self, feed: ScheduleFeed, subscriber: Subscriber):
+        feed.subscribers.remove(subscriber)
+        if feed.subscribers:
+            return
+
+        if self._feeds.get(feed.user_email) is feed:
+            del self._feeds[feed.user_email]
+        # The feed's own loop exits by itself once it has no subscribers
+        if feed.task is not None and feed.task is not asyncio.current_task():
+            feed.task.cancel()
+
+    def _broadcast(self, feed: ScheduleFeed, events: List[Event]):
+        for subscriber in feed.subscribers:
+            for event in events:
+                subscriber.queue.put_nowait(event)
+        self.events += len(events) * len(feed.subscribers)
+
+    async def _run(self, feed: ScheduleFeed):
+        while feed.subscribers:
+            try:
+                await self._refresh(feed)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.error(f"Error refreshing schedule feed for {feed.user_email}: {str(e)}")
+
+            if feed.subscribers:
+                await asyncio.sleep(self._next_refresh(feed))
+
+    async def _refresh(self, feed: ScheduleFeed):
+        now = datetime.utcnow()
+        for subscriber in list(feed.subscribers):
+            if subscriber.expires_at < now:
+                subscriber.queue.put_nowait(("revoked", None))
+                self._remove(feed, subscriber)
+        if not feed.subscribers:
+            return
+
+        # Any subscriber's session sees the same schedule; use the newest
+        subscriber = feed.subscribers[-1]
+        newton_client = NewtonClient(subscriber.cookies, session_key=subscriber.session_id)
+        start_ts, end_ts = today_range()
+
+        try:
+            async with AsyncSessionLocal() as db:
+                store = ScheduleStore(db)
+                errors = await store.sync(
+                    newton_client,
+                    feed.user_email,
+                    start_ts,
+                    end_ts,
+                    max_age=0,
+                    revalidate=True
+                )
+                slots = await store.slots(feed.user_email, start_ts, end_ts)
+
+        finally:
+            await newton_client.close()
+
+        self.refreshes += 1
+        self._broadcast(feed, feed.apply(start_ts, slots, errors, self.starting_lead))
+
+    def _next_refresh(self, feed: ScheduleFeed) -> float:
+        """Seconds until the feed should refresh again"""
+        if feed.slots is None:
+            return self.fast_interval
+
+        now = time.time()
+        delay = min(self.refresh_interval, today_range()[1] - now)
+        for slot_hash, slot in feed.slots.items():
+            if slot_hash in feed.announced:
+                # Join URLs are published shortly before the class
+                if not slot.join_url and now < slot.end_timestamp:
+                    delay = min(delay, self.fast_interval)
+            elif slot.start_timestamp - self.starting_lead > now:
+                delay = min(delay, slot.start_timestamp - self.starting_lead - now)
+        return max(delay, 1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "feeds": len(self._feeds),
+            "subscribers": sum(len(feed.subscribers) for feed in self._feeds.values()),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "events": self.events,
+        }
+
+
+schedule_feeds = ScheduleFeeds(
+    refresh_interval=settings.schedule_stream_refresh_interval,
+    fast_interval=settings.schedule_stream_fast_interval,
+    starting_lead=settings.schedule_stream_starting_lead
+)
+state_backend.subscribe(SESSION_REVOKED, schedule_feeds.revoke_session)
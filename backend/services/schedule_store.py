@@ -0,0 +1,276 @@
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import LectureSlot, ScheduleSyncWindow
+from config import settings
+from .records import SlotRecord
+from utils.fanout import fan_out_courses
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from weakref import WeakValueDictionary
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One sync at a time per user, so concurrent page loads don't race on rows
+_sync_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+
+def day_windows(start_ts: int, end_ts: int) -> List[int]:
+    """Local-midnight timestamps of every day overlapping [start_ts, end_ts)"""
+    day = datetime.fromtimestamp(start_ts)
+    day = datetime(day.year, day.month, day.day)
+
+    windows = []
+    while int(day.timestamp()) < end_ts:
+        windows.append(int(day.timestamp()))
+        day += timedelta(days=1)
+    return windows
+
+
+def today_range() -> Tuple[int, int]:
+    """(start_ts, end_ts) of the current local day"""
+    now = datetime.now()
+    start = datetime(now.year, now.month, now.day, 0, 0, 0)
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+def _window_end(window_start: int) -> int:
+    return int((datetime.fromtimestamp(window_start) + timedelta(days=1)).timestamp())
+
+
+def _contiguous_runs(windows: List[int]) -> List[Tuple[int, int]]:
+    """Merge sorted day windows into [(start_ts, end_ts), ...] ranges"""
+    runs = []
+    for window in windows:
+        if runs and runs[-1][1] == window:
+            runs[-1] = (runs[-1][0], _window_end(window))
+        else:
+            runs.append((window, _window_end(window)))
+    return runs
+
+
+class ScheduleStore:
+    """
+    Local, time-indexed copy of a user's lecture slots
+
+    Slots are synced from the portal one local day at a time. A day is only
+    refetched when it has never been synced or its last sync is older than
+    SCHEDULE_SYNC_MAX_AGE, so repeated schedule views are answered by a range
+    query on (user_email, start_timestamp) instead of upstream calls. Courses
+    that failed during a day's sync are recorded on the day and refetched on
+    their own by the next sync, rather than the whole day staying unsynced.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def sync(
+        self,
+        newton_client,
+        user_email: str,
+        start_ts: int,
+        end_ts: int,
+        courses: Optional[List[Dict[str, Any]]] = None,
+        max_age: Optional[int] = None,
+        revalidate: bool = False
+    ) -> List[Dict[str, str]]:
+        """
+        Fetch any missing or stale days in [start_ts, end_ts) for every course
+
+        Args:
+            courses: Course list if the caller already has it (fetched otherwise)
+            max_age: Seconds before a synced day is refetched (default
+                SCHEDULE_SYNC_MAX_AGE)
+            revalidate: Check cached upstream responses with a conditional GET
+
+        Returns:
+            Per-course errors ({"course_hash", "error"}); the failed courses
+            are retried by the next sync of the same days
+        """
+        lock = _sync_locks.get(user_email)
+        if lock is None:
+            lock = _sync_locks[user_email] = asyncio.Lock()
+
+        async with lock:
+            return await self._sync(newton_client, user_email, start_ts, end_ts, courses, max_age, revalidate)
+
+    async def _sync(
+        self,
+        newton_client,
+        user_email: str,
+        start_ts: int,
+        end_ts: int,
+        courses: Optional[List[Dict[str, Any]]],
+        max_age: Optional[int],
+        revalidate: bool
+    ) -> List[Dict[str, str]]:
+        windows = day_windows(start_ts, end_ts)
+        if max_age is None:
+            max_age = settings.schedule_sync_max_age
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+
+        fresh = {
+            row.window_start: row
+            for row in await self.db.scalars(
+                select(ScheduleSyncWindow).where(
+                    ScheduleSyncWindow.user_email == user_email,
+                    ScheduleSyncWindow.window_start.in_(windows),
+                    ScheduleSyncWindow.synced_at >= cutoff
+                )
+            )
+        }
+        missing = [window for window in windows if window not in fresh]
+
+        # Fresh days still owe the courses that failed when they were synced
+        retry: Dict[str, List[int]] = {}
+        for window, row in sorted(fresh.items()):
+            for course_hash in row.failed_courses or []:
+                retry.setdefault(course_hash, []).append(window)
+
+        if not missing and not retry:
+            return []
+
+        if missing:
+            if courses is None:
+                courses = await newton_client.get_courses()
+        else:
+            courses = [{"hash": course_hash} for course_hash in retry]
+
+        course_runs = {
+            course["hash"]: _contiguous_runs(sorted(set(missing).union(retry.get(course["hash"], []))))
+            for course in courses if course.get("hash")
+        }
+
+        async def fetch_course(course_hash: str) -> List[SlotRecord]:
+            slots = []
+            for run_start, run_end in course_runs[course_hash]:
+                slots.extend(await newton_client.get_schedule(course_hash, run_start, run_end, revalidate=revalidate))
+            return slots
+
+        results, errors = await fan_out_courses(courses, fetch_course)
+
+        try:
+            for course, slots in results:
+                await self._replace_course_slots(user_email, course["hash"], course_runs[course["hash"]], slots)
+
+            if missing:
+                # The full course list is known: drop slots of courses the user left
+                await self._prune_dropped_courses(user_email, _contiguous_runs(missing), list(course_runs))
+
+            failed = {error["course_hash"] for error in errors}
+            await self._mark_synced(user_email, missing, failed)
+            for window, row in fresh.items():
+                if row.failed_courses:
+                    row.failed_courses = [
+                        course_hash for course_hash in row.failed_courses if course_hash in failed
+                    ]
+
+            await self.db.commit()
+
+        except SQLAlchemyError as e:
+            # Another worker synced the same rows; serve what is stored
+            await self.db.rollback()
+            logger.error(f"Error storing schedule for {user_email}: {str(e)}")
+
+        return errors
+
+    async def slots(self, user_email: str, start_ts: int, end_ts: int) -> List[LectureSlot]:
+        """Stored slots starting in [start_ts, end_ts), ordered by start time"""
+        result = await self.db.scalars(
+            select(LectureSlot).where(
+                LectureSlot.user_email == user_email,
+                LectureSlot.start_timestamp >= start_ts,
+                LectureSlot.start_timestamp < end_ts
+            ).order_by(LectureSlot.start_timestamp)
+        )
+        return list(result)
+
+    async def _replace_course_slots(
+        self,
+        user_email: str,
+        course_hash: str,
+        runs: List[Tuple[int, int]],
+        slots: List[SlotRecord]
+    ):
+        """Swap a course's stored slots in the synced ranges for fresh ones"""
+        slot_hashes = [slot.hash for slot in slots if slot.hash]
+
+        for run_start, run_end in runs:
+            await self.db.execute(delete(LectureSlot).where(
+                LectureSlot.user_email == user_email,
+                LectureSlot.course_hash == course_hash,
+                LectureSlot.start_timestamp >= run_start,
+                LectureSlot.start_timestamp < run_end
+            ))
+
+        # A rescheduled slot may still be stored under another day
+        if slot_hashes:
+            await self.db.execute(delete(LectureSlot).where(
+                LectureSlot.user_email == user_email,
+                LectureSlot.slot_hash.in_(slot_hashes)
+            ))
+
+        now = datetime.utcnow()
+        seen = set()
+        for slot in slots:
+            if not slot.hash or slot.hash in seen:
+                continue
+            seen.add(slot.hash)
+
+            self.db.add(LectureSlot(
+                slot_hash=slot.hash,
+                user_email=user_email,
+                course_hash=course_hash,
+                subject=slot.subject,
+                room=slot.room,
+                join_url=slot.join_url,
+                instructor=slot.instructor,
+                start_timestamp=slot.start_timestamp,
+                end_timestamp=slot.end_timestamp,
+                synced_at=now
+            ))
+
+    async def _prune_dropped_courses(
+        self,
+        user_email: str,
+        runs: List[Tuple[int, int]],
+        course_hashes: List[str]
+    ):
+        """Delete stored slots in the synced ranges of courses no longer listed"""
+        for run_start, run_end in runs:
+            await self.db.execute(delete(LectureSlot).where(
+                LectureSlot.user_email == user_email,
+                LectureSlot.course_hash.not_in(course_hashes),
+                LectureSlot.start_timestamp >= run_start,
+                LectureSlot.start_timestamp < run_end
+            ))
+
+    async def _mark_synced(self, user_email: str, windows: List[int], failed_courses: Set[str]):
+        if not windows:
+            return
+
+        now = datetime.utcnow()
+        existing = {
+            row.window_start: row
+            for row in await self.db.scalars(
+                select(ScheduleSyncWindow).where(
+                    ScheduleSyncWindow.user_email == user_email,
+                    ScheduleSyncWindow.window_start.in_(windows)
+                )
+            )
+        }
+
+        for window in windows:
+            row = existing.get(window)
+            if row:
+                row.synced_at = now
+                row.failed_courses = sorted(failed_courses)
+            else:
+                self.db.add(ScheduleSyncWindow(
+                    user_email=user_email,
+                    window_start=window,
+                    synced_at=now,
+                    failed_courses=sorted(failed_courses)
+                ))
@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+from .state_backend import state_backend, SESSION_REVOKED
+
+
+class SessionCache:
+    """
+    Bounded in-process cache of authenticated sessions
+
+    Valid sessions are cached as plain attribute snapshots for `ttl`
+    seconds, or until their own expires_at if sooner. The TTL bounds how
+    long a session revoked on another worker stays usable here when the
+    state backend is process-local. Unknown or expired tokens are cached as
+    invalid for a short TTL so repeated bad tokens don't reach the
+    database. Used only from the event loop (the async auth dependency and
+    bus handlers), and no method awaits, so it needs no lock.
+    """
+
+    INVALID = object()
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # token -> (snapshot or INVALID, monotonic expiry)
+        self._entries: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.db_lookups = 0
+        self.db_time = 0.0
+
+    def get(self, token: str) -> Optional[Any]:
+        """Return a session snapshot, INVALID, or None on a miss"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expiry = entry
+        if expiry <= time.monotonic():
+            del self._entries[token]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        if value is self.INVALID:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, token: str, snapshot: Dict[str, Any], expires_at: datetime):
+        remaining = (expires_at - datetime.utcnow()).total_seconds()
+        self._store(token, snapshot, time.monotonic() + min(self.ttl, remaining))
+
+    def set_invalid(self, token: str):
+        self._store(token, self.INVALID, time.monotonic() + self.negative_ttl)
+
+    def invalidate(self, token: str):
+        self._entries.pop(token, None)
+
+    def record_db_lookup(self, seconds: float):
+        self.db_lookups += 1
+        self.db_time += seconds
+
+    def _store(self, token: str, value: Any, expiry: float):
+        self._entries[token] = (value, expiry)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        avg_db_ms = (self.db_time / self.db_lookups * 1000) if self.db_lookups else 0.0
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+            "avg_db_lookup_ms": round(avg_db_ms, 3),
+            "saved_db_ms": round((self.hits + self.negative_hits) * avg_db_ms, 1),
+        }
+
+
+session_cache = SessionCache(
+    max_entries=settings.session_cache_max_entries,
+    ttl=settings.session_cache_ttl,
+    negative_ttl=settings.session_negative_ttl
+)
+state_backend.subscribe(SESSION_REVOKED, session_cache.invalidate)
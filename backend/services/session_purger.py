@@ -0,0 +1,129 @@
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, Session as DBSession, StreamTicket
+from config import settings
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def deactivate_excess_sessions(db: AsyncSession, user_email: str, keep: int) -> List[str]:
+    """
+    Deactivate all but the newest `keep` active sessions of a user (caller commits)
+
+    Returns the deactivated tokens, for cache invalidation once committed.
+    """
+    tokens = list(await db.scalars(
+        select(DBSession.session_id)
+        .where(DBSession.user_email == user_email, DBSession.is_active == True)
+        .order_by(DBSession.created_at.desc(), DBSession.id.desc())
+        .offset(keep)
+    ))
+    if tokens:
+        await db.execute(
+            update(DBSession)
+            .where(DBSession.session_id.in_(tokens))
+            .values(is_active=False)
+        )
+    return tokens
+
+
+class SessionPurger:
+    """
+    Periodic deletion of logged-out and expired session rows (and of
+    stream tickets that expired unredeemed)
+
+    Expired sessions are otherwise only deactivated when their token is
+    presented again, and logged-out ones are never removed, so without this
+    the sessions table grows with every login. Rows are deleted in chunks
+    of SESSION_PURGE_BATCH_SIZE through the (is_active, expires_at) index,
+    every SESSION_PURGE_INTERVAL seconds.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.purged = 0
+        self.failed_runs = 0
+        self.last_run_at: Optional[datetime] = None
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._purge_periodically())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def purge(self) -> int:
+        """Delete inactive and expired sessions, one chunk at a time"""
+        now = datetime.utcnow()
+        purged = 0
+
+        # Two range scans on the index rather than one OR over both columns
+        for condition in (
+            DBSession.is_active == False,
+            (DBSession.is_active == True) & (DBSession.expires_at < now),
+        ):
+            while True:
+                async with AsyncSessionLocal() as db:
+                    ids = list(await db.scalars(
+                        select(DBSession.id).where(condition).limit(self.batch_size)
+                    ))
+                    if not ids:
+                        break
+
+                    await db.execute(delete(DBSession).where(DBSession.id.in_(ids)))
+                    await db.commit()
+
+                purged += len(ids)
+                # Short transactions keep logins and auth lookups unblocked
+                await asyncio.sleep(0)
+
+        # Stream tickets nobody redeemed
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(StreamTicket).where(StreamTicket.expires_at < now))
+            await db.commit()
+
+        self.runs += 1
+        self.purged += purged
+        self.last_run_at = now
+        return purged
+
+    async def _purge_periodically(self):
+        while True:
+            try:
+                purged = await self.purge()
+                if purged:
+                    logger.info(f"Purged {purged} inactive or expired sessions")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed_runs += 1
+                logger.error(f"Error purging sessions: {str(e)}")
+
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "runs": self.runs,
+            "purged": self.purged,
+            "failed_runs": self.failed_runs,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+session_purger = SessionPurger(
+    interval=settings.session_purge_interval,
+    batch_size=settings.session_purge_batch_size
+)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from config import settings
+from .records import SlotRecord
+from .state_backend import state_backend, SESSION_REVOKED
+
+
+class SlotLocation:
+    __slots__ = ("course_hash", "join_url", "start_timestamp", "end_timestamp")
+
+    def __init__(
+        self,
+        course_hash: str,
+        join_url: Optional[str],
+        start_timestamp: int,
+        end_timestamp: int
+    ):
+        self.course_hash = course_hash
+        self.join_url = join_url
+        self.start_timestamp = start_timestamp
+        self.end_timestamp = end_timestamp
+
+
+class SlotIndex:
+    """
+    Bounded in-memory map of (session_key, slot_hash) -> SlotLocation
+
+    Filled by NewtonClient.get_schedule every time lecture slots are fetched,
+    so /api/schedule/join-class can resolve a slot with one dictionary lookup.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], SlotLocation]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def add_slots(self, session_key: str, course_hash: str, slots: Iterable[SlotRecord]):
+        for slot in slots:
+            if not slot.hash:
+                continue
+
+            key = (session_key, slot.hash)
+            self._entries[key] = SlotLocation(
+                course_hash=course_hash,
+                join_url=slot.join_url,
+                start_timestamp=slot.start_timestamp,
+                end_timestamp=slot.end_timestamp
+            )
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, session_key: str, slot_hash: str) -> Optional[SlotLocation]:
+        location = self._entries.get((session_key, slot_hash))
+        if location is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return location
+
+    def invalidate_session(self, session_key: str):
+        for key in [key for key in self._entries if key[0] == session_key]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+slot_index = SlotIndex(max_entries=settings.slot_index_max_entries)
+state_backend.subscribe(SESSION_REVOKED, slot_index.invalidate_session)
@@ -0,0 +1,339 @@
+"""
+State shared between uvicorn workers: a key/value store and an invalidation bus
+
+Caches stay in-process (L1); a shared backend adds a second level that every
+worker reads and writes, and a bus so an invalidation published by one
+worker (logout, data changed upstream) reaches the L1 caches of all of them.
+
+    local   per process; nothing is shared and publish() only runs this
+            process's handlers (the default, and the stand-in for tests)
+    sqlite  a SQLite file (STATE_SQLITE_PATH) shared by the workers on one
+            host, in WAL mode through aiosqlite; other workers' events are
+            picked up every STATE_POLL_INTERVAL seconds
+
+Values are bytes; callers choose the encoding. The file is trusted, so it
+must only be writable by the app. Named leases let one worker own a job
+(e.g. class prefetching); with the local backend every worker holds its own.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import os
+import secrets
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import aiosqlite
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Namespace of lease values (the holder's owner id)
+LEASE_NAMESPACE = "lease"
+
+# Bus channels; the message is the session token or the user email
+SESSION_REVOKED = "session_revoked"
+SESSION_DATA_CHANGED = "session_data_changed"
+USER_PERFORMANCE_CHANGED = "user_performance_changed"
+
+
+class StateBackend(ABC):
+    """Interface of the shared state backends; also the bus dispatcher"""
+
+    name = "base"
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[str], Any]]] = {}
+        self.published = 0
+        self.received = 0
+
+    @property
+    def shared(self) -> bool:
+        """Whether values written here are visible to other workers"""
+        return False
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """The value, or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        """Store a value for ttl seconds"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str):
+        """Remove a value if present"""
+
+    @abstractmethod
+    async def delete_prefix(self, namespace: str, prefix: str) -> int:
+        """Remove every value whose key starts with prefix; returns the count"""
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take a free or expired lease, or renew one owner holds; True while held"""
+
+    @abstractmethod
+    async def release_lease(self, name: str, owner: str):
+        """Give up a lease if owner holds it"""
+
+    def subscribe(self, channel: str, handler: Callable[[str], Any]):
+        """Run handler(message) in this worker for every message on channel"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, message: str):
+        """Deliver to this worker's handlers now and to the other workers'"""
+        self.published += 1
+        self._dispatch(channel, message)
+
+    def _dispatch(self, channel: str, message: str):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.warning(f"State bus handler for {channel} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "shared": self.shared,
+            "published": self.published,
+            "received": self.received,
+        }
+
+
+class LocalStateBackend(StateBackend):
+    """In-process store with expiry; nothing reaches other workers"""
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._values: Dict[str, Dict[str, tuple]] = {}  # namespace -> key -> (value, expires_at)
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        item = self._values.get(namespace, {}).get(key)
+        if item is None:
+            return None
+        if item[1] <= time.time():
+            del self._values[namespace][key]
+            return None
+        return item[0]
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        self._values.setdefault(namespace, {})[key] = (value, time.time() + ttl)
+
+    async def delete(self, namespace: str, key: str):
+        self._values.get(namespace, {}).pop(key, None)
+
+    async def delete_prefix(self, namespace: str, prefix: str) -> int:
+        values = self._values.get(namespace, {})
+        keys = [key for key in values if key.startswith(prefix)]
+        for key in keys:
+            del values[key]
+        return len(keys)
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        holder = await self.get(LEASE_NAMESPACE, name)
+        if holder is not None and holder != owner.encode():
+            return False
+        await self.set(LEASE_NAMESPACE, name, owner.encode(), ttl)
+        return True
+
+    async def release_lease(self, name: str, owner: str):
+        if await self.get(LEASE_NAMESPACE, name) == owner.encode():
+            await self.delete(LEASE_NAMESPACE, name)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(super().stats(), entries=sum(len(values) for values in self._values.values()))
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Store and bus in a SQLite file shared by the workers on one host
+
+    Args:
+        path: Database file (separate from the app database)
+        poll_interval: Seconds between reads of other workers' events
+        event_retention: Seconds events are kept; also how often expired
+            values are purged
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, poll_interval: float, event_retention: float):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.event_retention = event_retention
+        self.origin = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self._db: Optional[aiosqlite.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_event_id = 0
+        self.errors = 0
+        self.purged = 0
+
+    @property
+    def shared(self) -> bool:
+        return self._db is not None
+
+    async def start(self):
+        if self._db is not None:
+            return
+
+        # Autocommit: every statement is its own short transaction
+        db = await aiosqlite.connect(self.path, isolation_level=None)
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        await db.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        await db.execute(
+            "CREATE TABLE IF NOT EXISTS state_values ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        await db.execute(
+            "CREATE TABLE IF NOT EXISTS state_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, message TEXT NOT NULL, "
+            "origin TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        async with db.execute("SELECT COALESCE(MAX(id), 0) FROM state_events") as cursor:
+            self._last_event_id = (await cursor.fetchone())[0]
+
+        self._db = db
+        self._task = asyncio.create_task(self._poll())
+        logger.info(f"Shared state backend at {self.path}")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._db is not None:
+            db, self._db = self._db, None
+            await db.close()
+
+    async def _execute(self, sql: str, params: tuple, fetch: bool = False) -> Any:
+        """Run a statement; returns the first row (fetch) or the row count, None on error"""
+        if self._db is None:
+            return None
+        try:
+            async with self._db.execute(sql, params) as cursor:
+                return await cursor.fetchone() if fetch else cursor.rowcount
+        except aiosqlite.Error as e:
+            # A shared-state failure degrades to a cache miss, never a failed request
+            self.errors += 1
+            logger.warning(f"Shared state query failed: {e}")
+            return None
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        row = await self._execute(
+            "SELECT value FROM state_values WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+            fetch=True
+        )
+        return row[0] if row else None
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: float):
+        await self._execute(
+            "INSERT OR REPLACE INTO state_values (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl)
+        )
+
+    async def delete(self, namespace: str, key: str):
+        await self._execute("DELETE FROM state_values WHERE namespace = ? AND key = ?", (namespace, key))
+
+    async def delete_prefix(self, namespace: str, prefix: str) -> int:
+        # Key range on the primary key instead of LIKE (no escaping, uses the index)
+        deleted = await self._execute(
+            "DELETE FROM state_values WHERE namespace = ? AND key >= ? AND key < ?",
+            (namespace, prefix, prefix + "\U0010ffff")
+        )
+        return deleted or 0
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        # One statement, so two workers can never both take the lease
+        now = time.time()
+        taken = await self._execute(
+            "INSERT INTO state_values (namespace, key, value, expires_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state_values.value = excluded.value OR state_values.expires_at <= ?",
+            (LEASE_NAMESPACE, name, owner.encode(), now + ttl, now)
+        )
+        return taken == 1
+
+    async def release_lease(self, name: str, owner: str):
+        await self._execute(
+            "DELETE FROM state_values WHERE namespace = ? AND key = ? AND value = ?",
+            (LEASE_NAMESPACE, name, owner.encode())
+        )
+
+    async def publish(self, channel: str, message: str):
+        await super().publish(channel, message)
+        await self._execute(
+            "INSERT INTO state_events (channel, message, origin, created_at) VALUES (?, ?, ?, ?)",
+            (channel, message, self.origin, time.time())
+        )
+
+    async def _poll(self):
+        last_purge = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._receive()
+                if time.monotonic() - last_purge >= self.event_retention:
+                    await self._purge()
+                    last_purge = time.monotonic()
+            except aiosqlite.Error as e:
+                self.errors += 1
+                logger.warning(f"Shared state poll failed: {e}")
+
+    async def _receive(self):
+        async with self._db.execute(
+            "SELECT id, channel, message, origin FROM state_events WHERE id > ? ORDER BY id",
+            (self._last_event_id,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+
+        for event_id, channel, message, origin in rows:
+            self._last_event_id = event_id
+            if origin != self.origin:
+                self.received += 1
+                self._dispatch(channel, message)
+
+    async def _purge(self):
+        now = time.time()
+        self.purged += await self._execute("DELETE FROM state_values WHERE expires_at <= ?", (now,)) or 0
+        await self._execute("DELETE FROM state_events WHERE created_at < ?", (now - self.event_retention,))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            super().stats(),
+            path=self.path,
+            last_event_id=self._last_event_id,
+            purged=self.purged,
+            errors=self.errors
+        )
+
+
+def create_state_backend(name: str) -> StateBackend:
+    if name == "local":
+        return LocalStateBackend()
+    if name == "sqlite":
+        return SQLiteStateBackend(
+            path=settings.state_sqlite_path,
+            poll_interval=settings.state_poll_interval,
+            event_retention=settings.state_event_retention
+        )
+    raise ValueError(f"Unknown STATE_BACKEND {name!r} (expected 'local' or 'sqlite')")
+
+
+state_backend = create_state_backend(settings.state_backend)
@@ -0,0 +1,254 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from config import settings
+import asyncio
+import httpx
+
+# Statuses worth retrying for idempotent requests
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket with additive-increase / multiplicative-decrease rate
+
+    Callers reserve a token and sleep for the returned delay, so waiting
+    callers are served in arrival order. A 429 halves the rate (and may
+    block the bucket until Retry-After); each success then adds back a
+    small step until the configured rate is reached again.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before sending"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.max_rate * settings.upstream_min_rate_fraction, self.rate / 2)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self):
+        if self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    @property
+    def idle(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst and self.rate == self.max_rate
+
+    @property
+    def headroom(self) -> float:
+        """Unused share of the burst (1.0 = idle), scaled down while throttled"""
+        self._refill(time.monotonic())
+        return max(0.0, self.tokens) / self.burst * (self.rate / self.max_rate)
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent traffic
+
+    Every first attempt deposits UPSTREAM_RETRY_BUDGET_RATIO tokens and the
+    balance also refills at UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND; each retry
+    withdraws one. When the portal is down the balance drains quickly, so
+    retries cannot multiply the load on it.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, max_balance: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self.balance = max_balance
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.balance = min(self.max_balance, self.balance + (now - self.updated) * self.min_per_second)
+        self.updated = now
+
+    def deposit(self):
+        self._refill()
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP-date), None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamLimiter:
+    """
+    Process-wide rate limiting and retry policy for portal requests
+
+    Requests take a token from their host's bucket and, when the caller is
+    identified, from a per-session bucket. Idempotent requests that fail
+    with 429, 5xx or a transport error are retried with full-jitter
+    exponential backoff (at least Retry-After when sent) while the retry
+    budget allows it.
+    """
+
+    # Idle per-session buckets are dropped once there are more than this many
+    SESSION_PRUNE_THRESHOLD = 1024
+
+    def __init__(self):
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._sessions: Dict[str, TokenBucket] = {}
+        self.budget = RetryBudget(
+            ratio=settings.upstream_retry_budget_ratio,
+            min_per_second=settings.upstream_retry_budget_min_per_second,
+            max_balance=settings.upstream_retry_budget_max
+        )
+        self.requests = 0
+        self.delayed = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+        self.server_errors = 0
+        self.transport_errors = 0
+        self.retries = 0
+        self.retries_denied = 0
+
+    async def acquire(self, host: str, session_key: Optional[str] = None, first_attempt: bool = True):
+        """Wait until both the host and the session may send another request"""
+        if first_attempt:
+            self.requests += 1
+            self.budget.deposit()
+
+        host_bucket = self._hosts.get(host)
+        if host_bucket is None:
+            host_bucket = self._hosts[host] = TokenBucket(
+                settings.upstream_host_rate,
+                settings.upstream_host_burst
+            )
+        wait = host_bucket.reserve()
+
+        if session_key:
+            session_bucket = self._sessions.get(session_key)
+            if session_bucket is None:
+                if len(self._sessions) >= self.SESSION_PRUNE_THRESHOLD:
+                    self._prune_sessions()
+                session_bucket = self._sessions[session_key] = TokenBucket(
+                    settings.upstream_session_rate,
+                    settings.upstream_session_burst
+                )
+            wait = max(wait, session_bucket.reserve())
+
+        if wait > 0:
+            self.delayed += 1
+            self.wait_seconds += wait
+            await asyncio.sleep(wait)
+
+    def headroom(self, host: str) -> float:
+        """How much of a host's request budget live traffic is leaving unused"""
+        bucket = self._hosts.get(host)
+        return 1.0 if bucket is None else bucket.headroom
+
+    def observe(self, host: str, response: httpx.Response):
+        """Feed a response back into the host bucket's adaptive rate"""
+        bucket = self._hosts.get(host)
+        if response.status_code == 429:
+            self.throttled += 1
+            if bucket:
+                bucket.throttle(parse_retry_after(response.headers.get("Retry-After")))
+        elif response.status_code >= 500:
+            self.server_errors += 1
+        elif bucket:
+            bucket.recover()
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> Optional[float]:
+        """
+        Seconds to wait before retry number attempt + 1, or None to give up
+
+        Args:
+            attempt: Retries already made for this request
+            response: The failed response, or None after a transport error
+        """
+        if response is None:
+            self.transport_errors += 1
+        elif response.status_code not in RETRY_STATUSES:
+            return None
+
+        if attempt >= settings.upstream_max_retries:
+            return None
+
+        backoff = min(
+            settings.upstream_backoff_max,
+            settings.upstream_backoff_base * (2 ** attempt)
+        )
+        delay = random.uniform(0, backoff)
+
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                # Waiting that long would outlive the request; let the caller fail fast
+                if retry_after > settings.upstream_backoff_max:
+                    return None
+                delay = max(delay, retry_after)
+
+        if not self.budget.withdraw():
+            self.retries_denied += 1
+            return None
+
+        self.retries += 1
+        return delay
+
+    def _prune_sessions(self):
+        for session_key in [key for key, bucket in self._sessions.items() if bucket.idle]:
+            del self._sessions[session_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "throttled": self.throttled,
+            "server_errors": self.server_errors,
+            "transport_errors": self.transport_errors,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "retry_budget": round(self.budget.balance, 2),
+            "session_buckets": len(self._sessions),
+            "hosts": {
+                host: {"rate": round(bucket.rate, 2), "max_rate": bucket.max_rate}
+                for host, bucket in self._hosts.items()
+            },
+        }
+
+
+upstream_limiter = UpstreamLimiter()
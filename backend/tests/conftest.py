@@ -0,0 +1,54 @@
+"""
+Shared test setup
+
+The app reads its settings at import time, so the database is pointed at a
+throwaway SQLite file before anything from the backend is imported. Tests
+are plain functions that drive coroutines through the `run` fixture (no
+pytest plugin needed).
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="newton-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["STATE_BACKEND"] = "local"
+os.environ["PREFETCH_ENABLED"] = "false"
+os.environ["SESSION_PURGE_INTERVAL"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from database import Base, async_engine, engine, init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    init_db()
+    yield
+    engine.dispose()
+    shutil.rmtree(_tmpdir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh event loop, closing async DB connections on it"""
+    def run(coro):
+        async def wrapper():
+            try:
+                return await coro
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(wrapper())
+    return run
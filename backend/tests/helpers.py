@@ -0,0 +1,30 @@
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from database import Session as DBSession, SessionLocal
+
+
+def create_session(
+    email: str = "a@example.com",
+    expires_in: timedelta = timedelta(days=7),
+    created_at: Optional[datetime] = None,
+    is_active: bool = True
+) -> str:
+    """Insert a session row; returns its token"""
+    token = secrets.token_urlsafe(32)
+    with SessionLocal() as db:
+        db.add(DBSession(
+            session_id=token,
+            user_email=email,
+            cookies={"sessionid": secrets.token_hex(8)},
+            is_active=is_active,
+            created_at=created_at or datetime.utcnow(),
+            expires_at=datetime.utcnow() + expires_in
+        ))
+        db.commit()
+    return token
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+
+from database import ActivityDaily, AsyncSessionLocal, SessionLocal
+from services.activity_rollup import get_streak_days
+
+TODAY = date(2024, 3, 10)
+
+
+def _active(email: str, *days_ago: int):
+    with SessionLocal() as db:
+        for ago in days_ago:
+            at = datetime.combine(TODAY - timedelta(days=ago), datetime.min.time())
+            db.add(ActivityDaily(user_email=email, day=at.date(), event_count=1, first_at=at, last_at=at))
+        db.commit()
+
+
+def _streaks(run, *emails):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return [await get_streak_days(db, email, today=TODAY) for email in emails]
+
+    return run(scenario())
+
+
+def test_streak_stops_at_the_first_gap(run):
+    _active("today@example.com", 0, 1, 2, 4, 5, 6, 7)
+    _active("yesterday@example.com", 1, 2, 3, 30)
+    _active("lapsed@example.com", 2, 3)
+    _active("future@example.com", -1, 0)
+
+    emails = ("today@example.com", "yesterday@example.com", "lapsed@example.com", "future@example.com")
+    assert _streaks(run, *emails) == [3, 3, 0, 1]
+
+
+def test_no_activity_is_no_streak(run):
+    assert _streaks(run, "nobody@example.com") == [0]
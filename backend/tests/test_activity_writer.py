@@ -0,0 +1,59 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from database import ActivityLog, SessionLocal
+from services.activity_writer import ActivityLogWriter
+
+
+def _writer(**overrides):
+    options = dict(batch_size=100, flush_interval=5.0, max_queue=1000, retention_days=0, purge_interval=3600)
+    options.update(overrides)
+    return ActivityLogWriter(**options)
+
+
+def _count_logs() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(ActivityLog))
+
+
+def test_stop_flushes_rows_already_collected_into_a_batch(run):
+    writer = _writer()
+
+    async def scenario():
+        await writer.start()
+        for i in range(5):
+            await writer.log("a@example.com", "login", {"i": i})
+        # Let the writer pull the rows into its batch and wait for more
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+    run(scenario())
+    assert _count_logs() == 5
+    assert writer.stats()["written"] == 5
+
+
+def test_stop_flushes_rows_queued_before_the_writer_ran(run):
+    writer = _writer(batch_size=2)
+
+    async def scenario():
+        await writer.start()
+        for i in range(7):
+            await writer.log("a@example.com", "login", {"i": i})
+        await writer.stop()
+
+    run(scenario())
+    assert _count_logs() == 7
+    assert writer.stats()["queued"] == 0
+
+
+def test_log_after_stop_writes_directly(run):
+    writer = _writer()
+
+    async def scenario():
+        await writer.start()
+        await writer.stop()
+        await writer.log("a@example.com", "logout")
+
+    run(scenario())
+    assert _count_logs() == 1
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Dict, List
+
+from api.assignments import collect_assignments
+from services.records import AssignmentRecord
+
+
+class _Client:
+    """Stands in for NewtonClient.iter_assignments and counts the items pulled"""
+
+    def __init__(self, sizes: Dict[str, int], delays: Dict[str, float] = None):
+        self.sizes = sizes
+        self.delays = delays or {}
+        self.pulled = {c_hash: 0 for c_hash in sizes}
+
+    async def iter_assignments(self, c_hash: str):
+        for i in range(self.sizes[c_hash]):
+            if self.delays.get(c_hash):
+                await asyncio.sleep(self.delays[c_hash])
+            self.pulled[c_hash] += 1
+            yield AssignmentRecord(f"{c_hash}-{i}", f"A{i}", "quiz", None, 1, 0, 10, "easy", i % 2 == 1)
+
+
+def _courses(*hashes: str) -> List[dict]:
+    return [{"hash": c_hash} for c_hash in hashes]
+
+
+def test_later_courses_stop_once_earlier_ones_fill_the_limit(run):
+    client = _Client({"c0": 10, "c1": 10, "c2": 10})
+
+    result = run(collect_assignments(client, _courses("c0", "c1", "c2"), None, None, 5))
+
+    assert [a.hash for a in result.assignments] == ["c0-0", "c0-1", "c0-2", "c0-3", "c0-4"]
+    assert client.pulled == {"c0": 5, "c1": 0, "c2": 0}
+
+
+def test_results_stay_in_course_order_when_an_earlier_course_is_slower(run):
+    client = _Client({"c0": 3, "c1": 10}, delays={"c0": 0.01})
+
+    result = run(collect_assignments(client, _courses("c0", "c1"), "pending", None, 3))
+
+    # c0 has two pending items; c1 only contributes the third
+    assert [a.hash for a in result.assignments] == ["c0-0", "c0-2", "c1-0"]
+    assert client.pulled["c1"] <= 5
@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from database import LectureSlot, SessionLocal
+from main import app
+from services.class_prefetcher import ClassPrefetcher
+from services.state_backend import LocalStateBackend, SQLiteStateBackend
+from services.slot_index import slot_index
+from tests.helpers import auth, create_session
+
+EMAIL = "a@example.com"
+
+
+def _store_slot(join_url=None) -> str:
+    start = int(time.time()) + 120
+    with SessionLocal() as db:
+        db.add(LectureSlot(
+            slot_hash="slot-1",
+            user_email=EMAIL,
+            course_hash="course-1",
+            subject="Maths",
+            join_url=join_url,
+            start_timestamp=start,
+            end_timestamp=start + 3600
+        ))
+        db.commit()
+    return "slot-1"
+
+
+async def _check_leases(backend_a, backend_b):
+    taken = await backend_a.acquire_lease("job", "a", 0.2)
+    refused = await backend_b.acquire_lease("job", "b", 0.2)
+    renewed = await backend_a.acquire_lease("job", "a", 0.2)
+    await asyncio.sleep(0.3)
+    after_expiry = await backend_b.acquire_lease("job", "b", 60)
+    await backend_a.release_lease("job", "a")  # not a's any more: no effect
+    kept = not await backend_a.acquire_lease("job", "a", 60)
+    await backend_b.release_lease("job", "b")
+    after_release = await backend_a.acquire_lease("job", "a", 60)
+    return [taken, refused, renewed, after_expiry, kept, after_release]
+
+
+def test_lease_on_local_backend(run):
+    backend = LocalStateBackend()
+    assert run(_check_leases(backend, backend)) == [True, False, True, True, True, True]
+
+
+def test_lease_is_exclusive_across_sqlite_workers(run, tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        worker_a = SQLiteStateBackend(path, poll_interval=1, event_retention=60)
+        worker_b = SQLiteStateBackend(path, poll_interval=1, event_retention=60)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            return await _check_leases(worker_a, worker_b)
+        finally:
+            await worker_a.close()
+            await worker_b.close()
+
+    assert run(scenario()) == [True, False, True, True, True, True]
+
+
+def test_only_the_lease_holder_prefetches(run, monkeypatch):
+    monkeypatch.setattr("services.class_prefetcher.state_backend", LocalStateBackend())
+    create_session(EMAIL)
+    _store_slot()
+
+    def prefetcher():
+        return ClassPrefetcher(lead=300, scan_interval=60, retry_interval=60, concurrency=1, min_headroom=0)
+
+    async def scenario():
+        first, second = prefetcher(), prefetcher()
+        await first._lead_and_scan(time.time())
+        await second._lead_and_scan(time.time())
+        tracked = (first.stats()["tracked"], second.stats()["tracked"])
+
+        # The leader stops; the next scan of the other worker takes over
+        await first.close()
+        await second._lead_and_scan(time.time())
+        return first, second, tracked
+
+    first, second, tracked = run(scenario())
+
+    assert tracked == (1, 0)
+    assert not first.leader
+    assert second.leader
+    assert second.stats()["tracked"] == 1
+
+
+@pytest.mark.parametrize("newest", [True, False])
+def test_prefetched_join_url_serves_every_session(run, newest):
+    older = create_session(EMAIL)
+    newer = create_session(EMAIL)
+    _store_slot(join_url="https://meet/1")
+
+    async def scenario():
+        # Nothing in this worker's slot index, and no upstream to call
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post(
+                "/api/schedule/join-class",
+                json={"lecture_slot_hash": "slot-1"},
+                headers=auth(newer if newest else older)
+            )
+
+    response = run(scenario())
+
+    assert response.status_code == 200
+    assert response.json()["join_url"] == "https://meet/1"
+    assert slot_index.get(older, "slot-1") is None
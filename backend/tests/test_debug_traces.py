@@ -0,0 +1,33 @@
+import httpx
+
+from config import settings
+from main import app
+
+
+def _get(run, headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/debug/traces", headers=headers or {})
+    return run(scenario())
+
+
+def test_disabled_by_default(run):
+    assert _get(run).status_code == 404
+
+
+def test_requires_the_debug_token(run, monkeypatch):
+    monkeypatch.setattr(settings, "debug_traces_enabled", True)
+    monkeypatch.setattr(settings, "debug_token", "s3cret")
+
+    assert _get(run).status_code == 403
+    assert _get(run, {"X-Debug-Token": "wrong"}).status_code == 403
+    response = _get(run, {"X-Debug-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "traces" in response.json()
+
+
+def test_enabled_without_a_token_stays_closed(run, monkeypatch):
+    monkeypatch.setattr(settings, "debug_traces_enabled", True)
+    monkeypatch.setattr(settings, "debug_token", "")
+    assert _get(run).status_code == 404
@@ -0,0 +1,46 @@
+import asyncio
+from typing import List
+
+from utils.fanout import fan_out_courses
+
+
+def _courses(*hashes: str) -> List[dict]:
+    return [{"hash": c_hash} for c_hash in hashes]
+
+
+def test_calls_in_flight_never_exceed_the_concurrency(run):
+    in_flight, peak = 0, 0
+
+    async def fetch(c_hash: str):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return c_hash.upper()
+
+    courses = _courses(*(f"c{i}" for i in range(10)))
+    results, errors = run(fan_out_courses(courses, fetch, concurrency=3))
+
+    assert peak == 3
+    assert errors == []
+    # Results keep the course order, whatever order the calls finished in
+    assert [(course["hash"], value) for course, value in results] == [(f"c{i}", f"C{i}") for i in range(10)]
+
+
+def test_timeouts_and_failures_are_reported_per_course(run):
+    async def fetch(c_hash: str):
+        if c_hash == "slow":
+            await asyncio.sleep(1)
+        if c_hash == "broken":
+            raise RuntimeError("portal error")
+        return c_hash
+
+    courses = _courses("ok", "slow", "broken") + [{"title": "no hash"}]
+    results, errors = run(fan_out_courses(courses, fetch, timeout=0.05))
+
+    assert [course["hash"] for course, _ in results] == ["ok"]
+    assert errors == [
+        {"course_hash": "slow", "error": "Timed out"},
+        {"course_hash": "broken", "error": "portal error"},
+    ]
@@ -0,0 +1,50 @@
+import httpx
+import pytest
+
+from benchmarks.mock_portal import MockPortal
+from config import settings
+from main import app
+from schemas import (
+    AssignmentListResponse,
+    CoursePerformanceList,
+    DashboardResponse,
+    ScheduleResponse,
+)
+from services.http_pool import http_pool
+from tests.helpers import auth, create_session
+
+ROUTES = [
+    ("/api/assignments", AssignmentListResponse),
+    ("/api/dashboard", DashboardResponse),
+    ("/api/performance/courses", CoursePerformanceList),
+    ("/api/schedule/today", ScheduleResponse),
+    ("/api/schedule/week", ScheduleResponse),
+]
+
+
+def _get(run, monkeypatch, path: str, fast: bool) -> httpx.Response:
+    monkeypatch.setattr(settings, "fast_serialization", fast)
+    # A session of its own, so neither path is served from the other's caches
+    token = create_session(f"{'fast' if fast else 'default'}@example.com")
+
+    async def scenario():
+        await http_pool.start(transport=MockPortal(courses=2, latency=0.0))
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.get(path, headers=auth(token))
+        finally:
+            await http_pool.close()
+
+    return run(scenario())
+
+
+@pytest.mark.parametrize("path,model", ROUTES)
+def test_fast_bodies_match_the_response_model(run, monkeypatch, path, model):
+    default = _get(run, monkeypatch, path, fast=False)
+    fast = _get(run, monkeypatch, path, fast=True)
+
+    assert (default.status_code, fast.status_code) == (200, 200)
+    assert fast.headers["content-type"] == "application/json"
+    # Every field the model declares is present, and nothing else
+    assert set(fast.json()) == set(model.model_fields)
+    assert model.model_validate(fast.json()) == model.model_validate(default.json())
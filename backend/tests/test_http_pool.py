@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from services.http_pool import CountingTransport
+
+_RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok"
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Minimal keep-alive HTTP/1.1 server: answers every GET with "ok" """
+    try:
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(_RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def test_counts_new_connections_without_pool_internals(run):
+    async def scenario():
+        server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        transport = CountingTransport(limits=httpx.Limits(max_connections=10))
+        seen = []
+
+        async def inner_trace(event, info):
+            seen.append(event)
+
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url=f"http://127.0.0.1:{port}") as client:
+                for _ in range(3):
+                    assert (await client.get("/")).text == "ok"
+                # A caller's own trace callback still runs
+                await client.get("/", extensions={"trace": inner_trace})
+                # Two at once need a second connection
+                await asyncio.gather(client.get("/"), client.get("/"))
+        finally:
+            server.close()
+            await server.wait_closed()
+        return transport, seen
+
+    transport, seen = run(scenario())
+
+    assert transport.requests_total == 6
+    assert transport.requests_in_flight == 0
+    assert transport.connections_opened == 2
+    assert "http11.response_closed.complete" in seen
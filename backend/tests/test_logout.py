@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+
+from main import app
+from services.newton_client import response_cache
+from services.records import SlotRecord
+from services.session_cache import session_cache
+from services.slot_index import slot_index
+from services.state_backend import SESSION_REVOKED, SQLiteStateBackend, StateBackend
+from tests.helpers import auth, create_session
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_logout_invalidates_session_and_caches(run):
+    token = create_session()
+    other = create_session("b@example.com")
+    key = (token, "https://portal/api/v1/user/me/")
+
+    async def scenario():
+        async with _client() as client:
+            assert (await client.get("/api/auth/status", headers=auth(token))).status_code == 200
+            assert (await client.get("/api/auth/status", headers=auth(other))).status_code == 200
+            assert session_cache.get(token) is not None
+
+            response_cache.set(key, {"name": "A"}, 10, 60)
+            slot_index.add_slots(token, "course0", [SlotRecord.from_upstream({"hash": "slot-1", "join_url": "https://meet/1"})])
+            assert slot_index.get(token, "slot-1") is not None
+
+            assert (await client.post("/api/auth/logout", headers=auth(token))).status_code == 200
+            return (
+                await client.get("/api/auth/status", headers=auth(token)),
+                await client.get("/api/auth/status", headers=auth(other)),
+            )
+
+    after, unaffected = run(scenario())
+    assert after.status_code == 401
+    assert unaffected.status_code == 200
+    assert response_cache.lookup(key) is None
+    assert slot_index.get(token, "slot-1") is None
+
+
+def test_revocation_reaches_other_workers_through_sqlite_backend(run, tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        worker_a = SQLiteStateBackend(path, poll_interval=0.02, event_retention=60)
+        worker_b = SQLiteStateBackend(path, poll_interval=0.02, event_retention=60)
+        await worker_a.start()
+        await worker_b.start()
+        received_a, received_b = [], []
+        worker_a.subscribe(SESSION_REVOKED, received_a.append)
+        worker_b.subscribe(SESSION_REVOKED, received_b.append)
+
+        await worker_a.set("response", "tok\nurl", b"cached", 60)
+        shared = await worker_b.get("response", "tok\nurl")
+        await worker_a.publish(SESSION_REVOKED, "tok")
+        await asyncio.sleep(0.2)
+
+        await worker_a.close()
+        await worker_b.close()
+        return shared, received_a, received_b
+
+    shared, received_a, received_b = run(scenario())
+    assert shared == b"cached"
+    assert received_a == ["tok"]  # delivered locally once, not echoed back
+    assert received_b == ["tok"]
+
+
+def test_half_implemented_backend_fails_on_creation():
+    class Partial(StateBackend):
+        async def get(self, namespace, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
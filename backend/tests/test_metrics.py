@@ -0,0 +1,58 @@
+import re
+
+from utils.metrics import MetricsRegistry
+
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})? (\S+)$")
+_SUFFIXES = {"histogram": ("_bucket", "_sum", "_count"), "counter": ("",), "gauge": ("",)}
+
+
+def _families(text: str):
+    """{declared name: (type, help, [(sample name, labels, value)])} of a scrape"""
+    families, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, help = line[len("# HELP "):].split(" ", 1)
+            families.setdefault(name, [None, help, []])
+        elif line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE "):].split(" ")
+            families.setdefault(name, [None, None, []])[0] = kind
+            current = name
+        else:
+            sample, labels, value = _SAMPLE.match(line).groups()
+            families[current][2].append((sample, labels or "", value))
+    return families
+
+
+def _registry() -> MetricsRegistry:
+    registry = MetricsRegistry(directory="", flush_interval=15)
+    errors = registry.counter("call_errors", "Calls that raised", ("endpoint",))
+    errors.labels("schedule").inc()
+    errors.labels("schedule").inc()
+    duration = registry.histogram("call_duration_seconds", "Call latency", ("endpoint",), buckets=(0.1, 1.0))
+    duration.labels("schedule").observe(0.5)
+    registry.gauge_source("cache", lambda: {"entries": 3})
+    return registry
+
+
+def test_every_sample_belongs_to_its_declared_family():
+    families = _families(_registry().render())
+
+    for name, (kind, help, samples) in families.items():
+        assert kind, f"{name} has no TYPE"
+        assert samples, f"{name} has no samples"
+        for sample, _, _ in samples:
+            assert sample in {name + suffix for suffix in _SUFFIXES[kind]}, (name, sample)
+
+
+def test_counter_is_declared_and_sampled_as_total():
+    families = _families(_registry().render())
+
+    kind, help, samples = families["autopilot_call_errors_total"]
+    assert (kind, help) == ("counter", "Calls that raised")
+    assert samples == [("autopilot_call_errors_total", '{endpoint="schedule"}', "2")]
+    assert "autopilot_call_errors" not in families
+
+    kind, _, samples = families["autopilot_call_duration_seconds"]
+    assert kind == "histogram"
+    assert ("autopilot_call_duration_seconds_bucket", '{endpoint="schedule",le="+Inf"}', "1") in samples
+    assert families["autopilot_cache_entries"][0] == "gauge"
@@ -0,0 +1,69 @@
+import asyncio
+
+from benchmarks.mock_portal import MockPortal
+from services.http_pool import http_pool
+from services.performance_snapshots import PerformanceSnapshotStore
+from services.state_backend import state_backend, USER_PERFORMANCE_CHANGED
+
+EMAIL = "a@example.com"
+COOKIES = {"sessionid": "x"}
+
+
+async def _with_portal(scenario):
+    portal = MockPortal(courses=2, latency=0.0)
+    await http_pool.start(transport=portal)
+    try:
+        return await scenario(portal)
+    finally:
+        await http_pool.close()
+
+
+def test_mark_stale_refreshes_without_faking_the_age(run):
+    store = PerformanceSnapshotStore(max_age=300, max_entries=10)
+
+    async def scenario(portal):
+        first = await store.get(EMAIL, COOKIES, "token")
+        store.mark_stale(EMAIL)
+        served = await store.get(EMAIL, COOKIES, "token")
+        await asyncio.sleep(0.05)  # background refresh
+        refreshed = await store.get(EMAIL, COOKIES, "token")
+        return first, served, refreshed
+
+    first, served, refreshed = run(_with_portal(scenario))
+
+    # The stale snapshot is still served once, with its real age
+    assert served is first
+    assert served.age < 5
+    assert refreshed is not first
+    assert not refreshed.stale
+    assert store.stats()["stale_hits"] == 1
+    assert store.stats()["refreshes"] == 2
+
+
+def test_fresh_snapshot_is_not_refreshed(run):
+    store = PerformanceSnapshotStore(max_age=300, max_entries=10)
+
+    async def scenario(portal):
+        first = await store.get(EMAIL, COOKIES, "token")
+        calls = portal.total_calls
+        second = await store.get(EMAIL, COOKIES, "token")
+        return first, second, portal.total_calls - calls
+
+    first, second, upstream_calls = run(_with_portal(scenario))
+    assert second is first
+    assert upstream_calls == 0
+    assert store.stats()["hits"] == 1
+
+
+def test_performance_changed_event_marks_the_shared_store_stale(run):
+    from services.performance_snapshots import performance_snapshots
+
+    async def scenario(portal):
+        snapshot = await performance_snapshots.get(EMAIL, COOKIES, "token")
+        await state_backend.publish(USER_PERFORMANCE_CHANGED, EMAIL)
+        return snapshot
+
+    snapshot = run(_with_portal(scenario))
+    assert snapshot.stale
+    assert snapshot.age < 5
+    performance_snapshots.invalidate(EMAIL)
@@ -0,0 +1,83 @@
+import time
+
+from benchmarks.mock_portal import MockPortal
+from services.http_pool import http_pool
+from services.newton_client import NewtonClient, ResponseCache
+
+KEY = ("token", "https://portal/api/v1/user/me/")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = time.monotonic()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr("services.newton_client.time.monotonic", clock)
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+
+    cache.set(KEY, {"name": "A"}, 10, ttl=60)
+    clock.now += 59
+    assert cache.lookup(KEY).data == {"name": "A"}
+
+    # Without a validator an expired entry is of no use
+    clock.now += 2
+    assert cache.lookup(KEY) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_count_and_bytes():
+    cache = ResponseCache(max_entries=3, max_bytes=100)
+    keys = [("token", f"url-{i}") for i in range(4)]
+
+    for key in keys[:3]:
+        cache.set(key, key[1], 10, ttl=60)
+    cache.lookup(keys[0])  # now the most recently used
+    cache.set(keys[3], "url-3", 10, ttl=60)
+    assert cache.lookup(keys[1]) is None
+    assert cache.lookup(keys[0]) is not None
+
+    # Large entries evict as many older ones as the byte bound requires
+    cache.set(("token", "big"), "big", 80, ttl=60)
+    cache.set(("token", "bigger"), "bigger", 90, ttl=60)
+    assert cache.stats()["bytes"] == 90
+    assert cache.lookup(("token", "bigger")) is not None
+    assert cache.set(("token", "huge"), "huge", 101, ttl=60) is None
+    assert cache.stats()["evictions"] == 5
+
+
+def test_invalidate_session_drops_only_that_session():
+    cache = ResponseCache(max_entries=10, max_bytes=1000)
+    cache.set(("a", "url"), 1, 10, ttl=60)
+    cache.set(("a", "other"), 2, 10, ttl=60)
+    cache.set(("b", "url"), 3, 10, ttl=60)
+
+    assert cache.invalidate_session("a") == 2
+    assert cache.lookup(("b", "url")).data == 3
+    assert cache.stats()["bytes"] == 10
+
+
+def test_client_reads_are_cached_per_session(run):
+    async def scenario():
+        portal = MockPortal(courses=2, latency=0.0)
+        await http_pool.start(transport=portal)
+        try:
+            first = NewtonClient({"sessionid": "x"}, session_key="cache-test-1")
+            other = NewtonClient({"sessionid": "y"}, session_key="cache-test-2")
+            courses = await first.get_courses()
+            again = await first.get_courses()
+            calls = portal.total_calls
+            await other.get_courses()
+            return courses, again, calls, portal.total_calls
+        finally:
+            await http_pool.close()
+
+    courses, again, calls, total = run(scenario())
+
+    assert again is courses
+    assert calls == 1
+    assert total == 2  # another session never sees the first one's data
@@ -0,0 +1,81 @@
+import httpx
+
+from services.http_pool import http_pool
+from services.newton_client import NewtonClient, response_cache
+
+
+class _Portal(httpx.AsyncBaseTransport):
+    """Serves the course list with an ETag and answers matching conditional GETs with 304"""
+
+    def __init__(self, etag='"v1"'):
+        self.etag = etag
+        self.courses = [{"hash": "c1"}]
+        self.requests = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.headers.get("If-None-Match"))
+        headers = {"ETag": self.etag} if self.etag else {}
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, json=self.courses, headers=headers)
+
+
+async def _with_portal(portal, session_key, scenario):
+    await http_pool.start(transport=portal)
+    try:
+        return await scenario(NewtonClient({"sessionid": "x"}, session_key=session_key))
+    finally:
+        await http_pool.close()
+
+
+def _expire(client: NewtonClient):
+    for (session_key, _), entry in response_cache._entries.items():
+        if session_key == client.session_key:
+            entry.expires_at = 0
+
+
+def test_stale_entry_is_revalidated_and_reused_on_304(run):
+    portal = _Portal()
+
+    async def scenario(client):
+        first = await client.get_courses()
+        _expire(client)
+        second = await client.get_courses()
+        third = await client.get_courses()
+        return first, second, third
+
+    first, second, third = run(_with_portal(portal, "revalidate-stale", scenario))
+
+    assert portal.requests == [None, '"v1"']
+    # The 304 reused the parsed body and made the entry fresh again
+    assert second is first
+    assert third is first
+
+
+def test_changed_resource_replaces_the_entry(run):
+    portal = _Portal()
+
+    async def scenario(client):
+        await client.get_courses()
+        _expire(client)
+        portal.etag = '"v2"'
+        portal.courses = [{"hash": "c1"}, {"hash": "c2"}]
+        return await client.get_courses()
+
+    courses = run(_with_portal(portal, "revalidate-changed", scenario))
+
+    assert portal.requests == [None, '"v1"']
+    assert courses == [{"hash": "c1"}, {"hash": "c2"}]
+
+
+def test_entry_without_validators_is_refetched_unconditionally(run):
+    portal = _Portal(etag=None)
+
+    async def scenario(client):
+        await client.get_courses()
+        _expire(client)
+        return await client.get_courses()
+
+    run(_with_portal(portal, "revalidate-unvalidated", scenario))
+
+    assert portal.requests == [None, None]
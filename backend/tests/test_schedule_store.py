@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from database import AsyncSessionLocal
+from services.records import SlotRecord
+from services.schedule_store import ScheduleStore
+
+EMAIL = "a@example.com"
+DAY = int(datetime(2024, 3, 11).timestamp())
+NEXT_DAY = int((datetime(2024, 3, 11) + timedelta(days=1)).timestamp())
+
+
+class _Client:
+    """Stands in for NewtonClient: one slot per course per day, some courses failing"""
+
+    def __init__(self, courses: List[str], failing: List[str] = ()):
+        self.courses = courses
+        self.failing = set(failing)
+        self.calls: Dict[str, int] = {}
+        self.course_list_calls = 0
+
+    async def get_courses(self):
+        self.course_list_calls += 1
+        return [{"hash": course_hash} for course_hash in self.courses]
+
+    async def get_schedule(self, course_hash, start_ts, end_ts, revalidate=False):
+        self.calls[course_hash] = self.calls.get(course_hash, 0) + 1
+        if course_hash in self.failing:
+            raise RuntimeError("portal error")
+        return [
+            SlotRecord.from_upstream({
+                "hash": f"{course_hash}-{day}",
+                "lecture": {"name": course_hash},
+                "start_timestamp": day + 3600,
+                "end_timestamp": day + 7200,
+            })
+            for day in (DAY, NEXT_DAY) if start_ts <= day < end_ts
+        ]
+
+
+async def _sync(client: _Client, end_ts: int = NEXT_DAY):
+    async with AsyncSessionLocal() as db:
+        store = ScheduleStore(db)
+        errors = await store.sync(client, EMAIL, DAY, end_ts)
+        slots = await store.slots(EMAIL, DAY, end_ts)
+    return errors, sorted(slot.slot_hash for slot in slots)
+
+
+def test_synced_days_are_served_from_the_store(run):
+    client = _Client(["c1", "c2"])
+
+    async def scenario():
+        first = await _sync(client)
+        second = await _sync(client)
+        return first, second
+
+    first, second = run(scenario())
+
+    assert first == ([], [f"c1-{DAY}", f"c2-{DAY}"])
+    assert second == first
+    assert client.calls == {"c1": 1, "c2": 1}
+    assert client.course_list_calls == 1
+
+
+def test_only_the_failed_course_is_refetched(run):
+    client = _Client(["c1", "c2", "c3"], failing=["c2"])
+
+    async def scenario():
+        first = await _sync(client)
+        second = await _sync(client)
+        client.failing.clear()
+        third = await _sync(client)
+        fourth = await _sync(client)
+        return first, second, third, fourth
+
+    first, second, third, fourth = run(scenario())
+
+    assert first[0] == [{"course_hash": "c2", "error": "portal error"}]
+    assert first[1] == [f"c1-{DAY}", f"c3-{DAY}"]
+    assert second[0] == first[0]
+    assert third == ([], [f"c1-{DAY}", f"c2-{DAY}", f"c3-{DAY}"])
+    assert fourth == third
+    # c1 and c3 were fetched once; c2 until it succeeded
+    assert client.calls == {"c1": 1, "c2": 3, "c3": 1}
+    assert client.course_list_calls == 1
+
+
+def test_failed_course_is_retried_with_newly_missing_days(run):
+    client = _Client(["c1", "c2"], failing=["c2"])
+
+    async def scenario():
+        await _sync(client)
+        client.failing.clear()
+        return await _sync(client, end_ts=NEXT_DAY + 86400)
+
+    errors, slots = run(scenario())
+
+    assert errors == []
+    assert slots == [f"c1-{DAY}", f"c1-{NEXT_DAY}", f"c2-{DAY}", f"c2-{NEXT_DAY}"]
+
+
+def test_full_sync_prunes_slots_of_dropped_courses(run):
+    client = _Client(["c1", "c2"])
+
+    async def scenario():
+        await _sync(client)
+        client.courses = ["c1"]
+        async with AsyncSessionLocal() as db:
+            store = ScheduleStore(db)
+            await store.sync(client, EMAIL, DAY, NEXT_DAY, max_age=0)
+            return [slot.slot_hash for slot in await store.slots(EMAIL, DAY, NEXT_DAY)]
+
+    assert run(scenario()) == [f"c1-{DAY}"]
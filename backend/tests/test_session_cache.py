@@ -0,0 +1,38 @@
+import time
+from datetime import datetime, timedelta
+
+from services.session_cache import SessionCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = time.monotonic()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_valid_session_is_cached_for_the_ttl_only(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr("services.session_cache.time.monotonic", clock)
+    cache = SessionCache(max_entries=10, ttl=60, negative_ttl=30)
+
+    cache.set("token", {"user_email": "a@example.com"}, datetime.utcnow() + timedelta(days=7))
+    clock.now += 59
+    assert cache.get("token") == {"user_email": "a@example.com"}
+
+    # A revocation this worker never heard of stops being served after the TTL
+    clock.now += 2
+    assert cache.get("token") is None
+
+
+def test_session_expiring_before_the_ttl_is_dropped_at_its_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr("services.session_cache.time.monotonic", clock)
+    cache = SessionCache(max_entries=10, ttl=60, negative_ttl=30)
+
+    cache.set("token", {"user_email": "a@example.com"}, datetime.utcnow() + timedelta(seconds=10))
+    clock.now += 5
+    assert cache.get("token") is not None
+    clock.now += 6
+    assert cache.get("token") is None
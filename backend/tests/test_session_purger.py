@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from database import AsyncSessionLocal, Session as DBSession, SessionLocal
+from services.session_purger import SessionPurger, deactivate_excess_sessions
+from tests.helpers import create_session
+
+
+def _active_tokens(email: str) -> set:
+    with SessionLocal() as db:
+        return {
+            row.session_id
+            for row in db.query(DBSession).filter(DBSession.user_email == email, DBSession.is_active == True)
+        }
+
+
+def test_excess_sessions_are_deactivated_oldest_first(run):
+    now = datetime.utcnow()
+    tokens = [create_session(created_at=now - timedelta(hours=age)) for age in (5, 4, 3, 2, 1)]
+    other = create_session("b@example.com", created_at=now - timedelta(hours=9))
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            revoked = await deactivate_excess_sessions(db, "a@example.com", keep=2)
+            await db.commit()
+        return revoked
+
+    revoked = run(scenario())
+
+    assert set(revoked) == set(tokens[:3])
+    assert _active_tokens("a@example.com") == set(tokens[3:])
+    assert _active_tokens("b@example.com") == {other}
+
+
+def test_under_the_cap_nothing_is_deactivated(run):
+    tokens = {create_session(), create_session()}
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return await deactivate_excess_sessions(db, "a@example.com", keep=5)
+
+    assert run(scenario()) == []
+    assert _active_tokens("a@example.com") == tokens
+
+
+def test_purge_deletes_logged_out_and_expired_sessions_in_chunks(run):
+    live = {create_session() for _ in range(2)}
+    for _ in range(3):
+        create_session(is_active=False)
+    for _ in range(4):
+        create_session(expires_in=timedelta(seconds=-1))
+    purger = SessionPurger(interval=0, batch_size=2)
+
+    purged = run(purger.purge())
+
+    assert purged == 7
+    with SessionLocal() as db:
+        assert {row.session_id for row in db.query(DBSession)} == live
+    assert purger.stats()["runs"] == 1
+    assert purger.stats()["purged"] == 7
+    assert run(purger.purge()) == 0
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from services.newton_client import SingleFlight
+
+KEY = ("token", "https://portal/api/v1/user/me/")
+
+
+class _Fetch:
+    """Counts upstream calls; each call waits until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"call": call}
+
+
+def test_concurrent_callers_share_one_fetch(run):
+    flights = SingleFlight()
+
+    async def scenario():
+        fetch = _Fetch()
+        callers = [asyncio.create_task(flights.do("me", KEY, fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return fetch, await asyncio.gather(*callers)
+
+    fetch, results = run(scenario())
+
+    assert fetch.calls == 1
+    assert results == [{"call": 1}] * 3
+    assert results[0] is results[1]
+    assert flights.stats()["deduplicated"] == 2
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_fetch_is_cancelled_only_with_its_last_waiter(run):
+    flights = SingleFlight()
+
+    async def scenario():
+        fetch = _Fetch()
+        first = asyncio.create_task(flights.do("me", KEY, fetch))
+        second = asyncio.create_task(flights.do("me", KEY, fetch))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert fetch.cancelled == 0
+
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+        return fetch
+
+    fetch = run(scenario())
+
+    assert fetch.cancelled == 1
+    assert flights.stats()["cancelled"] == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_caller_after_a_cancel_starts_a_new_fetch(run):
+    flights = SingleFlight()
+
+    async def scenario():
+        fetch = _Fetch()
+        leaving = asyncio.create_task(flights.do("me", KEY, fetch))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)  # its wait ended; the shared fetch is being cancelled
+
+        # Arrives before the cancelled fetch has finished unwinding
+        fetch.release.set()
+        result = await flights.do("me", KEY, fetch)
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return fetch, result
+
+    fetch, result = run(scenario())
+
+    assert result == {"call": 2}
+    assert fetch.calls == 2
+    assert flights.stats()["upstream_calls"] == 2
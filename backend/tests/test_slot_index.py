@@ -0,0 +1,48 @@
+from services.records import SlotRecord
+from services.slot_index import SlotIndex
+
+
+def _slots(*hashes):
+    return [
+        SlotRecord.from_upstream({
+            "hash": s_hash,
+            "join_url": f"https://meet/{s_hash}" if s_hash else None,
+            "start_timestamp": 1000,
+            "end_timestamp": 4600,
+        })
+        for s_hash in hashes
+    ]
+
+
+def test_slots_are_found_by_session_and_hash():
+    index = SlotIndex(max_entries=10)
+    index.add_slots("a", "course-1", _slots("s1", None, "s2"))
+
+    location = index.get("a", "s2")
+    assert (location.course_hash, location.join_url) == ("course-1", "https://meet/s2")
+    assert (location.start_timestamp, location.end_timestamp) == (1000, 4600)
+    # Another session never resolves slots it did not fetch
+    assert index.get("b", "s2") is None
+    assert index.stats() == {"entries": 2, "max_entries": 10, "hits": 1, "misses": 1}
+
+
+def test_oldest_slots_are_evicted_past_max_entries():
+    index = SlotIndex(max_entries=3)
+    index.add_slots("a", "course-1", _slots("s1", "s2", "s3"))
+    index.add_slots("a", "course-1", _slots("s1"))  # refreshed, so no longer the oldest
+    index.add_slots("a", "course-2", _slots("s4"))
+
+    assert index.get("a", "s2") is None
+    assert [index.get("a", s_hash) is not None for s_hash in ("s1", "s3", "s4")] == [True, True, True]
+    assert index.stats()["entries"] == 3
+
+
+def test_invalidate_session_drops_only_that_session():
+    index = SlotIndex(max_entries=10)
+    index.add_slots("a", "course-1", _slots("s1", "s2"))
+    index.add_slots("b", "course-1", _slots("s1"))
+
+    index.invalidate_session("a")
+
+    assert index.get("a", "s1") is None
+    assert index.get("b", "s1").course_hash == "course-1"
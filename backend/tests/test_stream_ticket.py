@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from api.auth import get_session_for_stream
+from benchmarks.mock_portal import MockPortal
+from database import AsyncSessionLocal, SessionLocal, StreamTicket
+from main import app
+from services.http_pool import http_pool
+from services.session_purger import session_purger
+from tests.helpers import auth, create_session
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def _ticket(client: httpx.AsyncClient, token: str) -> str:
+    response = await client.post("/api/schedule/stream-ticket", headers=auth(token))
+    assert response.status_code == 200
+    return response.json()["ticket"]
+
+
+def test_ticket_is_single_use(run):
+    token = create_session()
+
+    async def scenario():
+        async with _client() as client:
+            ticket = await _ticket(client, token)
+
+        # Redeemed through the dependency, since a stream never ends by itself
+        async with AsyncSessionLocal() as db:
+            session = await get_session_for_stream(ticket, db)
+        async with AsyncSessionLocal() as db:
+            with pytest.raises(HTTPException) as reused:
+                await get_session_for_stream(ticket, db)
+        return session, reused.value
+
+    session, reused = run(scenario())
+
+    assert session.session_id == token
+    assert reused.status_code == 401
+
+
+def test_expired_ticket_and_session_token_are_rejected(run):
+    token = create_session()
+
+    async def scenario():
+        async with _client() as client:
+            ticket = await _ticket(client, token)
+            with SessionLocal() as db:
+                db.execute(update(StreamTicket).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+                db.commit()
+            return (
+                await client.get("/api/schedule/stream", params={"ticket": ticket}),
+                await client.get("/api/schedule/stream", params={"token": token}),
+                await client.get("/api/schedule/stream", params={"ticket": token}),
+            )
+
+    expired, by_token, token_as_ticket = run(scenario())
+
+    assert expired.status_code == 401
+    assert by_token.status_code == 422
+    assert token_as_ticket.status_code == 401
+
+
+def test_purge_deletes_expired_tickets(run):
+    token = create_session()
+
+    async def scenario():
+        async with _client() as client:
+            await _ticket(client, token)
+            await _ticket(client, token)
+        with SessionLocal() as db:
+            db.execute(
+                update(StreamTicket)
+                .where(StreamTicket.id == 1)
+                .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            db.commit()
+        await session_purger.purge()
+
+    run(scenario())
+
+    with SessionLocal() as db:
+        assert db.query(StreamTicket).count() == 1
+
+
+def test_dashboard_skips_schedule_unless_asked(run):
+    token = create_session()
+
+    async def scenario():
+        portal = MockPortal(courses=2, latency=0.0)
+        await http_pool.start(transport=portal)
+        try:
+            async with _client() as client:
+                default = await client.get("/api/dashboard", headers=auth(token))
+                with_schedule = await client.get(
+                    "/api/dashboard", params={"include_schedule": True}, headers=auth(token)
+                )
+        finally:
+            await http_pool.close()
+        return default, with_schedule
+
+    default, with_schedule = run(scenario())
+
+    assert default.status_code == 200
+    assert default.json()["schedule"] is None
+    assert default.json()["performance"] is not None
+    assert with_schedule.json()["schedule"] is not None
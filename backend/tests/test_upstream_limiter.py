@@ -0,0 +1,108 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+
+from config import settings
+from services.upstream_limiter import RetryBudget, TokenBucket, UpstreamLimiter, parse_retry_after
+
+
+def _response(status: int, retry_after: str = None) -> httpx.Response:
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return httpx.Response(status, headers=headers)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 < parse_retry_after(in_a_minute) <= 60
+    a_minute_ago = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=60), usegmt=True)
+    assert parse_retry_after(a_minute_ago) == 0.0
+
+
+def test_retry_delay_waits_at_least_retry_after():
+    limiter = UpstreamLimiter()
+
+    assert limiter.retry_delay(0, _response(429, "4")) >= 4
+    assert limiter.retry_delay(0, _response(503)) <= settings.upstream_backoff_base
+    # Longer than any backoff: fail fast instead of holding the request
+    assert limiter.retry_delay(0, _response(429, str(settings.upstream_backoff_max + 1))) is None
+    assert limiter.retries == 2
+
+
+def test_retry_delay_gives_up_on_other_statuses_and_after_max_retries():
+    limiter = UpstreamLimiter()
+
+    assert limiter.retry_delay(0, _response(404)) is None
+    assert limiter.retry_delay(settings.upstream_max_retries, _response(503)) is None
+    assert limiter.retry_delay(0) is not None  # transport error
+    assert limiter.stats()["transport_errors"] == 1
+
+
+def test_retry_budget_caps_retries_to_a_share_of_traffic():
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, max_balance=2)
+
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    # Two first attempts earn one retry
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_exhausted_budget_denies_retries():
+    limiter = UpstreamLimiter()
+    limiter.budget = RetryBudget(ratio=0.0, min_per_second=0.0, max_balance=1)
+
+    assert limiter.retry_delay(0, _response(503)) is not None
+    assert limiter.retry_delay(0, _response(503)) is None
+    assert limiter.stats()["retries_denied"] == 1
+
+
+def test_throttle_halves_the_rate_and_blocks_until_retry_after():
+    bucket = TokenBucket(rate=10, burst=5)
+
+    bucket.throttle(retry_after=2)
+    assert bucket.rate == 5
+    assert 1.9 < bucket.reserve() <= 2
+
+    bucket.throttle()
+    bucket.throttle()
+    bucket.throttle()
+    assert bucket.rate == 10 * settings.upstream_min_rate_fraction
+
+    bucket.recover()
+    assert bucket.rate > 10 * settings.upstream_min_rate_fraction
+
+
+def test_observed_429_throttles_the_host():
+    limiter = UpstreamLimiter()
+    limiter._hosts["portal"] = bucket = TokenBucket(rate=10, burst=5)
+
+    limiter.observe("portal", _response(429, "1"))
+
+    assert bucket.rate == 5
+    assert bucket.blocked_until > time.monotonic()
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_one_users_cold_page_loads_are_not_delayed(run):
+    limiter = UpstreamLimiter()
+
+    async def scenario():
+        # A cold dashboard, pending assignments and week view back to back
+        # (12 courses: about 20 upstream calls each)
+        for _ in range(3 * 20):
+            await limiter.acquire("portal", session_key="token")
+
+    run(scenario())
+
+    assert limiter.stats()["delayed"] == 0
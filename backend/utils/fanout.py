@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def fan_out_courses(
+    courses: List[Dict[str, Any]],
+    fetch: Callable[[str], Awaitable[Any]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None
+) -> Tuple[List[Tuple[Dict[str, Any], Any]], List[Dict[str, str]]]:
+    """
+    Run fetch(course_hash) for every course with bounded concurrency
+
+    Args:
+        courses: Course dicts as returned by NewtonClient.get_courses()
+        fetch: Coroutine function called with each course hash
+        concurrency: Maximum calls in flight (defaults to settings)
+        timeout: Per-call timeout in seconds (defaults to settings)
+
+    Returns:
+        Tuple of ([(course, result), ...] in course order, [error, ...]) where
+        each error is {"course_hash": ..., "error": ...}
+    """
+    concurrency = concurrency or settings.course_fanout_concurrency
+    timeout = timeout or settings.course_call_timeout
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(course_hash: str):
+        async with semaphore:
+            return await asyncio.wait_for(fetch(course_hash), timeout)
+
+    targets = [course for course in courses if course.get("hash")]
+    outcomes = await asyncio.gather(
+        *(run(course["hash"]) for course in targets),
+        return_exceptions=True
+    )
+
+    results = []
+    errors = []
+    for course, outcome in zip(targets, outcomes):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            message = "Timed out" if isinstance(outcome, asyncio.TimeoutError) else str(outcome)
+            logger.error(f"Error fetching data for course {course['hash']}: {message}")
+            errors.append({"course_hash": course["hash"], "error": message})
+            continue
+        results.append((course, outcome))
+
+    return results, errors
@@ -0,0 +1,426 @@
+"""
+Prometheus text-format metrics
+
+Histograms and counters are fixed-size series created once per label set
+(callers keep the series returned by labels() and observe into it), so
+recording a value only bumps preallocated bucket counts. Gauges are read
+from service stats() at scrape time.
+
+With uvicorn workers each process has its own registry; when METRICS_DIR is
+set every worker writes a snapshot there every METRICS_FLUSH_INTERVAL
+seconds and /metrics in any worker merges them: histograms and counters are
+summed (including those of exited workers, so totals don't go backwards),
+gauges are reported per live worker with a worker="<pid>" label. Empty the
+directory when deploying, as with prometheus_client's multiprocess mode.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "autopilot"
+
+# Seconds; upstream calls range from cache hits to slow portal pages
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """One histogram series: per-bucket counts (last one is +Inf) and the sum"""
+
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Counter:
+    """One monotonically increasing counter series"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Family:
+    """A named metric and its series, one per label-value tuple"""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        labelnames: Sequence[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use"""
+        series = self.series.get(values)
+        if series is None:
+            with self._lock:
+                series = self.series.get(values)
+                if series is None:
+                    series = Histogram(self.buckets) if self.kind == "histogram" else Counter()
+                    self.series[values] = series
+        return series
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Metric families of this process, service gauges and the multi-worker merge
+
+    Args:
+        directory: Shared snapshot directory for multi-worker merging ("" = off)
+        flush_interval: Seconds between snapshot writes
+    """
+
+    def __init__(self, directory: str, flush_interval: float):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.families: Dict[str, Family] = {}
+        self._gauge_sources: List[Tuple[str, Callable[[], Dict[str, Any]], str]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Family:
+        return self._family(name, help, "histogram", labelnames, buckets)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family(name, help, "counter", labelnames)
+
+    def _family(self, name, help, kind, labelnames, buckets=LATENCY_BUCKETS) -> Family:
+        name = f"{NAMESPACE}_{name}"
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = Family(name, help, kind, labelnames, buckets)
+        return family
+
+    def gauge_source(self, prefix: str, collect: Callable[[], Dict[str, Any]], label: str = "key"):
+        """
+        Export a stats() dict as gauges at scrape time
+
+        Numbers and booleans become <namespace>_<prefix>_<key>; a dict of
+        numbers becomes one gauge with its keys in the `label` label.
+        """
+        self._gauge_sources.append((prefix, collect, label))
+
+    # Snapshots
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms, counters and gauges of this process in a JSON-safe form"""
+        families = {}
+        for name, family in self.families.items():
+            series = []
+            for values, item in list(family.series.items()):
+                if family.kind == "histogram":
+                    series.append([list(values), list(item.counts), item.sum])
+                else:
+                    series.append([list(values), item.value])
+            families[name] = {
+                "kind": family.kind,
+                "help": family.help,
+                "labelnames": list(family.labelnames),
+                "buckets": list(family.buckets),
+                "series": series,
+            }
+
+        return {
+            "pid": os.getpid(),
+            "written_at": time.time(),
+            "families": families,
+            "gauges": self._collect_gauges(),
+        }
+
+    def _collect_gauges(self) -> List[List[Any]]:
+        """[[name, label name or None, label value, value], ...]"""
+        gauges = []
+        for prefix, collect, label in self._gauge_sources:
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.warning(f"Metrics gauge source {prefix} failed: {e}")
+                continue
+
+            for key, value in stats.items():
+                name = f"{NAMESPACE}_{prefix}_{key}"
+                if isinstance(value, (bool, int, float)):
+                    gauges.append([name, None, None, float(value)])
+                elif isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        if isinstance(sub_value, (bool, int, float)):
+                            gauges.append([name, label, str(sub_key), float(sub_value)])
+        return gauges
+
+    def _worker_snapshots(self) -> List[Dict[str, Any]]:
+        """Snapshots written by the other workers"""
+        snapshots = []
+        own = f"worker-{os.getpid()}.json"
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return snapshots
+
+        for name in names:
+            if not name.startswith("worker-") or not name.endswith(".json") or name == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # being replaced or removed
+        return snapshots
+
+    def flush(self):
+        """Write this worker's snapshot to the shared directory"""
+        if not self.directory:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"worker-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+        self.flushes += 1
+
+    async def start(self):
+        if not self.directory or self._task:
+            return
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.directory:
+            self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                self.flush_errors += 1
+                logger.warning(f"Metrics snapshot write failed: {e}")
+
+    # Exposition
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        snapshots = [self.snapshot()]
+        if self.directory:
+            snapshots.extend(self._worker_snapshots())
+
+        lines: List[str] = []
+        self._render_families(snapshots, lines)
+        self._render_gauges(snapshots, lines)
+        return "\n".join(lines) + "\n"
+
+    def _render_families(self, snapshots: List[Dict[str, Any]], lines: List[str]):
+        # name -> (family description, {label values: merged counts or value})
+        merged: Dict[str, Tuple[Dict[str, Any], Dict[Tuple[str, ...], Any]]] = {}
+        for snapshot in snapshots:
+            for name, family in snapshot["families"].items():
+                _, series = merged.setdefault(name, (family, {}))
+                for item in family["series"]:
+                    values = tuple(item[0])
+                    if family["kind"] == "histogram":
+                        counts, total = series.get(values, ([0] * len(item[1]), 0.0))
+                        if len(counts) != len(item[1]):
+                            continue  # buckets changed between deploys
+                        series[values] = ([a + b for a, b in zip(counts, item[1])], total + item[2])
+                    else:
+                        series[values] = series.get(values, 0.0) + item[1]
+
+        for name in sorted(merged):
+            family, series = merged[name]
+            labelnames = family["labelnames"]
+            # In the 0.0.4 text format a family's samples carry its exact
+            # name, so counters are declared under their <name>_total samples
+            exposed = f"{name}_total" if family["kind"] == "counter" else name
+            lines.append(f"# HELP {exposed} {family['help']}")
+            lines.append(f"# TYPE {exposed} {family['kind']}")
+
+            for values in sorted(series):
+                if family["kind"] == "counter":
+                    lines.append(f"{exposed}{_labels(labelnames, values)} {_number(series[values])}")
+                    continue
+
+                counts, total = series[values]
+                cumulative = 0
+                for bound, count in zip(list(family["buckets"]) + [float("inf")], counts):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{name}_bucket{_labels(labelnames, values, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labelnames, values)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labelnames, values)} {cumulative}")
+
+    def _render_gauges(self, snapshots: List[Dict[str, Any]], lines: List[str]):
+        stale_before = time.time() - 3 * self.flush_interval
+        by_name: Dict[str, List[str]] = {}
+
+        for snapshot in snapshots:
+            if snapshot["pid"] != os.getpid() and snapshot["written_at"] < stale_before:
+                continue  # worker has exited
+
+            worker = f'worker="{snapshot["pid"]}"' if self.directory else ""
+            for name, label, label_value, value in snapshot["gauges"]:
+                names, values = ([label], [label_value]) if label else ([], [])
+                by_name.setdefault(name, []).append(f"{name}{_labels(names, values, worker)} {_number(value)}")
+
+        for name in sorted(by_name):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(by_name[name])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "families": len(self.families),
+            "series": sum(len(family.series) for family in self.families.values()),
+            "multi_worker": bool(self.directory),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+metrics = MetricsRegistry(
+    directory=settings.metrics_dir,
+    flush_interval=settings.metrics_flush_interval
+)
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template, including streamed bodies",
+    ("method", "route")
+)
+HTTP_REQUEST_ERRORS = metrics.counter(
+    "http_request_errors",
+    "API requests answered with 5xx or failed with an unhandled exception",
+    ("method", "route")
+)
+
+_HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+_route_templates: Dict[Any, str] = {}
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled the request ("unmatched" if none)"""
+    # The router stores the matched endpoint in the (shared) scope
+    endpoint = scope.get("endpoint")
+    template = _route_templates.get(endpoint)
+    if template is None:
+        template = "unmatched"
+        if endpoint is not None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+        _route_templates[endpoint] = template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP_REQUEST_DURATION and HTTP_REQUEST_ERRORS"""
+
+    def __init__(self, app):
+        self.app = app
+        # endpoint -> method -> (duration series, error series)
+        self._series: Dict[Any, Dict[str, Tuple[Histogram, Counter]]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration, errors = self._series_for(scope)
+            duration.observe(time.perf_counter() - started)
+            if status >= 500:
+                errors.inc()
+
+    def _series_for(self, scope) -> Tuple[Histogram, Counter]:
+        endpoint = scope.get("endpoint")
+        method = scope["method"] if scope["method"] in _HTTP_METHODS else "OTHER"
+
+        by_method = self._series.get(endpoint)
+        if by_method is None:
+            by_method = self._series.setdefault(endpoint, {})
+
+        series = by_method.get(method)
+        if series is None:
+            route = route_template(scope)
+            series = by_method[method] = (
+                HTTP_REQUEST_DURATION.labels(method, route),
+                HTTP_REQUEST_ERRORS.labels(method, route)
+            )
+        return series
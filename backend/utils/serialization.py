@@ -0,0 +1,66 @@
+from fastapi import Response
+from pydantic import BaseModel
+from typing import Any, Dict, Type, TypeVar, Union
+from datetime import date, datetime
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the standard library encoder
+    orjson = None
+
+from config import settings
+from utils.tracing import current_trace, phase
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def build(model: Type[M], **fields: Any) -> Union[M, Dict[str, Any]]:
+    """
+    Create a response item from upstream fields
+
+    With FAST_SERIALIZATION enabled the fields are trusted as they are and
+    returned as a plain dict: no model instance, validation or coercion
+    (e.g. datetimes keep the upstream string form). Otherwise the model is
+    validated as usual.
+    """
+    if settings.fast_serialization:
+        return fields
+
+    trace = current_trace()
+    if trace is None:
+        return model(**fields)
+
+    started = time.perf_counter()
+    instance = model(**fields)
+    trace.record("model", started, time.perf_counter() - started)
+    return instance
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize dicts, lists and models to JSON bytes"""
+    with phase("serialize"):
+        if orjson is not None:
+            return orjson.dumps(value, default=_default)
+        return json.dumps(value, separators=(",", ":"), default=_default).encode()
+
+
+def respond(value: Union[BaseModel, Dict[str, Any]]) -> Union[BaseModel, Response]:
+    """
+    Return a route's response body
+
+    On the fast path the body is rendered here, which skips FastAPI's
+    response_model revalidation and its default JSON encoder.
+    """
+    if not settings.fast_serialization:
+        return value
+    return Response(content=dumps(value), media_type="application/json")
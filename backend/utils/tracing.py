@@ -0,0 +1,287 @@
+"""
+Per-request phase timing, Server-Timing headers and sampled profiling
+
+TracingMiddleware puts a RequestTrace in a context variable for each API
+request. Code on the request path adds its time to a phase with record() or
+phase(); tasks spawned by the request (course fan-out) copy the context and
+add to the same trace, so phase totals of concurrent work can exceed the
+request's wall time. Phases:
+
+    upstream       HTTP calls to the portal (one span per attempt)
+    upstream_wait  rate limiter waits and retry backoff
+    db             SQL statements (one span each)
+    model          response model construction and validation
+    serialize      JSON rendering on the fast path and NDJSON streams
+
+The totals are sent as a Server-Timing header (for streamed responses only
+the part before the first byte) and finished traces, with their spans, are
+kept in a ring buffer for /debug/traces.
+
+A TRACE_PROFILE_SAMPLE_RATE fraction of requests runs under cProfile (one
+at a time; the profile covers everything the event loop ran meanwhile) and
+the profile is written to TRACE_PROFILE_DIR when the request took longer
+than TRACE_PROFILE_THRESHOLD_MS.
+
+Event streams (text/event-stream) stay open by design: their trace is
+dropped and their profiler stopped as soon as the stream starts.
+"""
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from utils.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """Phase totals and spans of one request"""
+
+    __slots__ = ("started", "phases", "spans", "max_spans", "finished")
+
+    def __init__(self, max_spans: int):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}  # phase -> [seconds, count]
+        self.spans: List[Tuple[str, float, float, Optional[str]]] = []
+        self.max_spans = max_spans
+        self.finished = False
+
+    def record(self, phase: str, started: float, duration: float, detail: Optional[str] = None):
+        """Add duration to a phase; with a detail it is also kept as a span"""
+        if self.finished:
+            return  # background work that outlived the request
+
+        totals = self.phases.get(phase)
+        if totals is None:
+            totals = self.phases[phase] = [0.0, 0]
+        totals[0] += duration
+        totals[1] += 1
+
+        if detail is not None and len(self.spans) < self.max_spans:
+            self.spans.append((phase, started - self.started, duration, detail))
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [
+            f'{phase};dur={seconds * 1000:.1f};desc="{count}x"'
+            for phase, (seconds, count) in self.phases.items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being handled, if tracing is on"""
+    return _current.get()
+
+
+def record(phase: str, started: float, duration: float, detail: Optional[str] = None):
+    """Add a measured duration to the current request's trace, if any"""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(phase, started, duration, detail)
+
+
+@contextmanager
+def phase(name: str, detail: Optional[str] = None) -> Iterator[None]:
+    """Time the block into a phase of the current request's trace"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(name, started, time.perf_counter() - started, detail)
+
+
+class Tracer:
+    """
+    Recent traces and sampled cProfile dumps
+
+    Args:
+        buffer_size: Finished traces kept for /debug/traces
+        max_spans: Spans kept per trace
+        profile_sample_rate: Fraction of requests profiled (0 = off)
+        profile_threshold_ms: Profiles of faster requests are discarded
+        profile_dir: Directory for .prof dumps (pstats / snakeviz format)
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        max_spans: int,
+        profile_sample_rate: float,
+        profile_threshold_ms: float,
+        profile_dir: str
+    ):
+        self.max_spans = max_spans
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_threshold_ms = profile_threshold_ms
+        self.profile_dir = profile_dir
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self._profiling = False
+        self.traced = 0
+        self.slow = 0
+        self.profiled = 0
+        self.profiles_written = 0
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        """A running profiler if this request is sampled and none is active"""
+        if self._profiling or not self.profile_sample_rate or random.random() >= self.profile_sample_rate:
+            return None
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # another profiler (e.g. a debugger) is active
+        self._profiling = True
+        self.profiled += 1
+        return profiler
+
+    async def finish(
+        self,
+        scope: Dict[str, Any],
+        trace: RequestTrace,
+        status: int,
+        profiler: Optional[cProfile.Profile]
+    ):
+        trace.finished = True
+        duration_ms = (time.perf_counter() - trace.started) * 1000
+        route = route_template(scope)
+        self.traced += 1
+
+        self._recent.append({
+            "at": datetime.utcnow().isoformat(),
+            "method": scope["method"],
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "phases": {
+                phase: {"ms": round(seconds * 1000, 2), "count": count}
+                for phase, (seconds, count) in trace.phases.items()
+            },
+            "spans": [
+                {"phase": phase, "start_ms": round(start * 1000, 2), "ms": round(duration * 1000, 2), "detail": detail}
+                for phase, start, duration, detail in trace.spans
+            ],
+        })
+
+        slow = duration_ms >= self.profile_threshold_ms
+        if slow:
+            self.slow += 1
+
+        if profiler is None:
+            return
+
+        profiler.disable()
+        self._profiling = False
+        if slow:
+            try:
+                path = await asyncio.to_thread(self._dump, profiler, scope["method"], route, duration_ms)
+                self.profiles_written += 1
+                logger.info(f"Slow request profile written to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write request profile: {e}")
+
+    def discard(self, trace: RequestTrace, profiler: Optional[cProfile.Profile]):
+        """Stop tracing a request without recording it"""
+        trace.finished = True
+        if profiler is not None:
+            profiler.disable()
+            self._profiling = False
+
+    def _dump(self, profiler: cProfile.Profile, method: str, route: str, duration_ms: float) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        path = os.path.join(self.profile_dir, f"{stamp}-{method}-{name}-{duration_ms:.0f}ms.prof")
+        profiler.dump_stats(path)
+        return path
+
+    def recent(self, limit: int = 50, min_ms: float = 0) -> List[Dict[str, Any]]:
+        """Most recent finished traces first"""
+        traces = []
+        for item in reversed(self._recent):
+            if item["duration_ms"] >= min_ms:
+                traces.append(item)
+                if len(traces) >= limit:
+                    break
+        return traces
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.tracing_enabled,
+            "traced": self.traced,
+            "buffered": len(self._recent),
+            "slow": self.slow,
+            "profiled": self.profiled,
+            "profiles_written": self.profiles_written,
+            "profile_sample_rate": self.profile_sample_rate,
+            "profile_threshold_ms": self.profile_threshold_ms,
+        }
+
+
+tracer = Tracer(
+    buffer_size=settings.trace_buffer_size,
+    max_spans=settings.trace_max_spans,
+    profile_sample_rate=settings.trace_profile_sample_rate,
+    profile_threshold_ms=settings.trace_profile_threshold_ms,
+    profile_dir=settings.trace_profile_dir
+)
+
+
+class TracingMiddleware:
+    """ASGI middleware tracing each request and adding its Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(tracer.max_spans)
+        token = _current.set(trace)
+        profiler = tracer.start_profile()
+        status = 500
+        streaming = False
+
+        async def send_with_timing(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+                streaming = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in headers
+                )
+                if streaming:
+                    tracer.discard(trace, profiler)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if not streaming:
+                await tracer.finish(scope, trace, status, profiler)
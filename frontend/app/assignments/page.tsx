@@ -21,7 +21,7 @@ export default function AssignmentsPage() {
         status: statusFilter,
         difficulty: difficultyFilter,
         limit: 50,
-      }).then((res) => res.data)
+      }).then((res) => res.data.assignments)
   );
 
   const assignments = data || [];
@@ -12,7 +12,7 @@ export default function PerformancePage() {
   );
 
   const { data: courses, isLoading: loadingCourses } = useSWR('/performance/courses', () =>
-    performanceAPI.allCourses().then((res) => res.data)
+    performanceAPI.allCourses().then((res) => res.data.courses)
   );
 
   const stats = [
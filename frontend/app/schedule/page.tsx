@@ -7,14 +7,13 @@ import { scheduleAPI } from '@/lib/api';
 import useSWR from 'swr';
 import { Calendar, Clock, MapPin, ExternalLink, User } from 'lucide-react';
 import { formatTime, getTimeUntil } from '@/lib/utils';
+import { useScheduleStream } from '@/lib/useScheduleStream';
 
 export default function SchedulePage() {
-  const { data: todaySchedule, isLoading: loadingToday } = useSWR('/schedule/today', () =>
-    scheduleAPI.today().then((res) => res.data)
-  );
+  const { classes: todaySchedule, isLoading: loadingToday } = useScheduleStream();
 
   const { data: weekSchedule, isLoading: loadingWeek } = useSWR('/schedule/week', () =>
-    scheduleAPI.week().then((res) => res.data)
+    scheduleAPI.week().then((res) => res.data.classes)
   );
 
   const today = todaySchedule || [];
@@ -2,16 +2,17 @@
 
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
-import { assignmentsAPI } from '@/lib/api';
+import { dashboardAPI } from '@/lib/api';
 import useSWR from 'swr';
 import { Clock, AlertCircle } from 'lucide-react';
 import { formatDateTime } from '@/lib/utils';
 import Link from 'next/link';
 
 export function DeadlineWidget() {
-  const { data, isLoading } = useSWR('/assignments?status=pending&limit=10', () =>
-    assignmentsAPI.list({ status: 'pending', limit: 10 }).then((res) => res.data)
+  const { data: dashboard, isLoading } = useSWR('/dashboard', () =>
+    dashboardAPI.get().then((res) => res.data)
   );
+  const data = dashboard?.assignments?.assignments;
 
   if (isLoading) {
     return (
@@ -1,14 +1,15 @@
 'use client';
 
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
-import { performanceAPI } from '@/lib/api';
+import { dashboardAPI } from '@/lib/api';
 import useSWR from 'swr';
 import { TrendingUp, Award, Calendar, Flame } from 'lucide-react';
 
 export function PerformanceWidget() {
-  const { data, isLoading } = useSWR('/performance/overview', () =>
-    performanceAPI.overview().then((res) => res.data)
+  const { data: dashboard, isLoading } = useSWR('/dashboard', () =>
+    dashboardAPI.get().then((res) => res.data)
   );
+  const data = dashboard?.performance;
 
   if (isLoading) {
     return (
@@ -2,15 +2,12 @@
 
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
-import { scheduleAPI } from '@/lib/api';
-import useSWR from 'swr';
 import { Clock, MapPin, ExternalLink } from 'lucide-react';
 import { formatTime, getTimeUntil } from '@/lib/utils';
+import { useScheduleStream } from '@/lib/useScheduleStream';
 
 export function ScheduleWidget() {
-  const { data, isLoading } = useSWR('/schedule/today', () =>
-    scheduleAPI.today().then((res) => res.data)
-  );
+  const { classes: data, isLoading } = useScheduleStream();
 
   if (isLoading) {
     return (
@@ -71,6 +71,12 @@ export const scheduleAPI = {
     api.get('/api/schedule/week', { params: { start_date: startDate } }),
   joinClass: (lectureSlotHash: string) =>
     api.post('/api/schedule/join-class', { lecture_slot_hash: lectureSlotHash }),
+  // EventSource cannot send headers, so it authenticates with a single-use
+  // ticket; get a new one for every (re)connect
+  streamUrl: async () => {
+    const response = await api.post('/api/schedule/stream-ticket');
+    return `${API_BASE_URL}/api/schedule/stream?ticket=${encodeURIComponent(response.data.ticket)}`;
+  },
 };
 
 // Performance API
@@ -81,6 +87,11 @@ export const performanceAPI = {
   allCourses: () => api.get('/api/performance/courses'),
 };
 
+// Dashboard API
+export const dashboardAPI = {
+  get: () => api.get('/api/dashboard'),
+};
+
 // Solver API
 export const solverAPI = {
   mcq: (question: string, options: Record<string, string>, context?: string) =>
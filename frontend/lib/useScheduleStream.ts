@@ -0,0 +1,79 @@
+'use client';
+
+import { useEffect, useState } from 'react';
+import { scheduleAPI } from '@/lib/api';
+
+const byStart = (a: any, b: any) => a.start_timestamp - b.start_timestamp;
+
+// Wait before reconnecting a stream the server closed
+const RECONNECT_DELAY = 5000;
+
+// Today's classes pushed by /api/schedule/stream: a full snapshot first,
+// then only changes. Replaces polling /api/schedule/today.
+export function useScheduleStream() {
+  const [classes, setClasses] = useState<any[] | undefined>(undefined);
+  const [starting, setStarting] = useState<string[]>([]);
+
+  useEffect(() => {
+    if (!localStorage.getItem('session_id')) return;
+
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    // Tickets are single-use, so EventSource's own reconnect cannot
+    // authenticate; every connect fetches a new one
+    const connect = async () => {
+      let url: string;
+      try {
+        url = await scheduleAPI.streamUrl();
+      } catch {
+        if (!closed) retry = setTimeout(connect, RECONNECT_DELAY);
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(url);
+      listen(source);
+      source.onerror = () => {
+        source?.close();
+        if (!closed) retry = setTimeout(connect, RECONNECT_DELAY);
+      };
+    };
+
+    const listen = (source: EventSource) => {
+      const on = (event: string, handler: (data: any) => void) =>
+        source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+
+      const upsert = (item: any) =>
+        setClasses((prev) => [...(prev || []).filter((c) => c.hash !== item.hash), item].sort(byStart));
+
+      on('snapshot', (data) => {
+        setClasses(data.classes);
+        setStarting([]);
+      });
+      on('added', upsert);
+      on('updated', upsert);
+      on('removed', (data) => setClasses((prev) => (prev || []).filter((c) => c.hash !== data.hash)));
+      on('starting', (data) => {
+        upsert(data);
+        setStarting((prev) => (prev.includes(data.hash) ? prev : [...prev, data.hash]));
+      });
+      on('revoked', () => {
+        closed = true;
+        source.close();
+        localStorage.removeItem('session_id');
+        window.location.href = '/login';
+      });
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }, []);
+
+  return { classes, starting, isLoading: classes === undefined };
+}